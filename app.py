@@ -1,41 +1,195 @@
-from flask import Flask, request, redirect, session, render_template_string
-import psycopg2
+from flask import Blueprint, Flask, Response, current_app, request, redirect, session, render_template, jsonify
+from jinja2 import DictLoader
+import functools
+import gzip
+import hmac
 import os
-import requests
-from googletrans import Translator
+import tempfile
+import threading
+import time
+import zlib
+import click
 
-app = Flask(__name__)
-app.secret_key = 'mysecret'
-translator = Translator()
+import metrics
+import srs
+from db_pool import ConnectionPool
+from enrichment import enrich_words, make_translator, upstream_stats as get_upstream_stats
+from enrichment_cache import EnrichmentCache, normalize_word
+from offline_dictionary import OfflineDictionary, build as build_offline_dictionary, read_csv
+from page_cache import FilePageCache, MemoryPageCache
+from storage import PostgresStorage, SQLiteStorage, TimedPgCursor
+from word_import import WordImporter
+from enrichment_queue import (MemoryEnrichmentQueue, PostgresEnrichmentQueue,
+                              CREATE_TABLES_SQL as CREATE_ENRICHMENT_QUEUE_SQL)
+
+bp = Blueprint('vocab', __name__, cli_group=None)
+
+# --- Storage Backend ---
+# "postgres" for production; "sqlite" keeps everything in one local file (one node,
+# or load tests without a database server).
+STORAGE_BACKEND = os.environ.get("STORAGE", "postgres")
+SQLITE_PATH = os.environ.get("SQLITE_PATH", "vocab.db")
 
 # --- PostgreSQL Config ---
-DATABASE_URL = os.environ["DATABASE_INTERNAL_URL"]
+# DATABASE_INTERNAL_URL is read when the first connection is opened, so importing
+# this module needs no database.
 # add below value during local testing
-# DATABASE_URL = "NEED TO UDASET FROM RENDER"
+# os.environ["DATABASE_INTERNAL_URL"] = "NEED TO UDASET FROM RENDER"
+
+# --- Connection Pool Config (per gunicorn worker) ---
+DB_POOL_MIN = int(os.environ.get("DB_POOL_MIN", 1))
+DB_POOL_MAX = int(os.environ.get("DB_POOL_MAX", 10))
+DB_POOL_MAX_LIFETIME = int(os.environ.get("DB_POOL_MAX_LIFETIME", 1800))
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 10))
+
+# --- Enrichment Mode ---
+# "sync" enriches inside the /add_word request; "background" saves words as pending
+# and lets a worker pool fill in meanings ("postgres" queue, or "memory" for local runs).
+ENRICHMENT_MODE = os.environ.get("ENRICHMENT_MODE", "sync")
+ENRICHMENT_QUEUE_BACKEND = os.environ.get("ENRICHMENT_QUEUE", "postgres")
+
+# --- Offline Dictionary ---
+# File built by `flask --app app build-dictionary`; words found there skip the translator
+# and dictionary APIs. Unset to always go to the network.
+OFFLINE_DICTIONARY_PATH = os.environ.get("OFFLINE_DICTIONARY_PATH")
+
+# --- Bulk Import ---
+# Uploads are spooled to disk and imported in chunks by IMPORT_WORKERS threads per worker.
+IMPORT_MAX_BYTES = int(os.environ.get("IMPORT_MAX_BYTES", 5 * 1024 * 1024))
+IMPORT_CHUNK_SIZE = int(os.environ.get("IMPORT_CHUNK_SIZE", 200))
+IMPORT_WORKERS = int(os.environ.get("IMPORT_WORKERS", 1))
+
+# --- Response Compression ---
+# Responses of at least COMPRESS_MIN_SIZE bytes are gzipped for clients that accept it.
+COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", 1024))
+COMPRESS_LEVEL = int(os.environ.get("COMPRESS_LEVEL", 6))
+
+# --- Worker Stats ---
+# /pool_stats, /cache_stats, /queue_stats, /upstream_stats and /metrics show pids,
+# file paths and upstream health. With STATS_TOKEN set they are served only to
+# requests sending "Authorization: Bearer <token>" (e.g. the Prometheus scraper);
+# without it they need a logged-in session.
+STATS_TOKEN = os.environ.get("STATS_TOKEN")
+
+# --- Word History Page Cache ---
+# Rendered /word_history pages per user and page, dropped when the user adds words.
+# "memory" is per worker and only safe with one worker; "file" is shared by every
+# worker on the host; "off" renders every request.
+PAGE_CACHE = os.environ.get("PAGE_CACHE", "off")
+PAGE_CACHE_DIR = os.environ.get("PAGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "vocab-page-cache"))
+PAGE_CACHE_SIZE = int(os.environ.get("PAGE_CACHE_SIZE", 10000))
+PAGE_CACHE_TTL = int(os.environ.get("PAGE_CACHE_TTL", 300))
+
+# --- Lazily created per-process services ---
+_services = {}
+# Re-entrant: factories may build the services they depend on (e.g. storage)
+_services_lock = threading.RLock()
+
+
+def _service(name, factory):
+    service = _services.get(name)
+    if service is None:
+        with _services_lock:
+            service = _services.get(name)
+            if service is None:
+                service = _services[name] = factory()
+    return service
+
+
+def get_pool():
+    return _service('db_pool', lambda: ConnectionPool(
+        os.environ["DATABASE_INTERNAL_URL"],
+        minconn=DB_POOL_MIN,
+        maxconn=DB_POOL_MAX,
+        max_lifetime=DB_POOL_MAX_LIFETIME,
+        checkout_timeout=DB_POOL_TIMEOUT,
+        sslmode=os.environ.get("DB_SSLMODE", "require"),
+        keepalives=1,
+        keepalives_idle=30,
+        cursor_factory=TimedPgCursor,
+    ))
+
+
+def get_storage():
+    if STORAGE_BACKEND == "sqlite":
+        return _service('storage', lambda: SQLiteStorage(SQLITE_PATH))
+    return _service('storage', lambda: PostgresStorage(get_pool()))
 
 
 def get_conn():
-    return psycopg2.connect(DATABASE_URL, sslmode='require')
+    return get_storage().connection()
+
+
+def get_translator():
+    return _service('translator', make_translator)
+
+
+def get_enrichment_cache():
+    """Memory LRU per worker, backed by the enrichment_cache table shared by all workers."""
+    return _service('enrichment_cache', lambda: EnrichmentCache(
+        get_storage(),
+        maxsize=int(os.environ.get("ENRICH_CACHE_SIZE", 2048)),
+        ttl=int(os.environ.get("ENRICH_CACHE_TTL", 3600)),
+        db_ttl_days=int(os.environ.get("ENRICH_CACHE_DB_TTL_DAYS", 30)),
+    ))
+
+
+def get_offline_dictionary():
+    """Memory-mapped word list consulted before the cache and the network, or None when not configured."""
+    if not OFFLINE_DICTIONARY_PATH:
+        return None
+    return _service('offline_dictionary', lambda: OfflineDictionary(OFFLINE_DICTIONARY_PATH))
+
+
+def enrich(words, refresh=False):
+    return enrich_words(get_translator(), words, cache=get_enrichment_cache(), refresh=refresh,
+                        offline=get_offline_dictionary())
+
+
+def get_page_cache():
+    if PAGE_CACHE == "memory":
+        return _service('page_cache', lambda: MemoryPageCache(maxsize=PAGE_CACHE_SIZE, ttl=PAGE_CACHE_TTL))
+    if PAGE_CACHE == "file":
+        return _service('page_cache', lambda: FilePageCache(PAGE_CACHE_DIR, maxsize=PAGE_CACHE_SIZE,
+                                                             ttl=PAGE_CACHE_TTL))
+    return None
+
+
+def invalidate_pages(user_id):
+    cache = get_page_cache()
+    if cache is not None:
+        cache.invalidate(user_id)
+
+
+def get_enrichment_queue():
+    # The durable queue lives in Postgres; a SQLite deployment always queues in memory
+    if ENRICHMENT_QUEUE_BACKEND == "memory" or STORAGE_BACKEND == "sqlite":
+        queue_class = MemoryEnrichmentQueue
+    else:
+        queue_class = PostgresEnrichmentQueue
+    return _service('enrichment_queue', lambda: queue_class(
+        get_storage(),
+        enrich,
+        workers=int(os.environ.get("ENRICH_QUEUE_WORKERS", 2)),
+        max_attempts=int(os.environ.get("ENRICH_QUEUE_MAX_ATTEMPTS", 5)),
+    ))
+
+
+def get_word_importer():
+    return _service('word_importer', lambda: WordImporter(
+        get_storage(),
+        save_words,
+        chunk_size=IMPORT_CHUNK_SIZE,
+        workers=IMPORT_WORKERS,
+    ))
 
 
 def init_db():
     with get_conn() as conn:
         cur = conn.cursor()
-        cur.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id SERIAL PRIMARY KEY,
-                username TEXT NOT NULL,
-                password TEXT NOT NULL
-            );
-        ''')
-        cur.execute('''
-            CREATE TABLE IF NOT EXISTS words (
-                id SERIAL PRIMARY KEY,
-                user_id INTEGER REFERENCES users(id),
-                word TEXT,
-                meaning TEXT
-            );
-        ''')
+        get_storage().create_schema(cur)
+        if STORAGE_BACKEND == "postgres":
+            cur.execute(CREATE_ENRICHMENT_QUEUE_SQL)
         users = [
             ('admin', 'pass123'),
             ('vinod', 'pass123'),
@@ -53,22 +207,24 @@ def init_db():
             ('user', 'pass123')
         ]
 
-        cur.execute("SELECT id FROM users WHERE username='admin'")
-        if not cur.fetchone():
-            cur.executemany("INSERT INTO users (username, password) VALUES (%s, %s)", users)
-        conn.commit()
+        get_storage().seed_users(cur, users)
 
 
-init_db()
+@bp.cli.command('init-db')
+def init_db_command():
+    """Create tables and indexes and seed the default users (run once per deploy)."""
+    init_db()
+    click.echo("✅ Database initialised")
 
-# --- Base Template ---
+# --- Templates ---
+# Served from a DictLoader, so Jinja compiles each page once per worker and reuses it.
 base_template = '''
 <!DOCTYPE html>
 <html lang="en">
 <head>
   <meta charset="UTF-8">
   <meta name="viewport" content="width=device-width, initial-scale=1">
-  <title>{{ title }}</title>
+  <title>{% block title %}Vocabulary App{% endblock %}</title>
   <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
   <style>
     body {
@@ -99,35 +255,45 @@ base_template = '''
 </head>
 <body class="bg-light">
   <div class="container py-4">
-    {{ content | safe }}
+    {% block content %}{% endblock %}
   </div>
 </body>
 </html>
 '''
 
 
-def render_with_base(content, title="Vocabulary App"):
-    return render_template_string(base_template, content=content, title=title)
+@bp.before_app_request
+def start_request_timer():
+    # Registered first, so the timer also covers the other before-request hooks
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    request.environ['vocab.timer'] = metrics.start_request(route)
 
 
-@app.route('/', methods=['GET', 'POST'])
-def login():
-    error = None
-    if request.method == 'POST':
-        uname = request.form['username']
-        pwd = request.form['password']
-        with get_conn() as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT id FROM users WHERE username=%s AND password=%s", (uname, pwd))
-            user = cur.fetchone()
-            if user:
-                session['user_id'] = user[0]
-                session['word_index'] = 0
-                return redirect('/home')
-            else:
-                error = "Invalid Credentials"
-
-    form = '''
+@bp.after_app_request
+def add_server_timing(response):
+    token = request.environ.pop('vocab.timer', None)
+    if token is not None:
+        response.headers['Server-Timing'] = metrics.finish_request(token, request.method, response.status_code)
+    return response
+
+
+@bp.teardown_app_request
+def stop_request_timer(exc):
+    # After an unhandled error no after-request hook ran; record the request as a 500
+    token = request.environ.pop('vocab.timer', None)
+    if token is not None:
+        metrics.finish_request(token, request.method, 500)
+
+
+@bp.before_app_request
+def start_enrichment_workers():
+    if ENRICHMENT_MODE == "background":
+        get_enrichment_queue().ensure_started()
+
+
+login_template = '''{% extends "base.html" %}
+{% block title %}Login{% endblock %}
+{% block content %}
     <h2 class="text-center">Login</h2>
     <form method="POST" class="card p-3 shadow">
       <div class="mb-3">
@@ -143,81 +309,63 @@ def login():
     {% if error %}
     <p class="text-danger mt-2">{{ error }}</p>
     {% endif %}
-    '''
-    return render_template_string(base_template, content=render_template_string(form, error=error), title="Login")
+{% endblock %}
+'''
 
 
-@app.route('/home')
-def home():
-    if 'user_id' not in session:
-        return redirect('/')
-    content = '''
+@bp.route('/', methods=['GET', 'POST'])
+def login():
+    error = None
+    if request.method == 'POST':
+        uname = request.form['username']
+        pwd = request.form['password']
+        with get_conn() as conn:
+            user_id = get_storage().find_user(conn.cursor(), uname, pwd)
+        if user_id:
+            session['user_id'] = user_id
+            session['word_index'] = 0
+            return redirect('/home')
+        else:
+            error = "Invalid Credentials"
+
+    return render_template('login.html', error=error)
+
+
+home_template = '''{% extends "base.html" %}
+{% block title %}Home{% endblock %}
+{% block content %}
     <div class="banner text-center">
         <h1>🧠 Grow Your Vocabulary</h1>
         <p>Learn new words daily, test yourself, and become a word wizard!</p>
     </div>
     <div class="row text-center">
-        <div class="col-md-4 mb-3">
+        <div class="col-md-3 mb-3">
             <a href="/add_word" class="btn btn-success btn-lg btn-rounded w-100 shadow">➕ Add New Word</a>
         </div>
-        <div class="col-md-4 mb-3">
+        <div class="col-md-3 mb-3">
             <a href="/word_history" class="btn btn-primary btn-lg btn-rounded w-100 shadow">📖 Word History</a>
         </div>
-        <div class="col-md-4 mb-3">
+        <div class="col-md-3 mb-3">
+            <a href="/review" class="btn btn-warning btn-lg btn-rounded w-100 shadow">🎯 Review</a>
+        </div>
+        <div class="col-md-3 mb-3">
             <a href="/logout" class="btn btn-danger btn-lg btn-rounded w-100 shadow">🚪 Logout</a>
         </div>
     </div>
-    '''
-    return render_with_base(content, "Home")
+{% endblock %}
+'''
 
 
-@app.route('/add_word', methods=['GET', 'POST'])
-def add_word():
+@bp.route('/home')
+def home():
     if 'user_id' not in session:
         return redirect('/')
+    return render_template('home.html')
 
-    message = None
-    if request.method == 'POST':
-        words = request.form.getlist('word[]')
-
-        with get_conn() as conn:
-            cur = conn.cursor()
 
-            for word in words:
-                word = word.strip()
-                if not word:
-                    continue
-
-                # Auto-translate and get examples
-                hindi_meaning = translator.translate(word, src='en', dest='hi').text
-                example_sentences = []
-                try:
-                    res = requests.get(f"https://api.dictionaryapi.dev/api/v2/entries/en/{word}")
-                    if res.status_code == 200:
-                        for meaning_data in res.json()[0].get('meanings', []):
-                            for d in meaning_data.get('definitions', []):
-                                if 'example' in d:
-                                    example_sentences.append(d['example'])
-                                if len(example_sentences) >= 2:
-                                    break
-                            if len(example_sentences) >= 2:
-                                break
-                except:
-                    pass
-
-                full_meaning = hindi_meaning
-                if example_sentences:
-                    full_meaning += "\nExamples:\n" + "\n".join(f"- {e}" for e in example_sentences)
-
-                cur.execute(
-                    "INSERT INTO words (user_id, word, meaning) VALUES (%s, %s, %s)",
-                    (session['user_id'], word, full_meaning)
-                )
-
-            conn.commit()
-            message = f"✅ {len(words)} word(s) added!"
-
-    form = '''
+add_word_template = '''{% extends "base.html" %}
+{% block title %}Add Words{% endblock %}
+{% block content %}
     <h2 class="text-center mb-4" style="font-family:'Poppins',sans-serif; font-weight:600;">Add Words</h2>
     {% if message %}
         <div class="alert alert-success">{{ message }}</div>
@@ -234,6 +382,7 @@ def add_word():
             <a href="/home" class="btn btn-outline-success btn-rounded px-4">HOME</a>
         </div>
     </form>
+    <p class="text-center mt-3"><a href="/import">📄 Import a long list from a CSV or text file</a></p>
 
     <script>
     document.addEventListener("DOMContentLoaded", function() {
@@ -256,85 +405,130 @@ def add_word():
         });
     });
     </script>
-    '''
-    return render_template_string(base_template, content=render_template_string(form, message=message),
-                                  title="Add Words")
+{% endblock %}
+'''
 
 
+def save_words(user_id, words):
+    """Store new words for a user and get their meanings filled in.
 
+    Returns ``(rows, missed)``: rows are ``(id, word, meaning, enrichment_status)``
+    like ``Storage.word_page``, and ``missed`` counts words that could not be
+    translated before the enrichment deadline (always 0 in background mode).
+    Words another user already added reuse their lexicon meaning.
+    """
+    if not words:
+        return [], 0
+    store = get_storage()
+    keys = [normalize_word(word) for word in words]
 
+    if ENRICHMENT_MODE == "background":
+        # Save right away and let the queue workers fill in meanings
+        with get_conn() as conn:
+            cur = conn.cursor()
+            word_ids = store.insert_words(cur, [(user_id, word, "", 'pending') for word in words])
+            entries = store.lexicon_entries(cur, keys)
+            jobs = [(lexicon_id, key) for key, (lexicon_id, _, status) in entries.items() if status == 'pending']
+            get_enrichment_queue().add(cur, jobs)
+        # After the commit, so no page can be rebuilt from the rows before it
+        invalidate_pages(user_id)
+        get_enrichment_queue().wake(jobs)
+        return [(word_id, key) + entries[key][1:] for word_id, key in zip(word_ids, keys)], 0
 
-@app.route('/word_history')
-def word_history():
+    with get_conn() as conn:
+        known = store.lexicon_entries(conn.cursor(), keys)
+    # Auto-translate and get examples for the new words at once, before taking a connection
+    todo = list(dict.fromkeys(key for key in keys if key not in known or known[key][2] != 'done'))
+    fetched = dict(zip(todo, enrich(todo))) if todo else {}
+    rows = []
+    for word, key in zip(words, keys):
+        if key in fetched:
+            meaning, status = fetched[key]
+            rows.append((user_id, key, meaning or "", status))
+        else:
+            rows.append((user_id, key, known[key][1], 'done'))
+    with get_conn() as conn:
+        word_ids = store.insert_words(conn.cursor(), rows)
+    invalidate_pages(user_id)
+    missed = sum(1 for key in keys if key in fetched and fetched[key][0] is None)
+    return [(word_id,) + row[1:] for word_id, row in zip(word_ids, rows)], missed
+
+
+@bp.route('/add_word', methods=['GET', 'POST'])
+def add_word():
     if 'user_id' not in session:
         return redirect('/')
 
-    page = int(request.args.get('page', 1))
-    per_page = 10
-    offset = (page - 1) * per_page
+    message = None
+    if request.method == 'POST':
+        words = [w.strip() for w in request.form.getlist('word[]') if w.strip()]
+        rows, missed = save_words(session['user_id'], words)
+
+        if ENRICHMENT_MODE == "background":
+            message = f"✅ {len(rows)} word(s) added! Meanings will appear in Word History shortly."
+        else:
+            message = f"✅ {len(rows)} word(s) added!"
+            if missed:
+                message += f" {missed} could not be translated in time."
+
+    return render_template('add_word.html', message=message)
+
 
-    with get_conn() as conn:
-        cur = conn.cursor()
 
-        # Count total words
-        cur.execute("SELECT COUNT(*) FROM words WHERE user_id=%s", (session['user_id'],))
-        total_words = cur.fetchone()[0]
-
-        # Fetch paginated words
-        cur.execute("""
-            SELECT word, meaning FROM words
-            WHERE user_id=%s
-            ORDER BY id DESC
-            LIMIT %s OFFSET %s
-        """, (session['user_id'], per_page, offset))
-        words = cur.fetchall()
-
-    total_pages = (total_words + per_page - 1) // per_page
-
-    # Bootstrap bright colors
-    colors = [
-        "primary", "success", "danger", "warning", "info",
-        "secondary", "dark"
-    ]
-
-    # Generate HTML blocks
-    word_blocks = ""
-    for idx, (w, m) in enumerate(words, start=1):
-        color_class = colors[(idx - 1) % len(colors)]
-        formatted_meaning = m.replace("\n", "<br>")
-
-        word_blocks += f"""
+
+
+WORDS_PER_PAGE = 10
+API_MAX_PER_PAGE = 100
+API_MAX_ADD = 100
+
+
+word_history_template = '''{% extends "base.html" %}
+{% block title %}Word History{% endblock %}
+{% block content %}
+    <h2 class="text-center mb-4" style="font-family:'Poppins',sans-serif; font-weight:600;">Word History</h2>
+    <form action="/search" method="GET" class="d-flex mb-4">
+        <input name="q" class="form-control me-2" placeholder="Search your words and meanings" required>
+        <button type="submit" class="btn btn-outline-primary btn-rounded">🔍</button>
+    </form>
+    {% for word_id, w, m, status in words %}
+    {% set idx = loop.index %}
+    {% set color_class = colors[loop.index0 % colors|length] %}
         <div class="mb-3">
-            <button class="btn btn-{color_class} w-100 text-start" 
-                    style="border-radius: 25px; font-family: 'Poppins', sans-serif; 
-                           font-size: 1.15rem; font-weight: 600; padding: 12px 16px; 
+            <button class="btn btn-{{ color_class }} w-100 text-start"
+                    style="border-radius: 25px; font-family: 'Poppins', sans-serif;
+                           font-size: 1.15rem; font-weight: 600; padding: 12px 16px;
                            text-transform: capitalize;"
-                    onclick="toggleMeaning('meaning_{idx}')">
-                {idx}. {w}
+                    onclick="toggleMeaning('meaning_{{ idx }}')">
+                {{ idx }}. {{ w }}
             </button>
-            <div id="meaning_{idx}" 
-                 class="p-3 mt-1 rounded text-white" 
-                 style="display:none; background-color: var(--bs-{color_class}-rgb, var(--bs-{color_class})); 
-                        background-color: rgba(var(--bs-{color_class}-rgb), 0.85); 
+            <div id="meaning_{{ idx }}"
+                 class="p-3 mt-1 rounded text-white"
+                 style="display:none; background-color: var(--bs-{{ color_class }}-rgb, var(--bs-{{ color_class }}));
+                        background-color: rgba(var(--bs-{{ color_class }}-rgb), 0.85);
                         font-size: 1rem; font-weight: 500;">
-                {formatted_meaning}
+                {% if status == 'pending' %}
+                ⏳ Meaning is being fetched, check back shortly.
+                {% elif status == 'failed' %}
+                ⚠️ Could not fetch a meaning for this word.
+                {% else %}
+                {% for line in m.split("\\n") %}{{ line }}{% if not loop.last %}<br>{% endif %}{% endfor %}
+                {% endif %}
             </div>
         </div>
-        """
+    {% endfor %}
+
+    <div class="d-flex justify-content-between mt-4">
+        {% if has_newer and words %}
+        <a href="?after={{ words[0][0] }}" class="btn btn-outline-primary btn-rounded px-4">⬅ PREV</a>
+        {% else %}
+        <span></span>
+        {% endif %}
+        <a href="/home" class="btn btn-outline-success btn-rounded px-4">HOME</a>
+        {% if has_older and words %}
+        <a href="?before={{ words[-1][0] }}" class="btn btn-outline-primary btn-rounded px-4">NEXT ➡</a>
+        {% endif %}
+    </div>
 
-    # Navigation buttons
-    pagination_html = '<div class="d-flex justify-content-between mt-4">'
-    if page > 1:
-        pagination_html += f'<a href="?page={page - 1}" class="btn btn-outline-primary btn-rounded px-4">⬅ PREV</a>'
-    else:
-        pagination_html += '<span></span>'
-    pagination_html += '<a href="/home" class="btn btn-outline-success btn-rounded px-4">HOME</a>'
-    if page < total_pages:
-        pagination_html += f'<a href="?page={page + 1}" class="btn btn-outline-primary btn-rounded px-4">NEXT ➡</a>'
-    pagination_html += '</div>'
-
-    # JS toggle
-    js_script = """
     <script>
     function toggleMeaning(id) {
         var el = document.getElementById(id);
@@ -345,23 +539,559 @@ def word_history():
         }
     }
     </script>
-    """
+{% endblock %}
+'''
 
-    content = f"""
-    <h2 class="text-center mb-4" style="font-family:'Poppins',sans-serif; font-weight:600;">Word History</h2>
-    {word_blocks}
-    {pagination_html}
-    {js_script}
+# Bootstrap bright colors
+WORD_COLORS = ["primary", "success", "danger", "warning", "info", "secondary", "dark"]
+
+
+@bp.route('/word_history')
+def word_history():
+    if 'user_id' not in session:
+        return redirect('/')
+
+    before = request.args.get('before', type=int)
+    after = request.args.get('after', type=int)
+    page = request.args.get('page', 1, type=int)
+
+    def build():
+        with get_conn() as conn:
+            words, has_newer, has_older = get_storage().word_page(conn.cursor(), session['user_id'], before=before,
+                                                                  after=after, page=page, per_page=WORDS_PER_PAGE)
+        html = render_template('word_history.html', words=words, has_newer=has_newer, has_older=has_older,
+                               colors=WORD_COLORS)
+        # Meanings still pending (or failed, and retried by someone else's add) change
+        # without a write by this user, so only pages of finished words are kept
+        return html, all(status == 'done' for _, _, _, status in words)
+
+    cache = get_page_cache()
+    if cache is None:
+        return build()[0]
+    return cache.fetch(session['user_id'], ('word_history', before, after, page), build)
+
+
+search_template = '''{% extends "base.html" %}
+{% block title %}Search{% endblock %}
+{% block content %}
+    <h2 class="text-center mb-4" style="font-family:'Poppins',sans-serif; font-weight:600;">Search</h2>
+    <form method="GET" class="d-flex mb-4">
+        <input name="q" value="{{ q }}" list="suggestions" autocomplete="off" class="form-control me-2"
+               placeholder="Search your words and meanings" required>
+        <datalist id="suggestions"></datalist>
+        <button type="submit" class="btn btn-outline-primary btn-rounded">🔍</button>
+    </form>
+    {% if q and not words %}
+    <div class="alert alert-info text-center">No words match "{{ q }}".</div>
+    {% endif %}
+    {% for word_id, w, m, status in words %}
+    {% set idx = (page - 1) * per_page + loop.index %}
+    {% set color_class = colors[loop.index0 % colors|length] %}
+        <div class="mb-3">
+            <button class="btn btn-{{ color_class }} w-100 text-start"
+                    style="border-radius: 25px; font-family: 'Poppins', sans-serif;
+                           font-size: 1.15rem; font-weight: 600; padding: 12px 16px;
+                           text-transform: capitalize;"
+                    onclick="toggleMeaning('meaning_{{ idx }}')">
+                {{ idx }}. {{ w }}
+            </button>
+            <div id="meaning_{{ idx }}"
+                 class="p-3 mt-1 rounded text-white"
+                 style="display:none; background-color: rgba(var(--bs-{{ color_class }}-rgb), 0.85);
+                        font-size: 1rem; font-weight: 500;">
+                {% if status == 'pending' %}
+                ⏳ Meaning is being fetched, check back shortly.
+                {% elif status == 'failed' %}
+                ⚠️ Could not fetch a meaning for this word.
+                {% else %}
+                {% for line in m.split("\\n") %}{{ line }}{% if not loop.last %}<br>{% endif %}{% endfor %}
+                {% endif %}
+            </div>
+        </div>
+    {% endfor %}
+
+    <div class="d-flex justify-content-between mt-4">
+        {% if page > 1 %}
+        <a href="?q={{ q|urlencode }}&page={{ page - 1 }}" class="btn btn-outline-primary btn-rounded px-4">⬅ PREV</a>
+        {% else %}
+        <span></span>
+        {% endif %}
+        <a href="/home" class="btn btn-outline-success btn-rounded px-4">HOME</a>
+        {% if has_more %}
+        <a href="?q={{ q|urlencode }}&page={{ page + 1 }}" class="btn btn-outline-primary btn-rounded px-4">NEXT ➡</a>
+        {% endif %}
+    </div>
+
+    <script>
+    function toggleMeaning(id) {
+        var el = document.getElementById(id);
+        el.style.display = el.style.display === "none" ? "block" : "none";
+    }
+
+    // Autocomplete from /search/suggest as the user types
+    const input = document.querySelector("input[name=q]");
+    const suggestions = document.getElementById("suggestions");
+    let pending = null;
+    input.addEventListener("input", function() {
+        clearTimeout(pending);
+        pending = setTimeout(function() {
+            if (!input.value.trim()) return;
+            fetch("/search/suggest?q=" + encodeURIComponent(input.value))
+                .then(function(res) { return res.json(); })
+                .then(function(data) {
+                    suggestions.innerHTML = "";
+                    data.words.forEach(function(w) {
+                        const option = document.createElement("option");
+                        option.value = w;
+                        suggestions.appendChild(option);
+                    });
+                });
+        }, 150);
+    });
+    </script>
+{% endblock %}
+'''
+
+SUGGEST_LIMIT = 8
+
+
+@bp.route('/search')
+def search():
+    if 'user_id' not in session:
+        return redirect('/')
+
+    q = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    with get_conn() as conn:
+        words, has_more = get_storage().search(conn.cursor(), session['user_id'], q, page=page,
+                                               per_page=WORDS_PER_PAGE)
+
+    return render_template('search.html', q=q, words=words, page=page, per_page=WORDS_PER_PAGE,
+                           has_more=has_more, colors=WORD_COLORS)
+
+
+@bp.route('/search/suggest')
+def search_suggest():
+    """Autocomplete: the user's distinct words starting with every typed term, newest first."""
+    if 'user_id' not in session:
+        return jsonify(error="login required"), 401
+
+    with get_conn() as conn:
+        words, _ = get_storage().search(conn.cursor(), session['user_id'], request.args.get('q', ''),
+                                        prefix=True, per_page=SUGGEST_LIMIT)
+    return jsonify(words=[w for _, w, _, _ in words])
+
+
+review_template = '''{% extends "base.html" %}
+{% block title %}Review{% endblock %}
+{% block content %}
+    <h2 class="text-center mb-4" style="font-family:'Poppins',sans-serif; font-weight:600;">Review</h2>
+    {% if card %}
+    <div class="card p-4 shadow-sm text-center">
+        <h3 class="card-title" style="text-transform: capitalize;">{{ card[1] }}</h3>
+        <button class="btn btn-outline-info btn-rounded my-3 mx-auto"
+                onclick="document.getElementById('answer').style.display='block'; this.style.display='none';">
+            Show Meaning
+        </button>
+        <div id="answer" style="display:none;">
+            <p>{% for line in card[2].split("\\n") %}{{ line }}{% if not loop.last %}<br>{% endif %}{% endfor %}</p>
+            <form method="POST" class="d-flex justify-content-center gap-2 flex-wrap">
+                <input type="hidden" name="word_id" value="{{ card[0] }}">
+                <button name="grade" value="again" class="btn btn-danger btn-rounded">Again</button>
+                <button name="grade" value="hard" class="btn btn-warning btn-rounded">Hard</button>
+                <button name="grade" value="good" class="btn btn-primary btn-rounded">Good</button>
+                <button name="grade" value="easy" class="btn btn-success btn-rounded">Easy</button>
+            </form>
+        </div>
+    </div>
+    {% elif next_due %}
+    <div class="alert alert-success text-center">🎉 All caught up! Next card is due {{ next_due }}.</div>
+    {% else %}
+    <div class="alert alert-info text-center">Add some words to start reviewing.</div>
+    {% endif %}
+    <div class="text-center mt-3">
+        <a href="/home" class="btn btn-outline-success btn-rounded px-4">HOME</a>
+    </div>
+{% endblock %}
+'''
+
+
+@bp.route('/review', methods=['GET', 'POST'])
+def review():
+    if 'user_id' not in session:
+        return redirect('/')
+
+    with get_conn() as conn:
+        cur = conn.cursor()
+        store = get_storage()
+        if request.method == 'POST' and request.form.get('grade') in srs.GRADES:
+            store.grade(cur, session['user_id'], request.form.get('word_id', type=int), request.form['grade'])
+            return redirect('/review')
+
+        card = store.next_due(cur, session['user_id'])
+        next_due = None
+        if not card:
+            due_at = store.next_due_at(cur, session['user_id'])
+            if due_at is not None:
+                next_due = srs.format_wait(due_at - time.time())
+
+    return render_template('review.html', card=card, next_due=next_due)
+
+
+def stats_access_required(view):
+    """Let ``view`` run only with the stats bearer token, or a login when ``STATS_TOKEN`` is unset."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if STATS_TOKEN:
+            if not hmac.compare_digest(request.headers.get('Authorization', '').encode(),
+                                       f"Bearer {STATS_TOKEN}".encode()):
+                return jsonify(error="stats token required"), 401
+        elif 'user_id' not in session:
+            return jsonify(error="login required"), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@bp.route('/pool_stats')
+@stats_access_required
+def pool_stats():
+    return jsonify(get_storage().stats())
+
+
+@bp.route('/cache_stats')
+@stats_access_required
+def cache_stats():
+    stats = get_enrichment_cache().stats()
+    if get_offline_dictionary() is not None:
+        stats['offline_dictionary'] = get_offline_dictionary().stats()
+    if get_page_cache() is not None:
+        stats['page_cache'] = get_page_cache().stats()
+    return jsonify(stats)
+
+
+@bp.route('/upstream_stats')
+@stats_access_required
+def upstream_stats():
+    return jsonify(get_upstream_stats())
+
+
+@bp.route('/metrics')
+@stats_access_required
+def metrics_endpoint():
+    """Request and phase latency histograms of this worker, in the Prometheus text format."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@bp.route('/queue_stats')
+@stats_access_required
+def queue_stats():
+    return jsonify(dict(get_enrichment_queue().stats(), mode=ENRICHMENT_MODE))
+
+
+@bp.cli.command('build-search-index')
+def build_search_index_command():
+    """Build the words search index and backfill it from existing rows."""
+    get_storage().build_search_index()
+    click.echo("✅ Search index built")
+
+
+@bp.cli.command('build-dictionary')
+@click.argument('sources', nargs=-1, type=click.Path(exists=True, dir_okay=False))
+@click.option('--output', default=lambda: OFFLINE_DICTIONARY_PATH or "offline_dictionary.bin",
+              help="File to write (default: OFFLINE_DICTIONARY_PATH).")
+def build_dictionary_command(sources, output):
+    """Compile CSV word lists (default: words.csv) into the offline dictionary file.
+
+    Later files win when a word appears more than once.
     """
+    entries = (entry for source in sources or ("words.csv",) for entry in read_csv(source))
+    count = build_offline_dictionary(entries, output)
+    click.echo(f"✅ Wrote {count} word(s) to {output}")
+
+
+@bp.cli.command('refresh-enrichment')
+@click.argument('words', nargs=-1)
+@click.option('--invalidate-only', is_flag=True, help="Drop cached entries without fetching again.")
+@click.option('--partial', is_flag=True, help="Re-fetch every saved word whose examples are still missing.")
+def refresh_enrichment(words, invalidate_only, partial):
+    """Re-fetch cached translations for WORDS, or drop the whole cache when no words are given."""
+    if partial:
+        with get_conn() as conn:
+            words = [word for _, word in get_storage().pending_words(conn.cursor(), status='partial')]
+        if not words:
+            click.echo("No partial words")
+            return
+    elif not words or invalidate_only:
+        get_enrichment_cache().invalidate(words or None)
+        click.echo(f"Invalidated {len(words) if words else 'all'} cached word(s)")
+        return
+    results = enrich(words, refresh=True)
+    # Words already saved by users show the refreshed meaning too
+    with get_conn() as conn:
+        cur = conn.cursor()
+        entries = get_storage().lexicon_entries(cur, words)
+        rows = {'done': [], 'partial': []}
+        for word, (meaning, status) in zip(words, results):
+            entry = entries.get(normalize_word(word))
+            # A partial result never replaces a complete meaning
+            if meaning is not None and entry and not (status == 'partial' and entry[2] == 'done'):
+                rows[status].append((entry[0], meaning))
+        for status, status_rows in rows.items():
+            if status_rows:
+                get_storage().set_meanings(cur, status_rows, status=status)
+    if any(rows.values()) and get_page_cache() is not None:
+        # Any user's pages may show these words; a per-worker memory cache expires on its own
+        get_page_cache().clear()
+    click.echo(f"Refreshed {sum(1 for meaning, _ in results if meaning is not None)} of {len(words)} word(s)")
+
+
+# --- JSON API ---
+# Read endpoints send a weak ETag built from the user's word-list version stamp
+# and answer If-None-Match with 304, so clients only download a list again after
+# it changed.
+
+def word_json(row):
+    word_id, word, meaning, status = row
+    return {'id': word_id, 'word': word, 'meaning': meaning, 'status': status}
+
+
+def api_login_required():
+    if 'user_id' not in session:
+        return jsonify(error="login required"), 401
+    return None
+
+
+def conditional_json(version, build):
+    """304 if the client holds ``version`` already, else ``build()`` as JSON tagged with it."""
+    etag = "-".join(str(part) for part in version)
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@bp.route('/api/login', methods=['POST'])
+def api_login():
+    data = request.get_json(silent=True) or {}
+    with get_conn() as conn:
+        user_id = get_storage().find_user(conn.cursor(), data.get('username'), data.get('password'))
+    if not user_id:
+        return jsonify(error="invalid credentials"), 401
+    session['user_id'] = user_id
+    return jsonify(user_id=user_id)
+
+
+@bp.route('/api/words', methods=['GET'])
+def api_list_words():
+    denied = api_login_required()
+    if denied:
+        return denied
+
+    user_id = session['user_id']
+    before = request.args.get('before', type=int)
+    after = request.args.get('after', type=int)
+    page = request.args.get('page', 1, type=int)
+    per_page = min(max(request.args.get('per_page', WORDS_PER_PAGE, type=int), 1), API_MAX_PER_PAGE)
+
+    with get_conn() as conn:
+        cur = conn.cursor()
+        store = get_storage()
+
+        def build():
+            rows, has_newer, has_older = store.word_page(cur, user_id, before=before, after=after,
+                                                         page=page, per_page=per_page)
+            return {'words': [word_json(row) for row in rows], 'has_newer': has_newer, 'has_older': has_older}
+
+        return conditional_json(store.word_version(cur, user_id), build)
+
 
-    return render_with_base(content, "Word History")
+@bp.route('/api/words', methods=['POST'])
+def api_add_words():
+    denied = api_login_required()
+    if denied:
+        return denied
 
+    data = request.get_json(silent=True) or {}
+    words = data.get('words')
+    if not isinstance(words, list) or not all(isinstance(w, str) for w in words):
+        return jsonify(error='expected {"words": ["word", ...]}'), 400
+    words = [w.strip() for w in words if w.strip()]
+    if len(words) > API_MAX_ADD:
+        return jsonify(error=f"at most {API_MAX_ADD} words per request"), 400
+
+    rows, missed = save_words(session['user_id'], words)
+    return jsonify(words=[word_json(row) for row in rows], untranslated=missed), 201
+
+
+@bp.route('/api/words/<int:word_id>', methods=['GET'])
+def api_get_word(word_id):
+    denied = api_login_required()
+    if denied:
+        return denied
+
+    user_id = session['user_id']
+    with get_conn() as conn:
+        cur = conn.cursor()
+        store = get_storage()
+        row = store.get_word(cur, user_id, word_id)
+        if row is None:
+            return jsonify(error="not found"), 404
+        # The lexicon entry is shared, so its meaning can change without this user's
+        # doing; the row is read anyway, so the validator is taken from its content
+        return conditional_json((word_id, row[3], zlib.crc32(row[2].encode("utf-8"))), lambda: word_json(row))
+
+
+import_template = '''{% extends "base.html" %}
+{% block title %}Import Words{% endblock %}
+{% block content %}
+    <h2 class="text-center mb-4" style="font-family:'Poppins',sans-serif; font-weight:600;">Import Words</h2>
+    <form id="importForm" class="card p-3 shadow-sm">
+        <p class="mb-2">Upload a CSV (first column is the word) or a text file with one word per line.
+           Words you already have are skipped.</p>
+        <input type="file" name="file" accept=".csv,.txt,text/csv,text/plain" class="form-control mb-3" required>
+        <div class="d-flex justify-content-center gap-3">
+            <button type="submit" class="btn btn-outline-primary btn-rounded px-4">IMPORT</button>
+            <a href="/home" class="btn btn-outline-success btn-rounded px-4">HOME</a>
+        </div>
+    </form>
+    <div id="progress" class="card p-3 shadow-sm mt-3" style="display:none;">
+        <div class="progress mb-2"><div id="bar" class="progress-bar" style="width: 0%"></div></div>
+        <div id="statusText"></div>
+    </div>
+
+    <script>
+    const form = document.getElementById("importForm");
+    form.addEventListener("submit", function(e) {
+        e.preventDefault();
+        document.getElementById("progress").style.display = "block";
+        document.getElementById("statusText").textContent = "Uploading…";
+        fetch("/api/imports", {method: "POST", body: new FormData(form)})
+            .then(function(res) { return res.json(); })
+            .then(function(data) {
+                if (data.error) { document.getElementById("statusText").textContent = data.error; return; }
+                poll(data.status_url);
+            });
+    });
 
-@app.route('/logout')
+    function poll(url) {
+        fetch(url).then(function(res) { return res.json(); }).then(function(job) {
+            document.getElementById("bar").style.width = job.percent + "%";
+            document.getElementById("statusText").textContent =
+                job.status + ": " + job.added + " added, " + job.duplicates + " already known, " +
+                job.untranslated + " without a translation" + (job.error ? " (" + job.error + ")" : "");
+            if (job.status === "queued" || job.status === "running") {
+                setTimeout(function() { poll(url); }, 1000);
+            }
+        });
+    }
+    </script>
+{% endblock %}
+'''
+
+
+@bp.route('/import')
+def import_words():
+    if 'user_id' not in session:
+        return redirect('/')
+    return render_template('import.html')
+
+
+@bp.route('/api/imports', methods=['POST'])
+def api_start_import():
+    """Start an import from a multipart ``file`` field or a raw text/CSV request body."""
+    denied = api_login_required()
+    if denied:
+        return denied
+    if request.content_length is None:
+        return jsonify(error="Content-Length required"), 411
+    if request.content_length > IMPORT_MAX_BYTES:
+        return jsonify(error=f"upload a file of at most {IMPORT_MAX_BYTES // (1024 * 1024)} MB"), 413
+
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('file')
+        if upload is None:
+            return jsonify(error="missing file field"), 400
+        stream = upload.stream
+    else:
+        stream = request.stream
+
+    import_id = get_word_importer().start(session['user_id'], stream)
+    status_url = f"/api/imports/{import_id}"
+    return jsonify(id=import_id, status_url=status_url), 202, {'Location': status_url}
+
+
+@bp.route('/api/imports/<int:import_id>')
+def api_import_status(import_id):
+    denied = api_login_required()
+    if denied:
+        return denied
+
+    with get_conn() as conn:
+        job = get_storage().get_import(conn.cursor(), session['user_id'], import_id)
+    if job is None:
+        return jsonify(error="not found"), 404
+    if job['status'] == 'done':
+        job['percent'] = 100
+    else:
+        job['percent'] = round(100 * job['bytes_read'] / job['total_bytes']) if job['total_bytes'] else 0
+    return jsonify(job)
+
+
+@bp.after_app_request
+def compress_response(response):
+    """Gzip large responses for clients that send ``Accept-Encoding: gzip``."""
+    response.vary.add('Accept-Encoding')
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code >= 300
+            or 'Content-Encoding' in response.headers
+            or not request.accept_encodings['gzip']):
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+    response.set_data(gzip.compress(data, compresslevel=COMPRESS_LEVEL))
+    response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+
+@bp.route('/logout')
 def logout():
     session.clear()
     return redirect('/')
 
 
+TEMPLATES = {
+    'base.html': base_template,
+    'login.html': login_template,
+    'home.html': home_template,
+    'add_word.html': add_word_template,
+    'word_history.html': word_history_template,
+    'review.html': review_template,
+    'search.html': search_template,
+    'import.html': import_template,
+}
+
+
+def create_app(config=None):
+    """Build the Flask app without touching the database or the translator.
+
+    Connections, the translator and the enrichment workers are created on first
+    use in each worker process; the schema is set up by ``flask --app app init-db``.
+    """
+    app = Flask(__name__)
+    app.secret_key = 'mysecret'
+    app.jinja_loader = DictLoader(TEMPLATES)
+    if config:
+        app.config.update(config)
+    app.register_blueprint(bp)
+    metrics.instrument_templates(app)
+    return app
+
+
+app = create_app()
+
 if __name__ == '__main__':
     app.run(debug=False)
@@ -1,20 +1,49 @@
-from flask import Flask, request, redirect, session, render_template_string
-from googletrans import Translator
-import sqlite3
+from flask import Flask, request, redirect, session, render_template, jsonify
+from jinja2 import DictLoader
+import os
+import tempfile
+import time
+
+import srs
+from enrichment import fetch_examples, format_meaning, make_translator, translate_word
+from offline_dictionary import OfflineDictionary
+from page_cache import FilePageCache, MemoryPageCache
+from storage import SQLiteStorage
 
 app = Flask(__name__)
 app.secret_key = 'mysecret'
 
-translator = Translator()
+# Lookups go through the same pooled, timeout-bounded clients and circuit breakers as app.py
+translator = make_translator()
+
+# Words in the offline dictionary (same file and setting as app.py) skip both lookups
+OFFLINE_DICTIONARY_PATH = os.environ.get("OFFLINE_DICTIONARY_PATH")
+offline = OfflineDictionary(OFFLINE_DICTIONARY_PATH) if OFFLINE_DICTIONARY_PATH else None
+
+# One persistent WAL-mode connection per thread instead of a new one per request
+store = SQLiteStorage(os.environ.get("SQLITE_PATH", "vocab.db"))
+
+# Rendered word cards per user, dropped when the user adds or deletes a word (same settings as app.py)
+PAGE_CACHE = os.environ.get("PAGE_CACHE", "off")
+PAGE_CACHE_SIZE = int(os.environ.get("PAGE_CACHE_SIZE", 10000))
+PAGE_CACHE_TTL = int(os.environ.get("PAGE_CACHE_TTL", 300))
+PAGE_CACHE_DIR = os.environ.get("PAGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "vocab-page-cache"))
+if PAGE_CACHE == "file":
+    page_cache = FilePageCache(PAGE_CACHE_DIR, maxsize=PAGE_CACHE_SIZE, ttl=PAGE_CACHE_TTL)
+elif PAGE_CACHE == "memory":
+    page_cache = MemoryPageCache(maxsize=PAGE_CACHE_SIZE, ttl=PAGE_CACHE_TTL)
+else:
+    page_cache = None
 
 # --- Bootstrap Template Base ---
+# Pages are served from a DictLoader, so Jinja compiles each one once and reuses it.
 base_template = '''
 <!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1">  <!-- ✅ This line fixes mobile zoom -->
-    <title>{{ title }}</title>
+    <title>{% block title %}Vocabulary App{% endblock %}</title>
     <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
     <style>
         body {
@@ -45,7 +74,7 @@ base_template = '''
 </head>
 <body class="bg-light">
     <div class="container py-4">
-        {{ content | safe }}
+        {% block content %}{% endblock %}
     </div>
 </body>
 </html>
@@ -55,42 +84,20 @@ base_template = '''
 
 # --- Init DB ---
 def init_db():
-    conn = sqlite3.connect('vocab.db')
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY, username TEXT, password TEXT)''')
-    c.execute('''CREATE TABLE IF NOT EXISTS words (id INTEGER PRIMARY KEY, user_id INTEGER, word TEXT, meaning TEXT)''')
-    c.execute('SELECT * FROM users WHERE username=?', ('admin',))
-    if not c.fetchone():
-        c.execute('INSERT INTO users (username, password) VALUES (?, ?)', ('admin', 'pass123'))
-    conn.commit()
-    conn.close()
+    with store.connection() as conn:
+        c = conn.cursor()
+        store.create_schema(c)
+        store.seed_users(c, [('admin', 'pass123')])
 
 init_db()
 
 # --- Templates ---
-def render_with_base(content, title="Vocabulary App"):
-    return render_template_string(base_template, content=content, title=title)
+def page_template(body, title="Vocabulary App"):
+    return ('{% extends "base.html" %}{% block title %}' + title + '{% endblock %}'
+            '{% block content %}' + body + '{% endblock %}')
 
-@app.route('/', methods=['GET', 'POST'])
-def login():
-    if request.method == 'POST':
-        uname = request.form['username']
-        pwd = request.form['password']
-        conn = sqlite3.connect('vocab.db')
-        c = conn.cursor()
-        c.execute('SELECT id FROM users WHERE username=? AND password=?', (uname, pwd))
-        user = c.fetchone()
-        conn.close()
-        if user:
-            session['user_id'] = user[0]
-            session['word_index'] = 0
-            return redirect('/home')
-        else:
-            error = "Invalid Credentials"
-    else:
-        error = None
 
-    form_template = '''
+login_template = page_template('''
     <h2 class="text-center">Login</h2>
     <form method="POST" class="card p-3 shadow">
       <div class="mb-3">
@@ -106,38 +113,125 @@ def login():
     {% if error %}
     <p class="text-danger mt-2">{{ error }}</p>
     {% endif %}
-    '''
-
-    content = render_template_string(form_template, error=error)
-    return render_template_string(base_template, content=content, title="Login")
-
+    ''', title="Login")
 
-@app.route('/home')
-def home():
-    if 'user_id' not in session:
-        return redirect('/')
-
-    content = '''
+home_template = page_template('''
     <div class="banner text-center">
         <h1>🧠 Grow Your Vocabulary</h1>
         <p>Learn new words daily, test yourself, and become a word wizard!</p>
     </div>
     <div class="row text-center">
-        <div class="col-md-4 mb-3">
+        <div class="col-md-3 mb-3">
             <a href="/add_word" class="btn btn-success btn-lg btn-rounded w-100 shadow">➕ Add New Word</a>
         </div>
-        <div class="col-md-4 mb-3">
+        <div class="col-md-3 mb-3">
             <a href="/word_history" class="btn btn-primary btn-lg btn-rounded w-100 shadow">📖 Word History</a>
         </div>
-        <div class="col-md-4 mb-3">
+        <div class="col-md-3 mb-3">
+            <a href="/review" class="btn btn-warning btn-lg btn-rounded w-100 shadow">🎯 Review</a>
+        </div>
+        <div class="col-md-3 mb-3">
             <a href="/logout" class="btn btn-danger btn-lg btn-rounded w-100 shadow">🚪 Logout</a>
         </div>
     </div>
-    '''
-    return render_with_base(content, title="Home")
+    ''', title="Home")
+
+add_word_template = page_template('''
+    <h2>Add Word</h2>
+    {% if message %}
+        <div class="alert alert-success">{{ message }}</div>
+    {% endif %}
+    <form method="POST" class="card p-3 shadow-sm">
+      <div class="mb-3">
+        <label>English Word:</label>
+        <input name="word" class="form-control" required>
+      </div>
+      <button type="submit" class="btn btn-success">Add Word</button>
+    </form>
+    <a href="/home" class="btn btn-link mt-2">⬅️ Back to Home</a>
+    ''', title="Add Word")
+
+word_history_template = page_template('''
+    {% if word is none %}
+    <p>No words added yet.</p><a href='/home'>⬅️ Back to Home</a>
+    {% else %}
+    <h2>Word History</h2>
+    {% if message %}<div class="alert alert-success">{{ message }}</div>{% endif %}
+    <div class="card p-3 shadow-sm">
+        <p><b>Word:</b> {{ word }}</p>
+        {% if show_meaning %}
+        <p><b>Meaning:</b><br>{% for line in meaning.split("\\n") %}{{ line }}{% if not loop.last %}<br>{% endif %}{% endfor %}</p>
+        {% endif %}
+        <form method="POST" class="d-flex gap-2 flex-wrap">
+            <button name="meaning" type="submit" class="btn btn-info">Get Meaning</button>
+            <button name="next" type="submit" class="btn btn-secondary">Next</button>
+            <button name="delete" value="{{ word_id }}" onclick="return confirm('Are you sure?')" class="btn btn-danger">Delete</button>
+        </form>
+    </div>
+    <a href="/home" class="btn btn-link mt-2">⬅️ Back to Home</a>
+    {% endif %}
+    ''')
+
+review_template = page_template('''
+    <h2>Review</h2>
+    {% if card %}
+    <div class="card p-3 shadow-sm">
+        <p><b>Word:</b> {{ card[1] }}</p>
+        <button class="btn btn-info mb-2" onclick="document.getElementById('answer').style.display='block'; this.style.display='none';">Show Meaning</button>
+        <div id="answer" style="display:none;">
+            <p><b>Meaning:</b><br>{% for line in card[2].split("\\n") %}{{ line }}{% if not loop.last %}<br>{% endif %}{% endfor %}</p>
+            <form method="POST" class="d-flex gap-2 flex-wrap">
+                <input type="hidden" name="word_id" value="{{ card[0] }}">
+                <button name="grade" value="again" class="btn btn-danger">Again</button>
+                <button name="grade" value="hard" class="btn btn-warning">Hard</button>
+                <button name="grade" value="good" class="btn btn-primary">Good</button>
+                <button name="grade" value="easy" class="btn btn-success">Easy</button>
+            </form>
+        </div>
+    </div>
+    {% elif next_due %}
+    <div class="alert alert-success">🎉 All caught up! Next card is due {{ next_due }}.</div>
+    {% else %}
+    <p>No words added yet.</p>
+    {% endif %}
+    <a href="/home" class="btn btn-link mt-2">⬅️ Back to Home</a>
+    ''', title="Review")
 
+app.jinja_loader = DictLoader({
+    'base.html': base_template,
+    'login.html': login_template,
+    'home.html': home_template,
+    'add_word.html': add_word_template,
+    'word_history.html': word_history_template,
+    'review.html': review_template,
+})
+
+@app.route('/', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        uname = request.form['username']
+        pwd = request.form['password']
+        with store.connection() as conn:
+            user_id = store.find_user(conn.cursor(), uname, pwd)
+        if user_id:
+            session['user_id'] = user_id
+            session['word_id'] = 0
+            return redirect('/home')
+        else:
+            error = "Invalid Credentials"
+    else:
+        error = None
+
+    return render_template('login.html', error=error)
+
+
+@app.route('/home')
+def home():
+    if 'user_id' not in session:
+        return redirect('/')
+
+    return render_template('home.html')
 
-import requests
 
 @app.route('/add_word', methods=['GET', 'POST'])
 def add_word():
@@ -149,61 +243,42 @@ def add_word():
     if request.method == 'POST':
         word = request.form['word']
 
-        # Translate word to Hindi
-        hindi_meaning = translator.translate(word, src='en', dest='hi').text
-
-        # Get example sentences using dictionaryapi.dev
-        example_sentences = []
-        try:
-            res = requests.get(f"https://api.dictionaryapi.dev/api/v2/entries/en/{word}")
-            if res.status_code == 200:
-                data = res.json()
-                meanings = data[0].get('meanings', [])
-                for meaning in meanings:
-                    defs = meaning.get('definitions', [])
-                    for d in defs:
-                        if 'example' in d:
-                            example_sentences.append(d['example'])
-                        if len(example_sentences) >= 2:
-                            break
-                    if len(example_sentences) >= 2:
-                        break
-        except:
-            pass
-
-        # Combine Hindi meaning + examples
-        full_meaning = hindi_meaning
-        if example_sentences:
-            full_meaning += "\nExamples:\n" + "\n".join(f"- {e}" for e in example_sentences)
+        entry = offline.get(word) if offline is not None else None
+        status = 'done'
+        if entry is not None:
+            hindi_meaning, example_sentences = entry
+        else:
+            # Translate word to Hindi; an unreachable translator (or an open breaker) saves
+            # the word without a meaning instead of failing the request
+            try:
+                hindi_meaning = translate_word(translator, word)
+            except Exception:
+                hindi_meaning = None
+
+            # Get example sentences using dictionaryapi.dev; on failure the word is saved
+            # without them as 'partial', so refresh-enrichment --partial can fill them in
+            example_sentences = []
+            if hindi_meaning is not None:
+                try:
+                    example_sentences = fetch_examples(word)
+                except Exception:
+                    status = 'partial'
 
         # Save to DB
-        conn = sqlite3.connect('vocab.db')
-        c = conn.cursor()
-        c.execute('INSERT INTO words (user_id, word, meaning) VALUES (?, ?, ?)',
-                  (session['user_id'], word, full_meaning))
-        conn.commit()
-        conn.close()
+        if hindi_meaning is None:
+            full_meaning, status = "", 'failed'
+        else:
+            full_meaning = format_meaning(hindi_meaning, example_sentences)
+        with store.connection() as conn:
+            store.insert_words(conn.cursor(), [(session['user_id'], word, full_meaning, status)])
+        if page_cache is not None:
+            page_cache.invalidate(session['user_id'])
 
         message = f"✅ Word '{word}' added!"
+        if hindi_meaning is None:
+            message += " The translator is unavailable, so it has no meaning yet."
 
-    # Form HTML
-    form_template = '''
-    <h2>Add Word</h2>
-    {% if message %}
-        <div class="alert alert-success">{{ message }}</div>
-    {% endif %}
-    <form method="POST" class="card p-3 shadow-sm">
-      <div class="mb-3">
-        <label>English Word:</label>
-        <input name="word" class="form-control" required>
-      </div>
-      <button type="submit" class="btn btn-success">Add Word</button>
-    </form>
-    <a href="/home" class="btn btn-link mt-2">⬅️ Back to Home</a>
-    '''
-
-    content = render_template_string(form_template, message=message)
-    return render_template_string(base_template, content=content, title="Add Word")
+    return render_template('add_word.html', message=message)
 
 
 @app.route('/word_history', methods=['GET', 'POST'])
@@ -211,58 +286,73 @@ def word_history():
     if 'user_id' not in session:
         return redirect('/')
 
-    conn = sqlite3.connect('vocab.db')
-    c = conn.cursor()
+    user_id = session['user_id']
+    word_id = session.get('word_id', 0)
+    message = None
+    show_meaning = False
 
-    # Handle deletion first
+    # Handle deletion first; the card after the deleted one takes its place
     if request.method == 'POST' and 'delete' in request.form:
-        delete_word = request.form['delete']
-        c.execute('DELETE FROM words WHERE user_id=? AND word=?', (session['user_id'], delete_word))
-        conn.commit()
-        message = f"✅ Word '{delete_word}' deleted!"
-        session['word_index'] = 0  # reset to beginning
+        with store.connection() as conn:
+            deleted = store.delete_word(conn.cursor(), user_id, request.form.get('delete', type=int))
+        if deleted:
+            message = f"✅ Word '{deleted}' deleted!"
+            if page_cache is not None:
+                page_cache.invalidate(user_id)
+    elif request.method == 'POST' and 'next' in request.form:
+        word_id += 1
+    elif request.method == 'POST' and 'meaning' in request.form:
+        show_meaning = True
+
+    def build():
+        # Current card: the first word at or after the saved id, wrapping to the start
+        with store.connection() as conn:
+            c = conn.cursor()
+            card = store.card_at(c, user_id, word_id) or store.card_at(c, user_id, 0)
+        if not card:
+            return [None, render_template('word_history.html', word=None)], True
+        card_id, word, meaning = card
+        html = render_template('word_history.html', word_id=card_id, word=word, meaning=meaning,
+                               show_meaning=show_meaning, message=message)
+        # A word saved without a meaning may get one from another user's add
+        return [card_id, html], bool(meaning)
+
+    if page_cache is None or message:
+        card_id, html = build()[0]
     else:
-        message = None
-
-    # Fetch updated word list
-    c.execute('SELECT word, meaning FROM words WHERE user_id=?', (session['user_id'],))
-    word_list = c.fetchall()
-    conn.close()
+        card_id, html = page_cache.fetch(user_id, ('word_history', word_id, show_meaning), build)
+    if card_id is not None:
+        session['word_id'] = card_id
+    return html
 
-    if not word_list:
-        return render_with_base("<p>No words added yet.</p><a href='/home'>⬅️ Back to Home</a>")
 
-    index = session.get('word_index', 0)
-    if index >= len(word_list):
-        index = 0
-        session['word_index'] = 0
+@app.route('/cache_stats')
+def cache_stats():
+    if 'user_id' not in session:
+        return jsonify(error="login required"), 401
+    return jsonify(page_cache.stats() if page_cache is not None else {})
 
-    show_meaning = False
-    if request.method == 'POST':
-        if 'next' in request.form:
-            index = (index + 1) % len(word_list)
-            session['word_index'] = index
-        elif 'meaning' in request.form:
-            show_meaning = True
 
-    word, meaning = word_list[index]
-    formatted_meaning = meaning.replace("\n", "<br>")  # ✅ SAFE for Python 3.11+
+@app.route('/review', methods=['GET', 'POST'])
+def review():
+    if 'user_id' not in session:
+        return redirect('/')
 
-    content = f'''
-    <h2>Word History</h2>
-    {'<div class="alert alert-success">' + message + '</div>' if message else ''}
-    <div class="card p-3 shadow-sm">
-        <p><b>Word:</b> {word}</p>
-        {"<p><b>Meaning:</b><br>" + formatted_meaning + "</p>" if show_meaning else ""}
-        <form method="POST" class="d-flex gap-2 flex-wrap">
-            <button name="meaning" type="submit" class="btn btn-info">Get Meaning</button>
-            <button name="next" type="submit" class="btn btn-secondary">Next</button>
-            <button name="delete" value="{word}" onclick="return confirm('Are you sure?')" class="btn btn-danger">Delete</button>
-        </form>
-    </div>
-    <a href="/home" class="btn btn-link mt-2">⬅️ Back to Home</a>
-    '''
-    return render_with_base(content)
+    user_id = session['user_id']
+    with store.connection() as conn:
+        c = conn.cursor()
+        if request.method == 'POST' and request.form.get('grade') in srs.GRADES:
+            store.grade(c, user_id, request.form.get('word_id', type=int), request.form['grade'])
+            return redirect('/review')
+
+        card = store.next_due(c, user_id)
+        next_due = None
+        if not card:
+            due_at = store.next_due_at(c, user_id)
+            if due_at is not None:
+                next_due = srs.format_wait(due_at - time.time())
+
+    return render_template('review.html', card=card, next_due=next_due)
 
 
 @app.route('/logout')
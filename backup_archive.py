@@ -0,0 +1,202 @@
+"""Single-file, compressed and checksummed backup archive.
+
+Layout::
+
+    MAGIC | chunk | chunk | ... | index (JSON) | footer
+
+Each chunk is a compressed block of CSV rows (no header) from one table,
+written the way ``COPY ... TO STDOUT WITH (FORMAT csv)`` writes them: NULL is
+an unquoted empty field and the empty string is quoted (``""``), so COPY loads
+each back as what it was. The index lists every table's columns and, per chunk, its offset, length, row count
+and SHA-256 of the compressed bytes. The fixed-size footer at the end of the
+file points at the index, so a reader seeks straight to a table or chunk
+without scanning the rest of the archive.
+"""
+import gzip
+import hashlib
+import io
+import json
+import lzma
+import os
+import struct
+import zlib
+
+MAGIC = b"VLBKUP01"
+FOOTER = struct.Struct(">QII8s")  # index offset, index length, index crc32, magic
+
+COMPRESSORS = {
+    "gzip": (lambda data, level: gzip.compress(data, compresslevel=level), gzip.decompress),
+    "lzma": (lambda data, level: lzma.compress(data, preset=level), lzma.decompress),
+}
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def _field(value, null):
+    if value is None:
+        return null
+    text = str(value)
+    if not text or text == null or any(c in text for c in ',"\r\n'):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+def format_row(row, null=""):
+    """One CSV line in COPY's csv format; unlike ``csv.writer`` it keeps ``None`` and ``''`` apart.
+
+    ``None`` is written as ``null``, COPY's NULL string, and a value equal to it is quoted.
+    """
+    return ",".join(_field(value, null) for value in row) + "\n"
+
+
+def parse_rows(text):
+    """Rows of COPY-style CSV ``text``: unquoted empty fields are None, quoted ones ``''``."""
+    rows, row, i, n = [], [], 0, len(text)
+    while i < n:
+        if text[i] == '"':
+            parts = []
+            while True:
+                end = text.find('"', i + 1)
+                if end < 0:
+                    raise ArchiveError("Unterminated quoted CSV field")
+                parts.append(text[i + 1:end])
+                i = end + 1
+                if not text.startswith('"', i):
+                    break
+                parts.append('"')
+            value = "".join(parts)
+        else:
+            end = i
+            while end < n and text[end] not in ",\n":
+                end += 1
+            value = text[i:end].rstrip("\r") or None
+            i = end
+        row.append(value)
+        if text.startswith("\r", i):
+            i += 1
+        if i >= n or text[i] == "\n":
+            rows.append(row)
+            row = []
+        i += 1
+    return rows
+
+
+class ArchiveWriter:
+    def __init__(self, path, compression="gzip", level=6):
+        if compression not in COMPRESSORS:
+            raise ValueError(f"Unknown compression {compression!r}")
+        self.path = path
+        self.compression = compression
+        self.level = level
+        self.index = {"version": 1, "compression": compression, "tables": {}}
+        self._f = open(path, "wb")
+        self._f.write(MAGIC)
+
+    def write_chunk(self, table, rows):
+        compress, _ = COMPRESSORS[self.compression]
+        data = compress("".join(map(format_row, rows)).encode("utf-8"), self.level)
+        entry = {
+            "offset": self._f.tell(),
+            "length": len(data),
+            "rows": len(rows),
+            "sha256": hashlib.sha256(data).hexdigest(),
+        }
+        self._f.write(data)
+        self.index["tables"][table]["chunks"].append(entry)
+        self.index["tables"][table]["rows"] += len(rows)
+
+    def write_table(self, table, columns, rows, chunk_rows=10000):
+        """Write an iterable of row tuples as chunks of ``chunk_rows`` rows."""
+        self.index["tables"][table] = {"columns": list(columns), "rows": 0, "chunks": []}
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                self.write_chunk(table, chunk)
+                chunk = []
+        if chunk:
+            self.write_chunk(table, chunk)
+        return self.index["tables"][table]["rows"]
+
+    def close(self):
+        if self._f.closed:
+            return
+        index = json.dumps(self.index).encode("utf-8")
+        offset = self._f.tell()
+        self._f.write(index)
+        self._f.write(FOOTER.pack(offset, len(index), zlib.crc32(index), MAGIC))
+        self._f.close()
+
+    def abort(self):
+        """Discard a half-written archive so it cannot be mistaken for a complete one."""
+        self._f.close()
+        os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class ArchiveReader:
+    def __init__(self, path):
+        self.path = path
+        self._f = open(path, "rb")
+        if self._f.read(len(MAGIC)) != MAGIC:
+            raise ArchiveError(f"{path} is not a backup archive")
+        self._f.seek(-FOOTER.size, io.SEEK_END)
+        offset, length, crc, magic = FOOTER.unpack(self._f.read(FOOTER.size))
+        if magic != MAGIC:
+            raise ArchiveError(f"{path} is truncated (footer missing)")
+        self._f.seek(offset)
+        index = self._f.read(length)
+        if len(index) != length or zlib.crc32(index) != crc:
+            raise ArchiveError(f"{path} has a corrupt index")
+        self.index = json.loads(index)
+        _, self._decompress = COMPRESSORS[self.index["compression"]]
+
+    def tables(self):
+        return list(self.index["tables"])
+
+    def columns(self, table):
+        return self.index["tables"][table]["columns"]
+
+    def chunks(self, table):
+        return self.index["tables"][table]["chunks"]
+
+    def read_raw(self, table, chunk_no):
+        entry = self.chunks(table)[chunk_no]
+        self._f.seek(entry["offset"])
+        data = self._f.read(entry["length"])
+        if len(data) != entry["length"] or hashlib.sha256(data).hexdigest() != entry["sha256"]:
+            raise ArchiveError(f"Chunk {chunk_no} of {table} is corrupt")
+        return data
+
+    def read_chunk(self, table, chunk_no):
+        """Return one verified chunk as CSV text (no header row)."""
+        return self._decompress(self.read_raw(table, chunk_no)).decode("utf-8")
+
+    def verify(self, tables=None):
+        """Check every chunk's checksum without decompressing; raises ArchiveError."""
+        for table in tables or self.tables():
+            for chunk_no in range(len(self.chunks(table))):
+                self.read_raw(table, chunk_no)
+
+    def iter_rows(self, table):
+        for chunk_no in range(len(self.chunks(table))):
+            yield from parse_rows(self.read_chunk(table, chunk_no))
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
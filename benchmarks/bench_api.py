@@ -0,0 +1,65 @@
+"""Bytes and server time per /api/words request: full, gzipped, and 304 revalidation.
+
+Runs the app in-process on a throwaway SQLite file (no network, no Postgres),
+seeds the admin user with N words and replays the same list request as a
+mobile client would: a first fetch, then revalidations with If-None-Match.
+
+    python benchmarks/bench_api.py --words 1000 --per-page 100
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MEANING = ("स्क्रॉल करना\nExamples:\n- I ordered a glass of lemonade and a coffee scroll.\n"
+           "- She scrolled down the page.")
+
+
+def measure(client, path, headers, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(path, headers=headers)
+        samples.append((time.perf_counter() - started) * 1000)
+    return response, statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, default=1000)
+    parser.add_argument("--per-page", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    os.environ["STORAGE"] = "sqlite"
+    os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(), "bench_api.db")
+    import app as vocab
+
+    vocab.init_db()
+    store = vocab.get_storage()
+    with store.connection() as conn:
+        store.insert_words(conn.cursor(), [(1, f"word{i}", MEANING, 'done') for i in range(args.words)])
+
+    client = vocab.create_app().test_client()
+    client.post('/api/login', json={'username': 'admin', 'password': 'pass123'})
+    path = f"/api/words?per_page={args.per_page}"
+
+    first, _ = measure(client, path, {}, 1)
+    etag = first.headers['ETag']
+    cases = [
+        ("identity", {}),
+        ("gzip", {'Accept-Encoding': 'gzip'}),
+        ("304", {'Accept-Encoding': 'gzip', 'If-None-Match': etag}),
+    ]
+    print(f"{'request':>10} {'status':>6} {'bytes':>8} {'ms':>8}")
+    for name, headers in cases:
+        response, ms = measure(client, path, headers, args.repeat)
+        print(f"{name:>10} {response.status_code:>6} {len(response.data):>8} {ms:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Write and read speed of the backup archive per compression, with a round-trip check.
+
+Writes a throwaway archive of N synthetic lexicon rows, one in ten of them an
+untranslated word (``meaning = ''``, as every pending or failed word is) and
+every user_words row of user 0 with a NULL ``user_id``, then verifies and reads
+it back. Exits 1 if any row comes back different, in particular if an empty
+string turns into NULL, which COPY would then refuse for ``lexicon.meaning``.
+No network or database needed:
+
+    python benchmarks/bench_archive.py --rows 100000 --compression gzip lzma
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backup_archive import ArchiveReader, ArchiveWriter  # noqa: E402
+
+MEANING = ("स्क्रॉल करना\nExamples:\n- She scrolled down the page, \"slowly\".\n"
+           "- The scroll was sealed.")
+
+
+def make_tables(count):
+    lexicon = [(i, f"word{i}", "" if i % 10 == 0 else MEANING, "failed" if i % 10 == 0 else "done")
+               for i in range(1, count + 1)]
+    user_words = [(i, None if i % 7 == 0 else i % 50 + 1, i, 1700000000 + i, 2.5, 0.0, 0, 0)
+                  for i in range(1, count + 1)]
+    return {"lexicon": (["id", "word", "meaning", "enrichment_status"], lexicon),
+            "user_words": (["id", "user_id", "lexicon_id", "added_at", "ease", "interval_days", "reps", "due_at"],
+                           user_words)}
+
+
+def as_text(row):
+    return [None if value is None else str(value) for value in row]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--compression", nargs="+", default=["gzip", "lzma"])
+    args = parser.parse_args()
+
+    tables = make_tables(args.rows)
+    tmp = tempfile.mkdtemp()
+    failed = False
+    print(f"{'compression':>11} {'MB':>6} {'write s':>8} {'verify s':>9} {'read s':>7} {'round trip':>11}")
+    for compression in args.compression:
+        path = os.path.join(tmp, f"bench.{compression}.vlbk")
+        started = time.perf_counter()
+        with ArchiveWriter(path, compression) as archive:
+            for table, (columns, rows) in tables.items():
+                archive.write_table(table, columns, rows)
+        write_s = time.perf_counter() - started
+
+        with ArchiveReader(path) as archive:
+            started = time.perf_counter()
+            archive.verify()
+            verify_s = time.perf_counter() - started
+            started = time.perf_counter()
+            read = {table: list(archive.iter_rows(table)) for table in tables}
+            read_s = time.perf_counter() - started
+
+        ok = all(read[table] == [as_text(row) for row in rows] for table, (_, rows) in tables.items())
+        failed = failed or not ok
+        print(f"{compression:>11} {os.path.getsize(path) / 1e6:>6.1f} {write_s:>8.2f} {verify_s:>9.2f} "
+              f"{read_s:>7.2f} {'ok' if ok else 'MISMATCH':>11}")
+        os.remove(path)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Lookup latency of the offline dictionary file against its size.
+
+Builds a throwaway dictionary of N synthetic words with ``offline_dictionary.build``,
+then times opening it and looking up words that are present and absent, one
+at a time as ``enrich_words`` would. No network or database needed:
+
+    python benchmarks/bench_dictionary.py --sizes 10000 100000 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from offline_dictionary import OfflineDictionary, build  # noqa: E402
+
+SYLLABLES = ["ka", "ri", "mon", "tel", "sha", "vor", "lin", "dra", "pe", "sto", "gu", "nex"]
+
+
+def make_words(count, rng):
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 6))))
+    return sorted(words)
+
+
+def percentiles_us(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]  # noqa: E731
+    return statistics.median(samples), pick(0.95), pick(0.99)
+
+
+def time_lookups(dictionary, words):
+    samples = []
+    for word in words:
+        started = time.perf_counter()
+        dictionary.get(word)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return percentiles_us(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--lookups", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    tmp = tempfile.mkdtemp()
+    print(f"{'words':>8} {'MB':>6} {'build s':>8} {'open ms':>8} "
+          f"{'hit p50 us':>11} {'hit p99 us':>11} {'miss p50 us':>12} {'miss p99 us':>12}")
+    for size in args.sizes:
+        words = make_words(size, rng)
+        path = os.path.join(tmp, f"dictionary-{size}.bin")
+        started = time.perf_counter()
+        build(((word, f"अर्थ {word}", [f"The {word} was here.", f"They {word} daily."]) for word in words), path)
+        build_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        dictionary = OfflineDictionary(path)
+        dictionary.get(words[0])
+        open_ms = (time.perf_counter() - started) * 1000
+
+        hits = [rng.choice(words) for _ in range(args.lookups)]
+        misses = [word + "zz" for word in hits]
+        hit_p50, _, hit_p99 = time_lookups(dictionary, hits)
+        miss_p50, _, miss_p99 = time_lookups(dictionary, misses)
+        print(f"{size:>8} {os.path.getsize(path) / 1e6:>6.1f} {build_s:>8.2f} {open_ms:>8.3f} "
+              f"{hit_p50:>11.1f} {hit_p99:>11.1f} {miss_p50:>12.1f} {miss_p99:>12.1f}")
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Server time of repeated /word_history reads with the page cache off, in memory and on disk.
+
+Runs the app in-process on a throwaway SQLite file (no network, no Postgres),
+seeds the admin user with N words and reads the same pages over and over, as a
+user paging back and forth would, then adds a word (which invalidates the
+user's pages) and reads again:
+
+    python benchmarks/bench_page_cache.py --words 5000 --pages 1 2 3 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MEANING = ("स्क्रॉल करना\nExamples:\n- I ordered a glass of lemonade and a coffee scroll.\n"
+           "- She scrolled down the page.")
+
+
+def read_ms(client, paths, repeat):
+    samples = []
+    for _ in range(repeat):
+        for path in paths:
+            started = time.perf_counter()
+            client.get(path)
+            samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, default=5000)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 2, 3, 50])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["STORAGE"] = "sqlite"
+    os.environ["SQLITE_PATH"] = os.path.join(tmp, "bench_page_cache.db")
+    import app as vocab
+
+    vocab.init_db()
+    store = vocab.get_storage()
+    with store.connection() as conn:
+        store.insert_words(conn.cursor(), [(1, f"word{i}", MEANING, 'done') for i in range(args.words)])
+
+    client = vocab.create_app().test_client()
+    client.post('/', data={'username': 'admin', 'password': 'pass123'})
+    paths = [f"/word_history?page={page}" for page in args.pages]
+
+    print(f"{args.words} words, pages {' '.join(map(str, args.pages))}")
+    print(f"{'cache':>7} {'read ms':>8} {'speedup':>8} {'after add ms':>13} {'hit ratio':>10}")
+    baseline = None
+    for mode in ("off", "memory", "file"):
+        vocab.PAGE_CACHE = mode
+        vocab.PAGE_CACHE_DIR = os.path.join(tmp, "pages")
+        vocab._services.pop('page_cache', None)
+        read_ms(client, paths, 1)  # warm the cache (and SQLite's page cache)
+        ms = read_ms(client, paths, args.repeat)
+        baseline = baseline or ms
+        # The first read after a write rebuilds the page
+        vocab.invalidate_pages(1)
+        started = time.perf_counter()
+        client.get(paths[0])
+        after_add_ms = (time.perf_counter() - started) * 1000
+        cache = vocab.get_page_cache()
+        ratio = f"{cache.stats()['hit_ratio']:.3f}" if cache is not None else "-"
+        print(f"{mode:>7} {ms:>8.3f} {baseline / ms:>7.1f}x {after_add_ms:>13.3f} {ratio:>10}")
+
+
+if __name__ == "__main__":
+    main()
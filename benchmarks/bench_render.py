@@ -0,0 +1,55 @@
+"""Micro-benchmark of page render time: cached compiled templates vs compiling per call.
+
+"compile" reproduces the old render_template_string behaviour of parsing the
+template source on every request; "cached" is what the routes do now. Runs
+without a database:
+
+    python benchmarks/bench_render.py --iterations 2000
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import render_template  # noqa: E402
+
+import app as vocab  # noqa: E402
+
+SAMPLE_WORDS = [
+    (100 - i, f"word{i}", "स्क्रॉल\nExamples:\n- I ordered a glass of lemonade and a coffee scroll.\n- She scrolled.",
+     'done')
+    for i in range(vocab.WORDS_PER_PAGE)
+]
+
+PAGES = {
+    'login.html': {'error': "Invalid Credentials"},
+    'home.html': {},
+    'add_word.html': {'message': "✅ 3 word(s) added!"},
+    'word_history.html': {'words': SAMPLE_WORDS, 'has_newer': True, 'has_older': True,
+                          'colors': vocab.WORD_COLORS},
+    'review.html': {'card': SAMPLE_WORDS[0][:3], 'next_due': None},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    flask_app = vocab.create_app()
+    env = flask_app.jinja_env
+    print(f"{'page':<20} {'cached us':>10} {'compile us':>11} {'speedup':>8}")
+    with flask_app.test_request_context('/'):
+        for name, context in PAGES.items():
+            source = vocab.TEMPLATES[name]
+            cached = timeit.timeit(lambda: render_template(name, **context), number=args.iterations)
+            compiled = timeit.timeit(lambda: env.from_string(source).render(**context), number=args.iterations)
+            cached_us = cached / args.iterations * 1e6
+            compiled_us = compiled / args.iterations * 1e6
+            print(f"{name:<20} {cached_us:>10.1f} {compiled_us:>11.1f} {compiled_us / cached_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
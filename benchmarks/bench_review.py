@@ -0,0 +1,134 @@
+"""Latency of the review queue: fetching the next due card and grading it.
+
+Seeds one user with N cards spread over past and future due times, then times
+``Storage.next_due`` and ``Storage.grade`` as a reviewer would call them, one card
+after another. Uses a throwaway SQLite file by default; pass a database URL to
+run against Postgres instead (local or staging only, the user is removed
+afterwards):
+
+    python benchmarks/bench_review.py --cards 100000 --reviews 2000
+    python benchmarks/bench_review.py --database-url postgresql://localhost/vocab
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import srs  # noqa: E402
+from storage import SQLiteStorage  # noqa: E402
+
+BENCH_USER = "bench_review"
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]  # noqa: E731
+    return statistics.median(samples), pick(0.95), pick(0.99)
+
+
+def seed_rows(cards, now):
+    """``(word, meaning, due_at)`` per card."""
+    rng = random.Random(42)
+    # Roughly a third of the deck is overdue, the rest is due over the next month
+    return [(f"{BENCH_USER}_{i}", f"अर्थ {i}", now + rng.randint(-10, 20) * srs.DAY_SECONDS)
+            for i in range(cards)]
+
+
+def open_sqlite(cards, now):
+    path = os.path.join(tempfile.mkdtemp(), "bench_review.db")
+    conn = sqlite3.connect(path)
+    cur = conn.cursor()
+    cur.execute("CREATE TABLE lexicon (id INTEGER PRIMARY KEY, word TEXT NOT NULL UNIQUE, meaning TEXT)")
+    cur.execute("CREATE TABLE user_words (id INTEGER PRIMARY KEY, user_id INTEGER, lexicon_id INTEGER)")
+    SQLiteStorage.ensure_review_schema(cur)
+    rows = seed_rows(cards, now)
+    cur.executemany("INSERT INTO lexicon (id, word, meaning) VALUES (?, ?, ?)",
+                    [(i + 1, word, meaning) for i, (word, meaning, _) in enumerate(rows)])
+    cur.executemany("INSERT INTO user_words (user_id, lexicon_id, due_at) VALUES (1, ?, ?)",
+                    [(i + 1, due_at) for i, (_, _, due_at) in enumerate(rows)])
+    cur.execute("ANALYZE")
+    conn.commit()
+    return SQLiteStorage(path), conn, 1, lambda: None
+
+
+def open_postgres(database_url, cards, now):
+    os.environ["DATABASE_INTERNAL_URL"] = database_url
+    os.environ.setdefault("DB_SSLMODE", "prefer")
+    from psycopg2.extras import execute_values
+
+    from app import get_pool, get_storage, init_db
+
+    init_db()
+    conn = get_pool().getconn()
+    cur = conn.cursor()
+    cur.execute("INSERT INTO users (username, password) VALUES (%s, '') RETURNING id", (BENCH_USER,))
+    user_id = cur.fetchone()[0]
+    rows = seed_rows(cards, now)
+    lexicon_ids = execute_values(
+        cur, "INSERT INTO lexicon (word, meaning) VALUES %s "
+        "ON CONFLICT (word) DO UPDATE SET meaning = EXCLUDED.meaning RETURNING id",
+        [(word, meaning) for word, meaning, _ in rows], page_size=10000, fetch=True
+    )
+    execute_values(cur, "INSERT INTO user_words (user_id, lexicon_id, due_at) VALUES %s",
+                   [(user_id, lexicon_id, due_at) for (lexicon_id,), (_, _, due_at) in zip(lexicon_ids, rows)],
+                   page_size=10000)
+    cur.execute("ANALYZE lexicon")
+    cur.execute("ANALYZE user_words")
+    conn.commit()
+
+    def cleanup():
+        cur.execute("DELETE FROM user_words WHERE user_id=%s", (user_id,))
+        cur.execute("DELETE FROM lexicon WHERE id = ANY(%s)", ([lexicon_id for (lexicon_id,) in lexicon_ids],))
+        cur.execute("DELETE FROM users WHERE id=%s", (user_id,))
+        conn.commit()
+        get_pool().putconn(conn)
+
+    return get_storage(), conn, user_id, cleanup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=os.environ.get("BENCH_DATABASE_URL"))
+    parser.add_argument("--cards", type=int, default=100000)
+    parser.add_argument("--reviews", type=int, default=2000)
+    args = parser.parse_args()
+
+    now = int(time.time())
+    if args.database_url:
+        store, conn, user_id, cleanup = open_postgres(args.database_url, args.cards, now)
+    else:
+        store, conn, user_id, cleanup = open_sqlite(args.cards, now)
+
+    rng = random.Random(7)
+    fetch_ms, grade_ms = [], []
+    try:
+        cur = conn.cursor()
+        for _ in range(args.reviews):
+            started = time.perf_counter()
+            card = store.next_due(cur, user_id, now=now)
+            fetch_ms.append((time.perf_counter() - started) * 1000)
+            if card is None:
+                break
+            started = time.perf_counter()
+            store.grade(cur, user_id, card[0], rng.choice(list(srs.GRADES)), now=now)
+            conn.commit()
+            grade_ms.append((time.perf_counter() - started) * 1000)
+    finally:
+        cleanup()
+
+    print(f"{args.cards} cards, {len(grade_ms)} reviews")
+    print(f"{'operation':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, samples in (("next_due", fetch_ms), ("grade", grade_ms)):
+        if samples:
+            p50, p95, p99 = percentiles(samples)
+            print(f"{name:>10} {p50:>8.3f} {p95:>8.3f} {p99:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Latency of /search and /search/suggest queries against a LIKE '%term%' scan.
+
+Seeds one user with N words (plus as many again for a second user) and times
+``Storage.search`` in full-text and prefix mode for a set of terms, next to the
+substring scan it replaces. Uses a throwaway SQLite file by default; pass a
+database URL to run against Postgres instead (local or staging only, the users
+are removed afterwards):
+
+    python benchmarks/bench_search.py --words 50000
+    python benchmarks/bench_search.py --database-url postgresql://localhost/vocab
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import USER_WORD_COLUMNS, USER_WORDS_JOIN, SQLiteStorage  # noqa: E402
+
+BENCH_USERS = ("bench_search", "bench_search_other")
+SYLLABLES = ["ka", "ri", "mon", "tel", "sha", "vor", "lin", "dra", "pe", "sto", "gu", "nex"]
+# Common and rare words, a short prefix, and a term that matches nothing
+TERMS = ["kari", "monsha", "telvorlin", "ka", "zzz"]
+
+
+def make_word(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def seed_rows(user_ids, words):
+    rng = random.Random(42)
+    return [(user_id, word, f"अर्थ {word}\nExamples:\n- The {word} was {make_word(rng)}.", 'done')
+            for user_id in user_ids
+            for word in (make_word(rng) for _ in range(words))]
+
+
+def open_sqlite(words):
+    store = SQLiteStorage(os.path.join(tempfile.mkdtemp(), "bench_search.db"))
+    with store.connection() as conn:
+        cur = conn.cursor()
+        store.create_schema(cur)
+        store.seed_users(cur, [(name, '') for name in BENCH_USERS])
+        store.insert_words(cur, seed_rows([1, 2], words))
+        cur.execute("ANALYZE")
+    return store, 1, lambda: None
+
+
+def open_postgres(database_url, words):
+    os.environ["DATABASE_INTERNAL_URL"] = database_url
+    os.environ.setdefault("DB_SSLMODE", "prefer")
+    from app import get_storage, init_db
+
+    init_db()
+    store = get_storage()
+    with store.connection() as conn:
+        cur = conn.cursor()
+        user_ids = []
+        for name in BENCH_USERS:
+            cur.execute("INSERT INTO users (username, password) VALUES (%s, '') RETURNING id", (name,))
+            user_ids.append(cur.fetchone()[0])
+        rows = seed_rows(user_ids, words)
+        for i in range(0, len(rows), 10000):
+            store.insert_words(cur, rows[i:i + 10000])
+        cur.execute("ANALYZE lexicon")
+        cur.execute("ANALYZE user_words")
+
+    def cleanup():
+        with store.connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT DISTINCT lexicon_id FROM user_words WHERE user_id = ANY(%s)", (user_ids,))
+            lexicon_ids = [lexicon_id for (lexicon_id,) in cur.fetchall()]
+            cur.execute("DELETE FROM user_words WHERE user_id = ANY(%s)", (user_ids,))
+            # Shared entries other users still have are kept
+            cur.execute("DELETE FROM lexicon WHERE id = ANY(%s) "
+                        "AND NOT EXISTS (SELECT 1 FROM user_words WHERE lexicon_id = lexicon.id)", (lexicon_ids,))
+            cur.execute("DELETE FROM users WHERE id = ANY(%s)", (user_ids,))
+
+    return store, user_ids[0], cleanup
+
+
+def time_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=os.environ.get("BENCH_DATABASE_URL"))
+    parser.add_argument("--words", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.database_url:
+        store, user_id, cleanup = open_postgres(args.database_url, args.words)
+    else:
+        store, user_id, cleanup = open_sqlite(args.words)
+
+    p = store.placeholder
+    print(f"{args.words} words for the user, backend {store.backend}")
+    print(f"{'term':>8} {'search ms':>10} {'prefix ms':>10} {'LIKE ms':>10}")
+    try:
+        with store.connection() as conn:
+            cur = conn.cursor()
+
+            def like_scan(term):
+                cur.execute(f"SELECT {USER_WORD_COLUMNS} FROM {USER_WORDS_JOIN} "
+                            f"WHERE user_words.user_id={p} AND (lexicon.word LIKE {p} OR lexicon.meaning LIKE {p}) "
+                            f"ORDER BY user_words.id DESC LIMIT 11", (user_id, f"%{term}%", f"%{term}%"))
+                return cur.fetchall()
+
+            for term in TERMS:
+                search_ms = time_ms(lambda: store.search(cur, user_id, term), args.repeat)
+                prefix_ms = time_ms(lambda: store.search(cur, user_id, term, prefix=True, per_page=8),
+                                    args.repeat)
+                like_ms = time_ms(lambda: like_scan(term), args.repeat)
+                print(f"{term:>8} {search_ms:>10.3f} {prefix_ms:>10.3f} {like_ms:>10.3f}")
+    finally:
+        cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Measure worker cold start: module import, app creation and the first request.
+
+Each sample runs in a fresh interpreter, which is what a gunicorn worker pays on
+boot or after ``max_requests`` recycles it. No database is needed because the
+login page does not touch it:
+
+    python benchmarks/bench_startup.py --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = '''
+import json, time
+started = time.perf_counter()
+import app as module
+imported = time.perf_counter()
+client = module.app.test_client()
+response = client.get("/")
+served = time.perf_counter()
+assert response.status_code == 200, response.status_code
+print(json.dumps({"import_ms": (imported - started) * 1000,
+                  "first_request_ms": (served - imported) * 1000,
+                  "total_ms": (served - started) * 1000}))
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    samples = []
+    for _ in range(args.runs):
+        out = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT,
+                             capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+
+    for key in ("import_ms", "first_request_ms", "total_ms"):
+        values = [s[key] for s in samples]
+        print(f"{key:>17}: median {statistics.median(values):8.1f}  min {min(values):8.1f}  "
+              f"max {max(values):8.1f}")
+
+
+if __name__ == "__main__":
+    main()
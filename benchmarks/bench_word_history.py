@@ -0,0 +1,99 @@
+"""Compare OFFSET and keyset pagination of /word_history as pages get deeper.
+
+Seeds a throwaway user with N words in the target database, times
+``Storage.word_page`` at increasing page depths in both modes, then removes
+the user again. Run against a local or staging database, never production:
+
+    python benchmarks/bench_word_history.py --database-url postgresql://localhost/vocab \
+        --sizes 1000 10000 100000 --pages 1 10 100 1000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BENCH_USER = "bench_word_history"
+
+
+def time_query(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=os.environ.get("BENCH_DATABASE_URL"))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("pass --database-url or set BENCH_DATABASE_URL")
+
+    os.environ["DATABASE_INTERNAL_URL"] = args.database_url
+    os.environ.setdefault("DB_SSLMODE", "prefer")
+    from app import WORDS_PER_PAGE, get_conn, get_storage, init_db
+
+    init_db()
+    store = get_storage()
+
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("INSERT INTO users (username, password) VALUES (%s, '') RETURNING id", (BENCH_USER,))
+        user_id = cur.fetchone()[0]
+        conn.commit()
+
+    print(f"{'words':>8} {'page':>6} {'offset ms':>10} {'keyset ms':>10}")
+    try:
+        seeded = 0
+        for size in sorted(args.sizes):
+            with get_conn() as conn:
+                cur = conn.cursor()
+                cur.execute("""
+                    INSERT INTO lexicon (word, meaning)
+                    SELECT %s || '_' || g, 'अर्थ ' || g FROM generate_series(%s, %s) AS g
+                    ON CONFLICT (word) DO NOTHING
+                """, (BENCH_USER, seeded + 1, size))
+                cur.execute("""
+                    INSERT INTO user_words (user_id, lexicon_id)
+                    SELECT %s, lexicon.id FROM generate_series(%s, %s) AS g
+                    JOIN lexicon ON lexicon.word = %s || '_' || g
+                    ORDER BY g
+                """, (user_id, seeded + 1, size, BENCH_USER))
+                cur.execute("ANALYZE lexicon")
+                cur.execute("ANALYZE user_words")
+                conn.commit()
+            seeded = size
+
+            for page in args.pages:
+                if (page - 1) * WORDS_PER_PAGE >= size:
+                    continue
+                with get_conn() as conn:
+                    cur = conn.cursor()
+                    # The cursor a user would hold after clicking NEXT page - 1 times
+                    cur.execute("SELECT id FROM user_words WHERE user_id=%s ORDER BY id DESC OFFSET %s LIMIT 1",
+                                (user_id, (page - 1) * WORDS_PER_PAGE - 1 if page > 1 else 0))
+                    cursor_id = cur.fetchone()[0] if page > 1 else None
+                    offset_ms = time_query(lambda: store.word_page(cur, user_id, page=page,
+                                                                   per_page=WORDS_PER_PAGE), args.repeat)
+                    keyset_ms = time_query(lambda: store.word_page(cur, user_id, before=cursor_id,
+                                                                   per_page=WORDS_PER_PAGE), args.repeat)
+                print(f"{size:>8} {page:>6} {offset_ms:>10.3f} {keyset_ms:>10.3f}")
+    finally:
+        with get_conn() as conn:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM user_words WHERE user_id=%s", (user_id,))
+            cur.execute("DELETE FROM lexicon WHERE word LIKE %s", (BENCH_USER + "\\_%",))
+            cur.execute("DELETE FROM users WHERE id=%s", (user_id,))
+            conn.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Local stand-ins for the translation and dictionary APIs, with injected latency and errors.
+
+The translate server speaks the LibreTranslate ``POST /translate`` protocol the
+app uses when ``TRANSLATE_API_URL`` is set; the dictionary server mimics
+``GET /api/v2/entries/en/<word>`` of dictionaryapi.dev. Each request sleeps for
+a latency drawn uniformly around ``latency_ms`` and fails with HTTP 500 at
+``error_rate``; both draws come from a seeded RNG so runs are repeatable.
+Run standalone to point a dev server at them:
+
+    python benchmarks/fake_upstreams.py --translate-port 5101 --dictionary-port 5102
+    TRANSLATE_API_URL=http://127.0.0.1:5101/translate \\
+    DICTIONARY_URL='http://127.0.0.1:5102/api/v2/entries/en/{word}' flask --app app run
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+
+class Behaviour:
+    """Thread-safe seeded latency/error draws plus request counters."""
+
+    def __init__(self, latency_ms=50, jitter=0.2, error_rate=0.0, seed=0):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def draw(self):
+        """Return ``(delay_seconds, fail)`` for the next request."""
+        with self._lock:
+            self.requests += 1
+            delay = self.latency_ms * self._rng.uniform(1 - self.jitter, 1 + self.jitter) / 1000
+            fail = self._rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        return delay, fail
+
+
+class _Handler(BaseHTTPRequestHandler):
+    behaviour = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _delay_or_fail(self):
+        delay, fail = self.behaviour.draw()
+        time.sleep(delay)
+        if fail:
+            self._send_json(500, {"error": "injected failure"})
+        return fail
+
+
+class TranslateHandler(_Handler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self._delay_or_fail():
+            return
+        # Line-preserving fake translation, so batched requests split back cleanly
+        lines = body.get("q", "").split("\n")
+        self._send_json(200, {"translatedText": "\n".join(f"हिंदी {line}" for line in lines)})
+
+
+class DictionaryHandler(_Handler):
+    def do_GET(self):
+        if self._delay_or_fail():
+            return
+        word = unquote(self.path.rstrip("/").rsplit("/", 1)[-1])
+        self._send_json(200, [{
+            "word": word,
+            "meanings": [{"definitions": [
+                {"definition": f"A {word}.", "example": f"She used the {word} every day."},
+                {"definition": f"To {word}.", "example": f"They {word} before breakfast."},
+            ]}],
+        }])
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # The app gave up waiting (its own timeout): not worth a traceback
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def start_server(handler, behaviour, port=0):
+    """Serve ``handler`` on 127.0.0.1 in a daemon thread; returns the server (``.server_port``)."""
+    handler_class = type(handler.__name__, (handler,), {"behaviour": behaviour})
+    server = _Server(("127.0.0.1", port), handler_class)
+    threading.Thread(target=server.serve_forever, name=handler.__name__, daemon=True).start()
+    return server
+
+
+def start_upstreams(translate=None, dictionary=None, translate_port=0, dictionary_port=0):
+    """Start both fakes; returns ``(env, servers)`` where env points the app at them."""
+    translate_server = start_server(TranslateHandler, translate or Behaviour(), translate_port)
+    dictionary_server = start_server(DictionaryHandler, dictionary or Behaviour(seed=1), dictionary_port)
+    env = {
+        "TRANSLATE_API_URL": f"http://127.0.0.1:{translate_server.server_port}/translate",
+        "DICTIONARY_URL": f"http://127.0.0.1:{dictionary_server.server_port}/api/v2/entries/en/{{word}}",
+    }
+    return env, (translate_server, dictionary_server)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--translate-port", type=int, default=5101)
+    parser.add_argument("--dictionary-port", type=int, default=5102)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    env, _ = start_upstreams(Behaviour(args.latency_ms, error_rate=args.error_rate),
+                             Behaviour(args.latency_ms, error_rate=args.error_rate, seed=1),
+                             args.translate_port, args.dictionary_port)
+    for name, value in env.items():
+        print(f"{name}={value}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""Load-test /, /add_word and /word_history offline and report latency per route.
+
+Starts the fake translate and dictionary servers from ``fake_upstreams.py``, a
+throwaway SQLite database (or ``--database-url`` for a local Postgres) and the
+app in a subprocess: gunicorn when it is installed, Flask's threaded server
+otherwise. ``--clients`` virtual users then log in and replay a seeded mix of
+requests, so two runs with the same options send the same traffic. Prints
+throughput and p50/p95/p99 latency per route; ``--save`` writes the results as
+JSON and ``--baseline`` compares p95 against an earlier file, exiting 1 when a
+route got slower than ``--max-regression`` percent:
+
+    python benchmarks/loadtest.py --clients 16 --requests 200 --save baseline.json
+    python benchmarks/loadtest.py --clients 16 --requests 200 --baseline baseline.json
+"""
+import argparse
+import importlib.util
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_upstreams import Behaviour, start_upstreams  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USERS = ['admin', 'vinod', 'pramod', 'manoj', 'hemlata', 'sangita', 'devraj', 'kunal', 'sonakshi', 'samar',
+         'arya', 'janvi', 'neel', 'user']
+VOCABULARY = [f"{a}{b}" for a in ("quick", "calm", "bright", "bold", "keen", "wise", "brave", "fair")
+              for b in ("ly", "ness", "er", "est", "ful", "less", "ish", "ed")]
+
+# (route label, weight) of the per-iteration request mix
+MIX = [("GET /word_history", 6), ("POST /add_word", 2), ("GET /word_history?page=2", 1), ("GET /", 1)]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def server_command(port, workers, threads):
+    if importlib.util.find_spec("gunicorn"):
+        return [sys.executable, "-m", "gunicorn", "--workers", str(workers), "--threads", str(threads),
+                "--bind", f"127.0.0.1:{port}", "--log-level", "warning", "app:app"], "gunicorn"
+    return [sys.executable, "-c",
+            f"import app; app.app.run(host='127.0.0.1', port={port}, threaded=True)"], "werkzeug"
+
+
+def wait_until_up(base_url, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"App exited with status {process.returncode}")
+        try:
+            if requests.get(base_url + "/", timeout=5).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("App did not start in time")
+
+
+def percentile(samples, q):
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+def run_client(base_url, client_no, args, results):
+    rng = random.Random(args.seed * 1000 + client_no)
+    session = requests.Session()
+    labels, weights = zip(*MIX)
+    timings = []
+
+    def timed(label, method, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = session.request(method, base_url + path, timeout=60, **kwargs)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            ok = False
+        timings.append((label, (time.perf_counter() - started) * 1000, ok))
+
+    timed("POST /", "POST", "/", data={'username': USERS[client_no % len(USERS)], 'password': 'pass123'})
+    for _ in range(args.warmup + args.requests):
+        label = rng.choices(labels, weights)[0]
+        if label == "POST /add_word":
+            words = rng.sample(VOCABULARY, rng.randint(1, args.words_per_add))
+            timed(label, "POST", "/add_word", data={'word[]': words})
+        else:
+            method, path = label.split(" ", 1)
+            timed(label, method, path)
+    # The login and the warm-up requests are not measured
+    results[client_no] = timings[1 + args.warmup:]
+
+
+def summarize(timings, elapsed):
+    routes = {}
+    for label in sorted({label for label, _, _ in timings}):
+        samples = sorted(ms for l, ms, _ in timings if l == label)
+        errors = sum(1 for l, _, ok in timings if l == label and not ok)
+        routes[label] = {
+            'count': len(samples),
+            'errors': errors,
+            'rps': round(len(samples) / elapsed, 2),
+            'p50_ms': round(statistics.median(samples), 2),
+            'p95_ms': round(percentile(samples, 0.95), 2),
+            'p99_ms': round(percentile(samples, 0.99), 2),
+        }
+    return routes
+
+
+def compare(routes, baseline_path, max_regression):
+    with open(baseline_path) as f:
+        baseline = json.load(f)['routes']
+    regressed = False
+    print(f"\n{'route':<28} {'base p95':>9} {'p95':>9} {'change':>8}")
+    for label, stats in routes.items():
+        if label not in baseline:
+            continue
+        before = baseline[label]['p95_ms']
+        change = (stats['p95_ms'] - before) / before * 100 if before else 0.0
+        flag = ""
+        if change > max_regression:
+            regressed = True
+            flag = "  REGRESSED"
+        print(f"{label:<28} {before:>9.2f} {stats['p95_ms']:>9.2f} {change:>+7.1f}%{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=os.environ.get("BENCH_DATABASE_URL"),
+                        help="local Postgres to use instead of a throwaway SQLite file")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100, help="measured requests per client")
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured requests per client")
+    parser.add_argument("--words-per-add", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    parser.add_argument("--threads", type=int, default=8, help="gunicorn threads per worker")
+    parser.add_argument("--upstream-latency-ms", type=float, default=50)
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+    parser.add_argument("--enrichment-mode", choices=["sync", "background"], default="sync")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON from an earlier --save run to compare against")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="allowed p95 increase, percent")
+    args = parser.parse_args()
+
+    upstream_env, servers = start_upstreams(
+        Behaviour(args.upstream_latency_ms, error_rate=args.upstream_error_rate, seed=args.seed),
+        Behaviour(args.upstream_latency_ms, error_rate=args.upstream_error_rate, seed=args.seed + 1),
+    )
+    env = dict(os.environ, **upstream_env, ENRICHMENT_MODE=args.enrichment_mode, ENRICHMENT_QUEUE="memory")
+    if args.database_url:
+        env.update(STORAGE="postgres", DATABASE_INTERNAL_URL=args.database_url)
+        env.setdefault("DB_SSLMODE", "prefer")
+    else:
+        env.update(STORAGE="sqlite", SQLITE_PATH=os.path.join(tempfile.mkdtemp(), "loadtest.db"))
+    subprocess.run([sys.executable, "-m", "flask", "--app", "app", "init-db"], cwd=ROOT, env=env, check=True,
+                   capture_output=True)
+
+    port = free_port()
+    command, server = server_command(port, args.workers, args.threads)
+    # The server log goes to a file: a pipe nobody reads would fill up and stall it
+    server_log = tempfile.NamedTemporaryFile(prefix="loadtest-server-", suffix=".log", delete=False)
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=server_log, stderr=subprocess.STDOUT)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        try:
+            wait_until_up(base_url, process)
+        except RuntimeError:
+            sys.stderr.write(open(server_log.name, errors="replace").read()[-4000:])
+            raise
+        results = {}
+        threads = [threading.Thread(target=run_client, args=(base_url, n, args, results))
+                   for n in range(args.clients)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        process.terminate()
+        process.wait()
+        for upstream in servers:
+            upstream.shutdown()
+        server_log.close()
+        os.remove(server_log.name)
+
+    timings = [timing for n in sorted(results) for timing in results[n]]
+    routes = summarize(timings, elapsed)
+    print(f"{server}, {args.clients} clients x {args.requests} requests, "
+          f"{'postgres' if args.database_url else 'sqlite'}, upstream {args.upstream_latency_ms:g} ms "
+          f"/ {args.upstream_error_rate:.0%} errors, {elapsed:.1f}s")
+    print(f"{'route':<28} {'count':>6} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for label, stats in routes.items():
+        print(f"{label:<28} {stats['count']:>6} {stats['errors']:>6} {stats['rps']:>8.1f} "
+              f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}")
+    print(f"{'total':<28} {len(timings):>6} {'':>6} {len(timings) / elapsed:>8.1f}")
+
+    if args.save:
+        config = {key: value for key, value in vars(args).items()
+                  if key not in ("save", "baseline", "database_url")}
+        with open(args.save, "w") as f:
+            json.dump({'config': dict(config, server=server, storage=env['STORAGE']), 'routes': routes}, f,
+                      indent=2)
+    if args.baseline and compare(routes, args.baseline, args.max_regression):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,93 +1,494 @@
 import psycopg2
+from psycopg2.extras import execute_values
+from backup_archive import ArchiveReader, ArchiveWriter, format_row
+from storage import MIGRATE_LEXICON_SQL, MIGRATE_USER_WORDS_SQL, PG_LEGACY_WORD_KEY, PostgresStorage
 import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime, timezone
 
 # ==== CONFIGURATION ====
 OLD_DB_URL = ""  # Old DB
 NEW_DB_URL = ""  # New DB
 
 USERS_CSV = "users.csv"
+LEXICON_CSV = "lexicon.csv"
+USER_WORDS_CSV = "user_words.csv"
+# Backups taken before the lexicon split; load them with import_legacy_words()
 WORDS_CSV = "words.csv"
 
+# In load order: user_words points at users and lexicon
+TABLE_COLUMNS = {
+    "users": ["id", "username", "password"],
+    "lexicon": ["id", "word", "meaning", "enrichment_status"],
+    "user_words": ["id", "user_id", "lexicon_id", "added_at", "ease", "interval_days", "reps", "due_at"],
+}
+TABLE_FILES = {"users": USERS_CSV, "lexicon": LEXICON_CSV, "user_words": USER_WORDS_CSV}
+
+# Incremental backups: base snapshot + numbered deltas, tracked by id watermarks
+MANIFEST_PATH = "backup_manifest.json"
+
+# "copy" streams COPY ... TO STDOUT straight into the file; "cursor" uses a named
+# (server-side) cursor fetching EXPORT_ITERSIZE rows at a time. Both keep client
+# memory flat however large the tables are, and write byte-identical files.
+EXPORT_MODE = "copy"
+EXPORT_ITERSIZE = 5000
+
+# "copy" loads each CSV with COPY ... FROM STDIN, reading COPY_BUFFER_SIZE bytes
+# at a time; "values" falls back to multi-row INSERTs of IMPORT_BATCH_SIZE rows.
+IMPORT_MODE = "copy"
+IMPORT_BATCH_SIZE = 1000
+COPY_BUFFER_SIZE = 1 << 20
+
+# CSV backups write NULL as \N, so the "values" import (csv.reader, which cannot
+# tell "" from an empty field) still loads NULLs as None. A text value of exactly
+# \N is written quoted, which only the COPY import tells apart. Files written
+# before the marker use COPY's default, an unquoted empty field: import them with null="".
+NULL_MARKER = r"\N"
+
+# Single-file archive: compressed ("gzip" or "lzma"), checksummed chunks of rows
+ARCHIVE_PATH = "vocab_backup.vlbk"
+ARCHIVE_COMPRESSION = "gzip"
+ARCHIVE_CHUNK_ROWS = 10000
+
+# Parallel mode: user_words is split into id ranges, each exported/imported on its own connection
+PARALLEL_WORKERS = os.cpu_count() or 4
+PARALLEL_CHUNK_ROWS = 50000
+
 # ==== DB CONNECTION FUNCTION ====
 def get_conn(db_url):
     return psycopg2.connect(db_url, sslmode='require')
 
 # ==== STEP 1: EXPORT OLD DB TO CSV ====
-def export_to_csv():
+def report(label, rows, path, started):
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    size_mb = os.path.getsize(path) / 1e6
+    if rows is None or rows < 0:
+        print(f"✅ {label}: {size_mb:.1f} MB -> {path} in {elapsed:.2f}s ({size_mb / elapsed:.1f} MB/s)")
+    else:
+        print(f"✅ {label}: {rows} rows -> {path} in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)")
+
+
+def export_table(conn, table, columns, path, mode=EXPORT_MODE, after=None, upto=None):
+    """Stream ``table`` into a CSV file with a header row, ordered by id.
+
+    ``after``/``upto`` restrict the export to ``after < id <= upto``.
+    """
+    conditions = []
+    if after is not None:
+        conditions.append(f"id > {int(after)}")
+    if upto is not None:
+        conditions.append(f"id <= {int(upto)}")
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f"SELECT {', '.join(columns)} FROM {table}{where} ORDER BY id"
+    started = time.perf_counter()
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        if mode == "copy":
+            cur = conn.cursor()
+            cur.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER, NULL '{NULL_MARKER}')", f)
+            rows = cur.rowcount
+        else:
+            # Same bytes as COPY: NULL is written as NULL_MARKER, and '' as ""
+            f.write(",".join(columns) + "\n")  # header
+            rows = 0
+            with conn.cursor(name=f"export_{table}") as cur:
+                cur.itersize = EXPORT_ITERSIZE
+                cur.execute(query)
+                for row in cur:
+                    f.write(format_row(row, null=NULL_MARKER))
+                    rows += 1
+    report(table, rows, path, started)
+    return rows
+
+
+def export_to_csv(mode=EXPORT_MODE):
+    with get_conn(OLD_DB_URL) as conn:
+        conn.set_client_encoding("UTF8")
+        for table, columns in TABLE_COLUMNS.items():
+            export_table(conn, table, columns, TABLE_FILES[table], mode)
+
+        print(f"✅ Data exported to {', '.join(TABLE_FILES.values())}")
+
+
+# ==== STEP 1 (NIGHTLY): INCREMENTAL EXPORT ====
+def load_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return None
+    with open(MANIFEST_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest):
+    tmp_path = MANIFEST_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+def export_incremental(mode=EXPORT_MODE):
+    """Write a base snapshot on the first run, then only rows added since the last run.
+
+    Each run records the highest exported id per table (its watermark) in
+    MANIFEST_PATH and writes new rows to numbered delta files. Watermarks only see
+    inserts: rows updated or deleted after they were exported (such as a lexicon
+    meaning filled in later by background enrichment) need a fresh base (delete
+    the manifest to start one).
+    """
+    manifest = load_manifest()
     with get_conn(OLD_DB_URL) as conn:
+        conn.set_client_encoding("UTF8")
+        # One snapshot for the watermarks and every table export
+        conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
         cur = conn.cursor()
+        watermarks = {}
+        for table in TABLE_COLUMNS:
+            cur.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+            watermarks[table] = cur.fetchone()[0]
+
+        if manifest is None:
+            files = dict(TABLE_FILES)
+            previous = {table: None for table in TABLE_COLUMNS}
+        else:
+            previous = (manifest["deltas"][-1] if manifest["deltas"] else manifest["base"])["watermarks"]
+            if all(watermarks[table] <= previous[table] for table in TABLE_COLUMNS):
+                print("✅ Nothing new since the last backup")
+                return
+            seq = len(manifest["deltas"]) + 1
+            files = {table: f"{table}.delta.{seq:04d}.csv" for table in TABLE_COLUMNS}
+
+        rows = {}
+        for table, columns in TABLE_COLUMNS.items():
+            rows[table] = export_table(conn, table, columns, files[table], mode,
+                                       after=previous[table], upto=watermarks[table])
+
+    snapshot = {
+        "files": files,
+        "watermarks": watermarks,
+        "rows": rows,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    if manifest is None:
+        manifest = {"base": snapshot, "deltas": []}
+        print(f"✅ Base backup written, manifest at {MANIFEST_PATH}")
+    else:
+        manifest["deltas"].append(dict(snapshot, seq=seq))
+        print(f"✅ Delta {seq:04d} written")
+    save_manifest(manifest)
+
+# ==== STEP 1 (LARGE DBS): PARALLEL EXPORT ====
+def id_ranges(lo, hi, parts):
+    step = -(-(hi - lo + 1) // parts)
+    return [(start, min(start + step - 1, hi)) for start in range(lo, hi + 1, step)]
+
 
-        # Export users table
-        cur.execute("SELECT id,username, password FROM users;")
-        rows = cur.fetchall()
-        with open(USERS_CSV, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow([desc[0] for desc in cur.description])  # header
-            writer.writerows(rows)
+def merge_csv(parts, path, columns):
+    """Concatenate CSV parts (each with its own header) into one file, in order."""
+    with open(path, "w", newline="", encoding="utf-8") as out:
+        out.write(",".join(columns) + "\n")
+        for part in parts:
+            with open(part, newline="", encoding="utf-8") as f:
+                f.readline()  # header
+                shutil.copyfileobj(f, out)
 
-        # Export words table
-        cur.execute("SELECT user_id,word,meaning FROM words;")
-        rows = cur.fetchall()
-        with open(WORDS_CSV, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow([desc[0] for desc in cur.description])  # header
-            writer.writerows(rows)
 
-        print(f"✅ Data exported to {USERS_CSV} and {WORDS_CSV}")
+def export_parallel(workers=PARALLEL_WORKERS, mode=EXPORT_MODE):
+    """Export users, the lexicon and id ranges of user_words concurrently, then merge user_words in id order.
+
+    Every worker attaches to the coordinator's exported snapshot, so the parts are
+    as consistent as a single-connection export.
+    """
+    started = time.perf_counter()
+    with closing(get_conn(OLD_DB_URL)) as coordinator:
+        coordinator.set_session(isolation_level="REPEATABLE READ", readonly=True)
+        cur = coordinator.cursor()
+        cur.execute("SELECT pg_export_snapshot()")
+        snapshot_id = cur.fetchone()[0]
+        cur.execute("SELECT MIN(id), MAX(id) FROM user_words")
+        lo, hi = cur.fetchone()
+        ranges = id_ranges(lo, hi, workers) if lo is not None else []
+
+        def export_range(task):
+            table, path, after, upto = task
+            with closing(get_conn(OLD_DB_URL)) as conn:
+                conn.set_client_encoding("UTF8")
+                conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
+                conn.cursor().execute("SET TRANSACTION SNAPSHOT %s", (snapshot_id,))
+                rows = export_table(conn, table, TABLE_COLUMNS[table], path, mode, after=after, upto=upto)
+                conn.rollback()
+                return rows
+
+        out_dir = os.path.dirname(os.path.abspath(USER_WORDS_CSV))
+        with tempfile.TemporaryDirectory(dir=out_dir) as tmp:
+            tasks = [("users", USERS_CSV, None, None), ("lexicon", LEXICON_CSV, None, None)]
+            tasks += [("user_words", os.path.join(tmp, f"user_words.part.{i:04d}.csv"), start - 1, end)
+                      for i, (start, end) in enumerate(ranges)]
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                rows = list(pool.map(export_range, tasks))
+            merge_csv([task[1] for task in tasks[2:]], USER_WORDS_CSV, TABLE_COLUMNS["user_words"])
+
+    word_rows = sum(r for r in rows[2:] if r and r > 0)
+    elapsed = time.perf_counter() - started
+    print(f"✅ Parallel export of {word_rows} words over {len(ranges)} range(s) with {workers} worker(s) "
+          f"in {elapsed:.2f}s ({word_rows / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+# ==== STEP 1 (ARCHIVE): EXPORT TO ONE COMPRESSED FILE ====
+def export_to_archive(path=ARCHIVE_PATH, compression=ARCHIVE_COMPRESSION, chunk_rows=ARCHIVE_CHUNK_ROWS):
+    with closing(get_conn(OLD_DB_URL)) as conn, conn, ArchiveWriter(path, compression) as archive:
+        conn.set_client_encoding("UTF8")
+        for table, columns in TABLE_COLUMNS.items():
+            started = time.perf_counter()
+            with conn.cursor(name=f"archive_{table}") as cur:
+                cur.itersize = EXPORT_ITERSIZE
+                cur.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id")
+                rows = archive.write_table(table, columns, cur, chunk_rows)
+            report(table, rows, path, started)
+    print(f"✅ Data archived to {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
 
 # ==== STEP 2: CREATE TABLES IN NEW DB ====
 def create_tables():
     with get_conn(NEW_DB_URL) as conn:
         cur = conn.cursor()
-        cur.execute(''' DROP TABLE IF EXISTS words; ''')
-        cur.execute(''' DROP TABLE IF EXISTS users; ''')
+        cur.execute(''' DROP TABLE IF EXISTS user_words CASCADE; ''')
+        cur.execute(''' DROP TABLE IF EXISTS lexicon CASCADE; ''')
+        cur.execute(''' DROP TABLE IF EXISTS words CASCADE; ''')
+        cur.execute(''' DROP TABLE IF EXISTS users CASCADE; ''')
         cur.execute('''
             CREATE TABLE IF NOT EXISTS users (
                 id SERIAL PRIMARY KEY,
                 username TEXT NOT NULL,
-                password TEXT NOT NULL
+                password TEXT NOT NULL,
+                words_version BIGINT NOT NULL DEFAULT 0
             );
         ''')
         cur.execute('''
-            CREATE TABLE IF NOT EXISTS words (
+            CREATE TABLE IF NOT EXISTS lexicon (
                 id SERIAL PRIMARY KEY,
-                user_id INTEGER REFERENCES users(id),
-                word TEXT,
-                meaning TEXT
+                word TEXT NOT NULL,
+                meaning TEXT NOT NULL DEFAULT '',
+                enrichment_status TEXT NOT NULL DEFAULT 'done'
             );
         ''')
+        cur.execute('''
+            CREATE TABLE IF NOT EXISTS user_words (
+                id SERIAL PRIMARY KEY,
+                user_id INTEGER,
+                lexicon_id INTEGER NOT NULL,
+                added_at BIGINT NOT NULL DEFAULT 0,
+                ease REAL NOT NULL DEFAULT 2.5,
+                interval_days REAL NOT NULL DEFAULT 0,
+                reps INTEGER NOT NULL DEFAULT 0,
+                due_at BIGINT NOT NULL DEFAULT 0
+            );
+        ''')
+        # The unique word key, foreign keys and indexes are added by finalize_tables() after the load
         conn.commit()
         print("✅ Tables created in new DB")
 
 # ==== STEP 3: IMPORT FROM CSV TO NEW DB ====
-def import_from_csv():
+def import_table(conn, table, path, mode=IMPORT_MODE, batch_size=IMPORT_BATCH_SIZE, null=NULL_MARKER):
+    """Bulk-load a CSV written by export_table(); its header names the columns and ``null`` marks NULLs."""
+    started = time.perf_counter()
+    cur = conn.cursor()
+    with open(path, newline="", encoding="utf-8") as f:
+        columns = next(csv.reader(f))
+        if mode == "copy":
+            cur.copy_expert(
+                f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '{null}')",
+                f, size=COPY_BUFFER_SIZE
+            )
+            rows = cur.rowcount
+        else:
+            insert = f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s"
+            rows = 0
+            batch = []
+            for row in csv.reader(f):
+                batch.append([None if value == null else value for value in row])
+                if len(batch) >= batch_size:
+                    execute_values(cur, insert, batch, page_size=batch_size)
+                    rows += len(batch)
+                    batch = []
+            if batch:
+                execute_values(cur, insert, batch, page_size=batch_size)
+                rows += len(batch)
+    report(table, rows, path, started)
+    return rows
+
+
+def finalize_tables(conn):
+    """Add what create_tables() deferred and move SERIAL sequences past the loaded ids."""
+    cur = conn.cursor()
+    cur.execute(''' ALTER TABLE lexicon ADD CONSTRAINT lexicon_word_key UNIQUE (word); ''')
+    cur.execute('''
+        ALTER TABLE user_words ADD CONSTRAINT user_words_user_id_fkey FOREIGN KEY (user_id) REFERENCES users(id);
+    ''')
+    cur.execute('''
+        ALTER TABLE user_words ADD CONSTRAINT user_words_lexicon_id_fkey
+        FOREIGN KEY (lexicon_id) REFERENCES lexicon(id);
+    ''')
+    cur.execute(''' CREATE INDEX IF NOT EXISTS user_words_user_id_id_idx ON user_words (user_id, id); ''')
+    cur.execute('''
+        CREATE INDEX IF NOT EXISTS user_words_lexicon_id_user_id_idx ON user_words (lexicon_id, user_id);
+    ''')
+    # The due-queue index, so the restored database needs no init-db before /review is fast
+    PostgresStorage.ensure_review_schema(cur)
+    # Word-list stamps are not backed up; start them past any ETag a client kept from before the restore
+    cur.execute("UPDATE users SET words_version = %s", (int(time.time()),))
+    for table in TABLE_COLUMNS:
+        cur.execute(f"""
+            SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 0) + 1, false)
+            FROM {table}
+        """)
+        cur.execute(f"ANALYZE {table}")
+
+
+def import_from_csv(mode=IMPORT_MODE, batch_size=IMPORT_BATCH_SIZE, snapshots=None):
+    """Load the CSV files of each snapshot in order (default: TABLE_FILES)."""
+    if snapshots is None:
+        snapshots = [{"files": TABLE_FILES}]
     with get_conn(NEW_DB_URL) as conn:
-        cur = conn.cursor()
+        conn.set_client_encoding("UTF8")
+        conn.cursor().execute("SET LOCAL synchronous_commit = off")
 
-        # Insert into users
-        with open(USERS_CSV, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                cur.execute("""
-                    INSERT INTO users (id, username, password)
-                    VALUES (%s, %s, %s)
-                """, (row["id"], row["username"], row["password"]))
-        print("✅ Data imported into users")
-
-        # Insert into words
-        with open(WORDS_CSV, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                cur.execute("""
-                    INSERT INTO words (user_id, word, meaning)
-                    VALUES (%s, %s, %s)
-                """, (row["user_id"], row["word"], row["meaning"]))
-        print("✅ Data imported into words")
+        for snapshot in snapshots:
+            for table in TABLE_COLUMNS:
+                import_table(conn, table, snapshot["files"][table], mode, batch_size)
+                print(f"✅ Data imported into {table}")
 
+        finalize_tables(conn)
         conn.commit()
         print("✅ Data imported into new DB")
 
 
+def import_from_archive(path=ARCHIVE_PATH, tables=None):
+    """Load ``tables`` (default: all) from an archive into tables made by create_tables().
+
+    Every chunk's checksum is verified before anything is loaded, so a corrupt
+    archive fails fast instead of half-way through the restore.
+    """
+    with ArchiveReader(path) as archive:
+        tables = tables or archive.tables()
+        archive.verify(tables)
+        with closing(get_conn(NEW_DB_URL)) as conn, conn:
+            conn.set_client_encoding("UTF8")
+            conn.cursor().execute("SET LOCAL synchronous_commit = off")
+            cur = conn.cursor()
+            for table in tables:
+                started = time.perf_counter()
+                copy = f"COPY {table} ({', '.join(archive.columns(table))}) FROM STDIN WITH (FORMAT csv)"
+                for chunk_no in range(len(archive.chunks(table))):
+                    cur.copy_expert(copy, io.StringIO(archive.read_chunk(table, chunk_no)))
+                report(table, archive.index["tables"][table]["rows"], path, started)
+            finalize_tables(conn)
+    print(f"✅ Data restored from {path}")
+
+
+def import_legacy_words(path=WORDS_CSV, mode=IMPORT_MODE, batch_size=IMPORT_BATCH_SIZE):
+    """Load USERS_CSV and a ``words.csv`` from before the lexicon split into tables made by create_tables().
+
+    The words go into a scratch ``words`` table and are converted with the same
+    statements ``init-db`` uses to migrate a live database.
+    """
+    with get_conn(NEW_DB_URL) as conn:
+        conn.set_client_encoding("UTF8")
+        # Written by the exporter of that time, before NULL_MARKER
+        import_table(conn, "users", USERS_CSV, mode, batch_size, null="")
+        cur = conn.cursor()
+        # Old exports did not always select the id; those rows get generated ones
+        cur.execute('''
+            CREATE TABLE words (
+                id SERIAL PRIMARY KEY,
+                user_id INTEGER,
+                word TEXT,
+                meaning TEXT,
+                enrichment_status TEXT NOT NULL DEFAULT 'done'
+            );
+        ''')
+        PostgresStorage.ensure_review_schema(cur, "words")
+        import_table(conn, "words", path, mode, batch_size, null="")
+        cur.execute(MIGRATE_LEXICON_SQL.format(key=PG_LEGACY_WORD_KEY))
+        cur.execute(MIGRATE_USER_WORDS_SQL.format(key=PG_LEGACY_WORD_KEY, p="%s"), (int(time.time()),))
+        cur.execute("DROP TABLE words")
+        finalize_tables(conn)
+        conn.commit()
+        print(f"✅ {path} converted into lexicon and user_words")
+
+
+def restore_incremental(mode=IMPORT_MODE, batch_size=IMPORT_BATCH_SIZE):
+    """Recreate the tables and replay the base snapshot plus every delta, in order."""
+    manifest = load_manifest()
+    if manifest is None:
+        raise FileNotFoundError(f"No backup manifest at {MANIFEST_PATH}")
+    create_tables()
+    snapshots = [manifest["base"]] + sorted(manifest["deltas"], key=lambda delta: delta["seq"])
+    import_from_csv(mode, batch_size, snapshots=snapshots)
+
+
+def split_csv(path, rows_per_chunk, out_dir):
+    """Split an id-ordered CSV into consecutive chunks (id ranges), each with the header."""
+    chunks = []
+    out = None
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            for n, row in enumerate(reader):
+                if n % rows_per_chunk == 0:
+                    if out:
+                        out.close()
+                    chunks.append(os.path.join(out_dir, f"chunk.{len(chunks):04d}.csv"))
+                    out = open(chunks[-1], "w", newline="", encoding="utf-8")
+                    writer = csv.writer(out)
+                    writer.writerow(header)
+                writer.writerow(row)
+    finally:
+        if out:
+            out.close()
+    return chunks
+
+
+def import_parallel(workers=PARALLEL_WORKERS, mode=IMPORT_MODE, batch_size=IMPORT_BATCH_SIZE,
+                    chunk_rows=PARALLEL_CHUNK_ROWS):
+    """Load USERS_CSV and LEXICON_CSV, then USER_WORDS_CSV in id-range chunks on ``workers`` connections at once.
+
+    Run create_tables() first. Each chunk commits on its own, so if a chunk fails
+    recreate the tables and start again; constraints, the index and sequences are
+    set up once every chunk is in.
+    """
+    started = time.perf_counter()
+    with closing(get_conn(NEW_DB_URL)) as conn, conn:
+        conn.set_client_encoding("UTF8")
+        import_table(conn, "users", USERS_CSV, mode, batch_size)
+        import_table(conn, "lexicon", LEXICON_CSV, mode, batch_size)
+
+    def import_chunk(path):
+        with closing(get_conn(NEW_DB_URL)) as conn, conn:
+            conn.set_client_encoding("UTF8")
+            conn.cursor().execute("SET LOCAL synchronous_commit = off")
+            return import_table(conn, "user_words", path, mode, batch_size)
+
+    out_dir = os.path.dirname(os.path.abspath(USER_WORDS_CSV))
+    with tempfile.TemporaryDirectory(dir=out_dir) as tmp:
+        chunks = split_csv(USER_WORDS_CSV, chunk_rows, tmp)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            rows = list(pool.map(import_chunk, chunks))
+
+    with closing(get_conn(NEW_DB_URL)) as conn, conn:
+        finalize_tables(conn)
+
+    word_rows = sum(r for r in rows if r and r > 0)
+    elapsed = time.perf_counter() - started
+    print(f"✅ Parallel import of {word_rows} words in {len(chunks)} chunk(s) with {workers} worker(s) "
+          f"in {elapsed:.2f}s ({word_rows / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
 def print_table_results():
     with get_conn(NEW_DB_URL) as conn:
         cur = conn.cursor()
@@ -95,7 +496,8 @@ def print_table_results():
         rows = cur.fetchall()  # Gets all rows from the query result
         for row in rows:
             print(row)
-        cur.execute("SELECT * FROM words ")
+        cur.execute("SELECT user_words.id, user_words.user_id, lexicon.word, lexicon.meaning "
+                    "FROM user_words JOIN lexicon ON lexicon.id = user_words.lexicon_id ORDER BY user_words.id")
         rows = cur.fetchall()  # Gets all rows from the query result
         for row in rows:
             print(row)
@@ -105,10 +507,23 @@ def print_table_results():
 if __name__ == "__main__":
     # Run below 1st  to take backup
     # export_to_csv()
+    # or, for nightly backups, write a base once and then only the new rows each run
+    # export_incremental()
+    # and restore base + deltas into the new DB (creates the tables itself)
+    # restore_incremental()
+    # for large DBs, export/import user_words in id ranges on several connections at once
+    # export_parallel()
+    # create_tables(); import_parallel()
+    # single compressed, checksummed file instead of CSVs
+    # export_to_archive()
+    # create_tables(); import_from_archive()
     # After above function complete delete postre sql db and create new and update URL
     # after new db created run below 2 funtions
+    # (import_from_csv adds the foreign key, index and sequence values once the data is in)
     # create_tables()
     # import_from_csv()
+    # or, for a words.csv taken before the lexicon split, load users then convert the words
+    # create_tables(); import_legacy_words()
     # to see list of records from database
     print_table_results()
     print("🎯 Migration complete!")
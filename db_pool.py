@@ -0,0 +1,197 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+
+from metrics import phase
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Thread-safe PostgreSQL pool shared by every request in one worker process.
+
+    Returned connections stay open on an idle list (up to ``maxconn``, the cap
+    on connections checked out at once), so a burst of requests reuses them
+    instead of reconnecting. The pool is set up on first use and again after a
+    fork, so gunicorn workers never share sockets with their parent.
+    Connections older than ``max_lifetime`` seconds are recycled, and
+    connections that sat idle longer than ``check_after_idle`` seconds are
+    pinged before being handed out.
+    """
+
+    def __init__(self, dsn, minconn=1, maxconn=10, max_lifetime=1800,
+                 check_after_idle=30, checkout_timeout=10, **connect_kwargs):
+        self.dsn = dsn
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.max_lifetime = max_lifetime
+        self.check_after_idle = check_after_idle
+        self.checkout_timeout = checkout_timeout
+        self.connect_kwargs = connect_kwargs
+
+        self._lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+        self._pid = None
+        self._slots = None
+        # Idle connections as (conn, born, last_used), most recently returned last;
+        # the birth time of each checked-out connection, dropped when it comes back
+        self._idle = []
+        self._born = {}
+        self._counters = {}
+
+    # --- lifecycle ---
+    def _connect(self):
+        conn = psycopg2.connect(self.dsn, **self.connect_kwargs)
+        self._count('created')
+        return conn, time.monotonic()
+
+    def _ensure_pool(self):
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid != pid:
+                # After a fork the inherited connections belong to the parent;
+                # drop them without closing so the parent's sockets stay intact.
+                self._slots = threading.BoundedSemaphore(self.maxconn)
+                self._idle = []
+                self._born = {}
+                self._counters = {
+                    'checkouts': 0,
+                    'created': 0,
+                    'recycled': 0,
+                    'failed_checks': 0,
+                    'timeouts': 0,
+                    'wait_seconds': 0.0,
+                }
+                for _ in range(self.minconn):
+                    conn, born = self._connect()
+                    self._idle.append((conn, born, born))
+                self._pid = pid
+
+    def close(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                for conn, _, _ in self._idle:
+                    conn.close()
+            self._idle = []
+            self._born = {}
+            self._pid = None
+
+    # --- checkout / return ---
+    def _count(self, name, amount=1):
+        with self._counter_lock:
+            self._counters[name] += amount
+
+    def _is_healthy(self, conn, born, last_used):
+        if conn.closed:
+            return False
+        now = time.monotonic()
+        if now - born > self.max_lifetime:
+            return False
+        if now - last_used > self.check_after_idle:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                conn.rollback()
+            except psycopg2.Error:
+                self._count('failed_checks')
+                return False
+        return True
+
+    def _discard(self, conn):
+        self._count('recycled')
+        if not conn.closed:
+            conn.close()
+
+    def getconn(self):
+        self._ensure_pool()
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            self._count('timeouts')
+            raise PoolTimeout(f"No database connection available after {self.checkout_timeout}s")
+        try:
+            while True:
+                with self._lock:
+                    entry = self._idle.pop() if self._idle else None
+                if entry is None:
+                    conn, born = self._connect()
+                    break
+                conn, born, last_used = entry
+                if self._is_healthy(conn, born, last_used):
+                    break
+                self._discard(conn)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._born[id(conn)] = born
+        self._count('checkouts')
+        self._count('wait_seconds', time.monotonic() - started)
+        return conn
+
+    def putconn(self, conn):
+        if self._pid != os.getpid():
+            conn.close()
+            return
+        try:
+            with self._lock:
+                born = self._born.pop(id(conn), None)
+            if born is None or conn.closed:
+                self._discard(conn)
+                return
+            if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    self._discard(conn)
+                    return
+            with self._lock:
+                self._idle.append((conn, born, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; commit on success, roll back on error, always return it."""
+        with phase('db_connect'):
+            conn = self.getconn()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            if not conn.closed:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    pass
+            raise
+        finally:
+            self.putconn(conn)
+
+    # --- reporting ---
+    def stats(self):
+        if self._pid != os.getpid():
+            return {'pid': os.getpid(), 'initialized': False,
+                    'minconn': self.minconn, 'maxconn': self.maxconn}
+        with self._lock:
+            in_use = len(self._born)
+            idle = len(self._idle)
+        stats = {
+            'pid': self._pid,
+            'initialized': True,
+            'minconn': self.minconn,
+            'maxconn': self.maxconn,
+            'open': in_use + idle,
+            'in_use': in_use,
+            'idle': idle,
+        }
+        with self._counter_lock:
+            stats.update(self._counters)
+        return stats
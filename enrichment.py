@@ -0,0 +1,223 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from types import SimpleNamespace
+
+import metrics
+from enrichment_cache import normalize_word
+from upstream import CircuitOpen, UpstreamClient
+
+DICTIONARY_URL = os.environ.get("DICTIONARY_URL", "https://api.dictionaryapi.dev/api/v2/entries/en/{word}")
+MAX_EXAMPLES = 2
+
+# LibreTranslate-compatible endpoint used instead of googletrans when set (a
+# self-hosted instance, or the fake upstream in benchmarks/fake_upstreams.py)
+TRANSLATE_API_URL = os.environ.get("TRANSLATE_API_URL")
+TRANSLATE_API_KEY = os.environ.get("TRANSLATE_API_KEY")
+TRANSLATE_TIMEOUT = float(os.environ.get("TRANSLATE_TIMEOUT", 10))
+
+# --- Concurrency Config (per gunicorn worker) ---
+ENRICH_MAX_WORKERS = int(os.environ.get("ENRICH_MAX_WORKERS", 8))
+ENRICH_DEADLINE = float(os.environ.get("ENRICH_DEADLINE", 15))
+DICTIONARY_TIMEOUT = float(os.environ.get("DICTIONARY_TIMEOUT", 5))
+TRANSLATE_BATCH_SIZE = int(os.environ.get("TRANSLATE_BATCH_SIZE", 50))
+
+# --- Upstream Clients (per gunicorn worker) ---
+# Retries per call, and consecutive failed attempts before calls are short-circuited
+# for UPSTREAM_RESET_TIMEOUT seconds. Keep (retries + 1) * timeout under ENRICH_DEADLINE.
+UPSTREAM_RETRIES = int(os.environ.get("UPSTREAM_RETRIES", 1))
+UPSTREAM_FAILURE_THRESHOLD = int(os.environ.get("UPSTREAM_FAILURE_THRESHOLD", 5))
+UPSTREAM_RESET_TIMEOUT = float(os.environ.get("UPSTREAM_RESET_TIMEOUT", 30))
+
+translate_client = UpstreamClient('translate', timeout=TRANSLATE_TIMEOUT, retries=UPSTREAM_RETRIES,
+                                  pool_size=ENRICH_MAX_WORKERS, failure_threshold=UPSTREAM_FAILURE_THRESHOLD,
+                                  reset_timeout=UPSTREAM_RESET_TIMEOUT)
+dictionary_client = UpstreamClient('dictionary', timeout=DICTIONARY_TIMEOUT, retries=UPSTREAM_RETRIES,
+                                   pool_size=ENRICH_MAX_WORKERS, failure_threshold=UPSTREAM_FAILURE_THRESHOLD,
+                                   reset_timeout=UPSTREAM_RESET_TIMEOUT)
+
+
+def upstream_stats():
+    return {client.name: client.stats() for client in (translate_client, dictionary_client)}
+
+_executors = {}
+_executor_lock = threading.Lock()
+
+
+def get_executor(upstream):
+    """Shared pool that caps how many calls one worker makes to ``upstream`` at once.
+
+    Each upstream has its own pool, so a translation (the call that decides
+    whether a word gets a meaning at all) never queues behind example lookups
+    from a slow dictionary.
+    """
+    executor = _executors.get(upstream)
+    if executor is None:
+        with _executor_lock:
+            executor = _executors.get(upstream)
+            if executor is None:
+                executor = _executors[upstream] = ThreadPoolExecutor(max_workers=ENRICH_MAX_WORKERS,
+                                                                     thread_name_prefix=f"enrich-{upstream}")
+    return executor
+
+
+def make_translator():
+    """``HTTPTranslator`` when ``TRANSLATE_API_URL`` is set, googletrans otherwise."""
+    if TRANSLATE_API_URL:
+        return HTTPTranslator(TRANSLATE_API_URL, api_key=TRANSLATE_API_KEY)
+    from googletrans import Translator
+    return Translator(timeout=TRANSLATE_TIMEOUT)
+
+
+class HTTPTranslator:
+    """``POST {q, source, target}`` translator with googletrans' ``translate(...).text`` interface.
+
+    Requests go over ``translate_client``'s pooled session; retries and the
+    circuit breaker are applied by the callers below, as for googletrans.
+    """
+
+    def __init__(self, url, api_key=None, timeout=TRANSLATE_TIMEOUT):
+        self.url = url
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def translate(self, text, src='en', dest='hi'):
+        payload = {'q': text, 'source': src, 'target': dest, 'format': 'text'}
+        if self.api_key:
+            payload['api_key'] = self.api_key
+        res = translate_client.session.post(self.url, json=payload, timeout=self.timeout)
+        res.raise_for_status()
+        return SimpleNamespace(text=res.json()['translatedText'])
+
+
+def translate_word(translator, word):
+    with metrics.phase('translate'):
+        return translate_client.call(translator.translate, word, src='en', dest='hi').text
+
+
+def translate_batch(translator, words):
+    """Translate a list of words with a single upstream request.
+
+    googletrans' list form still sends one request per item, so the words are
+    sent as newline-separated lines of one text and split back apart. Raises
+    ValueError if the line count does not survive the round trip.
+    """
+    with metrics.phase('translate'):
+        text = translate_client.call(translator.translate, "\n".join(words), src='en', dest='hi').text
+    lines = [line.strip() for line in text.split("\n")]
+    if len(lines) != len(words):
+        raise ValueError(f"Batch translation returned {len(lines)} lines for {len(words)} words")
+    return lines
+
+
+def fetch_examples(word, timeout=DICTIONARY_TIMEOUT):
+    example_sentences = []
+    with metrics.phase('dictionary'):
+        res = dictionary_client.get(DICTIONARY_URL.format(word=word), timeout=timeout)
+    if res.status_code == 200:
+        for meaning_data in res.json()[0].get('meanings', []):
+            for d in meaning_data.get('definitions', []):
+                if 'example' in d:
+                    example_sentences.append(d['example'])
+                if len(example_sentences) >= MAX_EXAMPLES:
+                    break
+            if len(example_sentences) >= MAX_EXAMPLES:
+                break
+    return example_sentences
+
+
+def format_meaning(hindi_meaning, example_sentences):
+    full_meaning = hindi_meaning or ""
+    if example_sentences:
+        full_meaning += "\nExamples:\n" + "\n".join(f"- {e}" for e in example_sentences)
+    return full_meaning
+
+
+def parse_meaning(full_meaning):
+    """Split text made by ``format_meaning`` back into ``(hindi_meaning, example_sentences)``."""
+    hindi_meaning, _, examples = (full_meaning or "").partition("\nExamples:\n")
+    return hindi_meaning, [line[2:] if line.startswith("- ") else line for line in examples.split("\n") if line]
+
+
+_FAILED = object()
+
+
+def _result(future):
+    if not future.done() or future.cancelled() or future.exception() is not None:
+        return _FAILED
+    return future.result()
+
+
+def enrich_words(translator, words, cache=None, refresh=False, deadline=ENRICH_DEADLINE, offline=None):
+    """Translate and fetch examples for every word concurrently.
+
+    Returns ``(meaning, status)`` per word, in the order given: ``'done'``,
+    ``'partial'`` when the examples were missed (retried later), or
+    ``(None, 'failed')`` without a translation. Words in ``offline`` or ``cache``
+    cost no network calls unless ``refresh`` is set; the rest go out in batches
+    of ``TRANSLATE_BATCH_SIZE``, with dictionary lookups alongside, and whatever
+    is still running after ``deadline`` seconds is abandoned. Only complete
+    results are cached.
+    """
+    keys = [normalize_word(w) for w in words]
+    found = {}
+    if offline is not None and not refresh:
+        with metrics.phase('offline_dictionary'):
+            found = offline.get_many(keys)
+    if cache is not None and not refresh:
+        missing = [key for key in keys if key not in found]
+        if missing:
+            found.update(cache.get_many(missing))
+    pending = [key for key in dict.fromkeys(keys) if key not in found]
+    partial = set()
+
+    if pending:
+        translate_pool, dictionary_pool = get_executor('translate'), get_executor('dictionary')
+        started = time.monotonic()
+        chunks = [pending[i:i + TRANSLATE_BATCH_SIZE]
+                  for i in range(0, len(pending), TRANSLATE_BATCH_SIZE)]
+        batches = [metrics.submit(translate_pool, translate_batch, translator, chunk) for chunk in chunks]
+        examples = [metrics.submit(dictionary_pool, fetch_examples, key) for key in pending]
+        wait(batches, timeout=deadline)
+
+        # Chunks whose batch call failed outright fall back to one call per word,
+        # unless the translator's breaker is open and those calls would fail too.
+        translations = {}
+        retries = {}
+        for chunk, batch in zip(chunks, batches):
+            lines = _result(batch)
+            if lines is not _FAILED:
+                translations.update(zip(chunk, lines))
+            elif batch.done() and not batch.cancelled() and isinstance(batch.exception(), CircuitOpen):
+                continue
+            elif batch.done():
+                retries.update((key, metrics.submit(translate_pool, translate_word, translator, key)) for key in chunk)
+            else:
+                batch.cancel()
+
+        remaining = max(0.0, deadline - (time.monotonic() - started))
+        _, not_done = wait(list(retries.values()) + examples, timeout=remaining)
+        for future in not_done:
+            future.cancel()
+        for key, future in retries.items():
+            hindi_meaning = _result(future)
+            if hindi_meaning is not _FAILED:
+                translations[key] = hindi_meaning
+
+        fresh = {}
+        for key, example in zip(pending, examples):
+            if key not in translations:
+                continue
+            hindi_meaning = translations[key]
+            example_sentences = _result(example)
+            if example_sentences is _FAILED:
+                found[key] = (hindi_meaning, [])
+                partial.add(key)
+            else:
+                found[key] = fresh[key] = (hindi_meaning, example_sentences)
+        if cache is not None:
+            cache.put_many(fresh)
+
+    return [(format_meaning(*found[key]), 'partial' if key in partial else 'done') if key in found else (None, 'failed')
+            for key in keys]
@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_word(word):
+    return " ".join(word.split()).lower()
+
+
+class LRUCache:
+    """Small thread-safe LRU with a per-entry time to live."""
+
+    def __init__(self, maxsize=2048, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class EnrichmentCache:
+    """Two-level cache of (translation, examples) keyed on the normalized word.
+
+    Lookups hit the in-process LRU first, then the ``enrichment_cache`` table that
+    every worker shares, through a ``storage.Storage`` backend.
+    """
+
+    def __init__(self, store, maxsize=2048, ttl=3600, db_ttl_days=30):
+        self.store = store
+        self.db_ttl_days = db_ttl_days
+        self.memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.counters = {'memory_hits': 0, 'db_hits': 0, 'misses': 0, 'writes': 0}
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def get_many(self, words):
+        """Return ``{normalized_word: (translation, examples)}`` for every cached word."""
+        found = {}
+        missing = []
+        for key in {normalize_word(w) for w in words}:
+            value = self.memory.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+        self._count('memory_hits', len(found))
+
+        if missing:
+            with self.store.connection() as conn:
+                rows = self.store.cache_get(conn.cursor(), missing, self.db_ttl_days)
+            for key, translation, examples in rows:
+                value = (translation, examples.split("\n") if examples else [])
+                self.memory.set(key, value)
+                found[key] = value
+            self._count('db_hits', len(rows))
+            self._count('misses', len(missing) - len(rows))
+        return found
+
+    def put_many(self, entries):
+        """Store ``{word: (translation, examples)}`` in both levels."""
+        if not entries:
+            return
+        rows = []
+        for word, (translation, examples) in entries.items():
+            key = normalize_word(word)
+            self.memory.set(key, (translation, list(examples)))
+            rows.append((key, translation, "\n".join(examples)))
+        with self.store.connection() as conn:
+            self.store.cache_put(conn.cursor(), rows)
+        self._count('writes', len(rows))
+
+    def invalidate(self, words=None):
+        """Drop the given words, or every entry when ``words`` is None."""
+        with self.store.connection() as conn:
+            if words is None:
+                self.memory.clear()
+                self.store.cache_delete(conn.cursor())
+            else:
+                keys = [normalize_word(w) for w in words]
+                for key in keys:
+                    self.memory.delete(key)
+                self.store.cache_delete(conn.cursor(), keys)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        lookups = stats['memory_hits'] + stats['db_hits'] + stats['misses']
+        stats['hit_ratio'] = round((lookups - stats['misses']) / lookups, 4) if lookups else 0.0
+        stats['memory_entries'] = len(self.memory)
+        stats['memory_evictions'] = self.memory.evictions
+        return stats
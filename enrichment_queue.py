@@ -0,0 +1,295 @@
+import heapq
+import logging
+import random
+import threading
+import time
+
+from psycopg2.extras import execute_values
+
+log = logging.getLogger(__name__)
+
+CREATE_TABLES_SQL = '''
+    CREATE TABLE IF NOT EXISTS enrichment_jobs (
+        lexicon_id INTEGER PRIMARY KEY REFERENCES lexicon(id) ON DELETE CASCADE,
+        word TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        last_error TEXT
+    );
+    CREATE INDEX IF NOT EXISTS enrichment_jobs_next_attempt_idx ON enrichment_jobs (next_attempt_at);
+    INSERT INTO enrichment_jobs (lexicon_id, word)
+    SELECT id, word FROM lexicon WHERE enrichment_status = 'pending'
+    ON CONFLICT DO NOTHING;
+'''
+
+PENDING = 'pending'
+DONE = 'done'
+PARTIAL = 'partial'
+FAILED = 'failed'
+
+
+class EnrichmentQueue:
+    """Fills in ``lexicon.meaning`` for entries saved with ``enrichment_status='pending'``.
+
+    Producers call ``add(cur, jobs)`` inside the transaction that inserts the
+    words and ``wake(jobs)`` once it has committed; ``jobs`` is a list of
+    ``(lexicon_id, word)``, so a word several users added is enriched once. A
+    pool of daemon threads then claims jobs in batches, runs
+    ``enrich(words) -> [(meaning, status)]`` (a ``None`` meaning is "try again
+    later") and retries failures with exponential backoff until ``max_attempts``.
+    A partial meaning (examples missing) is stored right away and retried the
+    same way, staying partial if it never completes. Results are written through
+    ``store``, a ``storage.Storage`` backend.
+    """
+
+    def __init__(self, store, enrich, workers=2, batch_size=20, max_attempts=5,
+                 backoff_base=5, backoff_max=600, poll_interval=2):
+        self.store = store
+        self.enrich = enrich
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._start_lock = threading.Lock()
+
+    # --- producer side ---
+    def add(self, cur, jobs):
+        pass
+
+    def wake(self, jobs):
+        self.ensure_started()
+        self._wake.set()
+
+    # --- worker side, implemented per backend ---
+    def claim(self, limit):
+        """Return up to ``limit`` due jobs as ``(lexicon_id, word, attempts)``."""
+        raise NotImplementedError
+
+    def retry(self, jobs, error):
+        raise NotImplementedError
+
+    def _finish(self, cur, lexicon_ids):
+        pass
+
+    def backoff(self, attempts):
+        delay = min(self.backoff_base * 2 ** (attempts - 1), self.backoff_max)
+        return delay * random.uniform(0.8, 1.2)
+
+    def ensure_started(self):
+        if self._threads and all(t.is_alive() for t in self._threads):
+            return
+        with self._start_lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            self._recover()
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._run, name=f"enrich-queue-{len(self._threads)}",
+                                          daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _recover(self):
+        pass
+
+    def _idle_timeout(self):
+        return self.poll_interval
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                jobs = self.claim(self.batch_size)
+            except Exception:
+                log.exception("Could not claim enrichment jobs")
+                jobs = []
+            if not jobs:
+                self._wake.wait(self._idle_timeout())
+                self._wake.clear()
+                continue
+            try:
+                self.process(jobs)
+            except Exception:
+                # Postgres jobs reappear once their lease expires; in-memory ones
+                # stay pending in the table and are picked up on the next start.
+                log.exception("Could not store enrichment results")
+
+    def process(self, jobs):
+        try:
+            results = self.enrich([word for _, word, _ in jobs])
+        except Exception as exc:
+            log.exception("Enrichment batch failed")
+            self._fail_or_retry(jobs, repr(exc))
+            return
+
+        done, partial, missed = [], [], []
+        for job, (meaning, status) in zip(jobs, results):
+            if meaning is None:
+                missed.append(job)
+            elif status == PARTIAL:
+                partial.append((job, meaning))
+            else:
+                done.append((job[0], meaning))
+        if done or partial:
+            with self.store.connection() as conn:
+                cur = conn.cursor()
+                if done:
+                    self.store.set_meanings(cur, done)
+                    self._finish(cur, [lexicon_id for lexicon_id, _ in done])
+                if partial:
+                    self.store.set_meanings(cur, [(job[0], meaning) for job, meaning in partial], status=PARTIAL)
+        if partial:
+            self._fail_or_retry([job for job, _ in partial], "no examples before deadline", keep=True)
+        if missed:
+            self._fail_or_retry(missed, "no translation before deadline")
+
+    def _fail_or_retry(self, jobs, error, keep=False):
+        """Retry ``jobs`` later, or once out of attempts mark them failed (or with ``keep``, leave them as stored)."""
+        exhausted = [job for job in jobs if job[2] >= self.max_attempts]
+        retryable = [job for job in jobs if job[2] < self.max_attempts]
+        if exhausted:
+            log.warning("Giving up on enrichment of %d word(s): %s", len(exhausted), error)
+            with self.store.connection() as conn:
+                cur = conn.cursor()
+                lexicon_ids = [lexicon_id for lexicon_id, _, _ in exhausted]
+                if not keep:
+                    self.store.mark_failed(cur, lexicon_ids)
+                self._finish(cur, lexicon_ids)
+        if retryable:
+            self.retry(retryable, error)
+
+
+class MemoryEnrichmentQueue(EnrichmentQueue):
+    """In-process queue for local single-worker runs.
+
+    Jobs only live in this process; on start it re-queues any lexicon entries
+    still marked pending in the database so a restart does not strand them. An
+    entry already waiting in the heap is not queued a second time.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._heap = []
+        self._queued = set()
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._recovered = False
+
+    def _push(self, jobs, due):
+        with self._lock:
+            for lexicon_id, word, attempts in jobs:
+                if lexicon_id in self._queued:
+                    continue
+                self._queued.add(lexicon_id)
+                self._seq += 1
+                heapq.heappush(self._heap, (due(attempts), self._seq, lexicon_id, word, attempts))
+
+    def wake(self, jobs):
+        # Queued before the first start, so recovery skips them instead of adding them twice
+        now = time.monotonic()
+        self._push([(lexicon_id, word, 0) for lexicon_id, word in jobs], lambda attempts: now)
+        self.ensure_started()
+        self._wake.set()
+
+    def claim(self, limit):
+        now = time.monotonic()
+        jobs = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now and len(jobs) < limit:
+                _, _, lexicon_id, word, attempts = heapq.heappop(self._heap)
+                self._queued.discard(lexicon_id)
+                jobs.append((lexicon_id, word, attempts + 1))
+        return jobs
+
+    def retry(self, jobs, error):
+        now = time.monotonic()
+        self._push(jobs, lambda attempts: now + self.backoff(attempts))
+
+    def _idle_timeout(self):
+        with self._lock:
+            if self._heap:
+                return max(0.0, min(self.poll_interval, self._heap[0][0] - time.monotonic()))
+        return self.poll_interval
+
+    def _recover(self):
+        if self._recovered:
+            return
+        self._recovered = True
+        with self.store.connection() as conn:
+            rows = self.store.pending_words(conn.cursor())
+        now = time.monotonic()
+        self._push([(lexicon_id, word, 0) for lexicon_id, word in rows], lambda attempts: now)
+
+    def stats(self):
+        with self._lock:
+            return {'backend': 'memory', 'queued': len(self._heap), 'workers': len(self._threads)}
+
+
+class PostgresEnrichmentQueue(EnrichmentQueue):
+    """Durable queue in the ``enrichment_jobs`` table, shared by every worker.
+
+    Needs the Postgres storage backend; with SQLite use the memory queue.
+
+    Claiming a job pushes its ``next_attempt_at`` forward by ``lease`` seconds, so
+    jobs held by a worker that died become visible again once the lease expires.
+    """
+
+    def __init__(self, *args, lease=120, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lease = lease
+
+    def add(self, cur, jobs):
+        if jobs:
+            execute_values(cur, "INSERT INTO enrichment_jobs (lexicon_id, word) VALUES %s "
+                           "ON CONFLICT DO NOTHING", jobs, page_size=len(jobs))
+
+    def claim(self, limit):
+        with self.store.connection() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                UPDATE enrichment_jobs
+                SET attempts = attempts + 1,
+                    next_attempt_at = now() + make_interval(secs => %s)
+                WHERE lexicon_id IN (
+                    SELECT lexicon_id FROM enrichment_jobs
+                    WHERE next_attempt_at <= now()
+                    ORDER BY next_attempt_at
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING lexicon_id, word, attempts
+            """, (self.lease, limit))
+            jobs = cur.fetchall()
+            conn.commit()
+        return jobs
+
+    def retry(self, jobs, error):
+        with self.store.connection() as conn:
+            cur = conn.cursor()
+            execute_values(
+                cur,
+                "UPDATE enrichment_jobs SET next_attempt_at = now() + make_interval(secs => v.delay), "
+                "last_error = v.error FROM (VALUES %s) AS v(lexicon_id, delay, error) "
+                "WHERE enrichment_jobs.lexicon_id = v.lexicon_id",
+                [(lexicon_id, self.backoff(attempts), error) for lexicon_id, _, attempts in jobs],
+                template="(%s, %s::float8, %s)",
+                page_size=len(jobs)
+            )
+            conn.commit()
+
+    def _finish(self, cur, lexicon_ids):
+        cur.execute("DELETE FROM enrichment_jobs WHERE lexicon_id = ANY(%s)", (lexicon_ids,))
+
+    def stats(self):
+        with self.store.connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT COUNT(*), COUNT(*) FILTER (WHERE attempts > 0) FROM enrichment_jobs")
+            queued, retried = cur.fetchone()
+        return {'backend': 'postgres', 'queued': queued, 'retried': retried,
+                'workers': len(self._threads)}
@@ -0,0 +1,287 @@
+"""Per-request phase timings: Prometheus histograms, Server-Timing headers and slow-request profiles.
+
+Code that talks to something slow wraps the call in ``phase(name)`` (DB
+connect, query, translate, dictionary fetch, template render). Each phase is
+observed into ``vocab_phase_seconds{route, phase}`` and, while a request is
+being served, added to that request's ``RequestTimer``, which becomes the
+``Server-Timing`` header. Enrichment lookups run on executor threads, so they
+are submitted through ``submit()`` to carry the request's timer with them.
+Work done outside a request (queue workers, imports, CLI) is labelled
+``route="background"``.
+
+Setting ``PROFILE_SLOW_MS`` turns on a sampling profiler: the stacks of every
+thread working on a request are sampled every ``PROFILE_INTERVAL_MS`` and the
+hottest ones are logged for requests slower than the threshold (and written in
+collapsed-stack format to ``PROFILE_DIR`` when set, for flamegraph tools).
+"""
+import contextvars
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BACKGROUND = "background"
+
+PROFILE_SLOW_MS = os.environ.get("PROFILE_SLOW_MS")
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", 5))
+PROFILE_DIR = os.environ.get("PROFILE_DIR")
+PROFILE_TOP_STACKS = 5
+PROFILE_MAX_DEPTH = 64
+
+
+def _label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """Thread-safe Prometheus histogram with a fixed label set."""
+
+    def __init__(self, name, help, labels, buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, seconds):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += seconds
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, (list(counts), total, count))
+                            for key, (counts, total, count) in self._series.items())
+        for label_values, (counts, total, count) in series:
+            labels = ",".join(f'{name}="{_label_value(value)}"' for name, value in zip(self.labels, label_values))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram("vocab_request_seconds", "Time to serve a request.", ("route", "method", "status"))
+PHASE_SECONDS = Histogram("vocab_phase_seconds", "Time spent in one phase of a request or background job.",
+                          ("route", "phase"))
+
+
+class RequestTimer:
+    """Phase totals (and profiler samples) of one request; shared with its executor threads."""
+
+    def __init__(self, route):
+        self.route = route
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.samples = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            total, count = self.phases.get(name, (0.0, 0))
+            self.phases[name] = (total + seconds, count + 1)
+
+    def server_timing(self, total_seconds):
+        """``Server-Timing`` value; phases run concurrently by executor threads may sum past ``total``."""
+        with self._lock:
+            phases = sorted(self.phases.items())
+        parts = [f'{name};dur={seconds * 1000:.1f};desc="{count} call{"s" if count != 1 else ""}"'
+                 for name, (seconds, count) in phases]
+        parts.append(f"total;dur={total_seconds * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current = contextvars.ContextVar("request_timer", default=None)
+_render_started = contextvars.ContextVar("render_started", default=None)
+
+
+@contextmanager
+def phase(name):
+    """Time the enclosed block as phase ``name`` of the current request (or of background work)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        timer = _current.get()
+        PHASE_SECONDS.observe((timer.route if timer else BACKGROUND, name), elapsed)
+        if timer is not None:
+            timer.add(name, elapsed)
+
+
+def _run_for(timer, fn, args, kwargs):
+    if profiler is None or timer is None:
+        return fn(*args, **kwargs)
+    thread_id = threading.get_ident()
+    profiler.watch(thread_id, timer)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        profiler.unwatch(thread_id)
+
+
+def submit(executor, fn, *args, **kwargs):
+    """``executor.submit`` that runs ``fn`` on behalf of the caller's request."""
+    return executor.submit(contextvars.copy_context().run, _run_for, _current.get(), fn, args, kwargs)
+
+
+def start_request(route):
+    """Start timing a request on this thread; returns the token for ``finish_request``."""
+    timer = RequestTimer(route)
+    if profiler is not None:
+        profiler.watch(threading.get_ident(), timer)
+    return _current.set(timer)
+
+
+def finish_request(token, method, status):
+    """Stop timing the current request; returns its ``Server-Timing`` header value."""
+    timer = _current.get()
+    _current.reset(token)
+    total = time.perf_counter() - timer.started
+    REQUEST_SECONDS.observe((timer.route, method, str(status)), total)
+    if profiler is not None:
+        profiler.unwatch(threading.get_ident())
+        profiler.report(timer, method, total)
+    return timer.server_timing(total)
+
+
+def _template_started(sender, **extra):
+    _render_started.set(time.perf_counter())
+
+
+def _template_rendered(sender, **extra):
+    started = _render_started.get()
+    if started is None:
+        return
+    _render_started.set(None)
+    elapsed = time.perf_counter() - started
+    timer = _current.get()
+    PHASE_SECONDS.observe((timer.route if timer else BACKGROUND, "render"), elapsed)
+    if timer is not None:
+        timer.add("render", elapsed)
+
+
+def instrument_templates(app):
+    """Time every template render of ``app`` as the ``render`` phase."""
+    from flask import before_render_template, template_rendered
+    before_render_template.connect(_template_started, app, weak=False)
+    template_rendered.connect(_template_rendered, app, weak=False)
+
+
+_collectors = []
+
+
+def register(collector):
+    """Add the lines returned by ``collector()`` to every ``render()``."""
+    _collectors.append(collector)
+
+
+def render():
+    """All histograms in the Prometheus text exposition format."""
+    lines = REQUEST_SECONDS.render() + PHASE_SECONDS.render()
+    for collector in _collectors:
+        lines += collector()
+    return "\n".join(lines) + "\n"
+
+
+def _stack(frame):
+    stack = []
+    while frame is not None and len(stack) < PROFILE_MAX_DEPTH:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+class SamplingProfiler:
+    """Samples the stacks of threads working on a request every ``interval`` seconds.
+
+    The sampling thread is started on first use in each process (so a gunicorn
+    worker gets its own after the fork) and only looks at watched threads, so
+    idle workers and the rest of the process cost nothing but the wake-ups.
+    """
+
+    def __init__(self, slow_seconds, interval=0.005, dump_dir=None, top=PROFILE_TOP_STACKS):
+        self.slow_seconds = slow_seconds
+        self.interval = interval
+        self.dump_dir = dump_dir
+        self.top = top
+        self._watched = {}
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _ensure_started(self):
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid != pid:
+                self._pid = pid
+                threading.Thread(target=self._run, name="sampling-profiler", daemon=True).start()
+
+    def watch(self, thread_id, timer):
+        self._ensure_started()
+        with self._lock:
+            self._watched[thread_id] = timer
+
+    def unwatch(self, thread_id):
+        with self._lock:
+            self._watched.pop(thread_id, None)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                watched = list(self._watched.items())
+            if not watched:
+                continue
+            frames = sys._current_frames()
+            for thread_id, timer in watched:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    stack = _stack(frame)
+                    with timer._lock:
+                        timer.samples[stack] += 1
+
+    def report(self, timer, method, total_seconds):
+        """Log (and optionally dump) the hottest stacks of a request slower than the threshold."""
+        if total_seconds < self.slow_seconds:
+            return
+        with timer._lock:
+            samples = Counter(timer.samples)
+        if not samples:
+            return
+        # Innermost frames first: the leaf is where the time went
+        hot = "\n".join(f"  {count:>5}  " + " <- ".join(reversed(stack.split(";")[-4:]))
+                        for stack, count in samples.most_common(self.top))
+        log.warning("Slow request %s %s took %.0f ms; %d samples, hottest stacks:\n%s",
+                    method, timer.route, total_seconds * 1000, sum(samples.values()), hot)
+        if self.dump_dir:
+            name = re.sub(r"[^A-Za-z0-9]+", "_", f"{method} {timer.route}").strip("_")
+            os.makedirs(self.dump_dir, exist_ok=True)
+            path = os.path.join(self.dump_dir, f"{int(time.time() * 1000)}-{os.getpid()}-{name}.folded")
+            with open(path, "w") as f:
+                f.writelines(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+
+profiler = (SamplingProfiler(float(PROFILE_SLOW_MS) / 1000, PROFILE_INTERVAL_MS / 1000, PROFILE_DIR)
+            if PROFILE_SLOW_MS else None)
@@ -0,0 +1,202 @@
+"""Offline word list, compiled into a sorted memory-mapped file for lookups without the network.
+
+``build()`` writes every ``(word, translation, examples)`` entry, keyed on the
+normalized word, into one file:
+
+    header   magic, entry count
+    index    entry count + 1 little-endian uint64 record offsets, in key order
+    records  key, translation and examples byte lengths, then the UTF-8 bytes
+
+``OfflineDictionary`` maps that file read-only and binary-searches the index,
+so a lookup touches a few pages and takes microseconds. Nothing is read into
+Python objects at startup, and every gunicorn worker maps the same file, so
+they share one copy through the page cache. Rebuilding replaces the file
+atomically; workers pick up the new one within ``check_interval`` seconds.
+"""
+import csv
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+from enrichment import parse_meaning
+from enrichment_cache import normalize_word
+
+log = logging.getLogger(__name__)
+
+MAGIC = b"VLDICT01"
+HEADER = struct.Struct("<8sQ")
+OFFSET = struct.Struct("<Q")
+RECORD = struct.Struct("<HII")
+MAX_KEY_BYTES = 0xFFFF
+
+
+def read_csv(path):
+    """Yield ``(word, translation, examples)`` from a CSV with a header row.
+
+    Takes ``word`` plus either ``translation`` and ``examples`` (one example per
+    line, like the enrichment cache) or a ``meaning`` in the app's formatted
+    text, as in ``words.csv`` and the ``lexicon.csv`` backups.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        fields = set(reader.fieldnames or ())
+        if 'word' not in fields or not fields & {'translation', 'meaning'}:
+            raise ValueError(f"{path} needs a word column and a translation or meaning column")
+        for row in reader:
+            if 'translation' in fields:
+                examples = row.get('examples') or ""
+                yield row['word'], row['translation'], examples.split("\n") if examples else []
+            else:
+                yield (row['word'],) + parse_meaning(row['meaning'])
+
+
+def build(entries, path):
+    """Compile ``(word, translation, examples)`` entries into ``path``; returns the entry count.
+
+    A later entry for the same normalized word replaces an earlier one, and
+    entries without a translation are skipped. The file is written next to
+    ``path`` and renamed over it, so readers never see a partial file.
+    """
+    records = {}
+    for word, translation, examples in entries:
+        key = normalize_word(word).encode("utf-8")
+        if key and translation and len(key) <= MAX_KEY_BYTES:
+            records[key] = (translation.encode("utf-8"), "\n".join(examples).encode("utf-8"))
+    keys = sorted(records)
+
+    offsets = []
+    position = HEADER.size + OFFSET.size * (len(keys) + 1)
+    for key in keys:
+        translation, examples = records[key]
+        offsets.append(position)
+        position += RECORD.size + len(key) + len(translation) + len(examples)
+    offsets.append(position)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".offline-dictionary-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(keys)))
+            f.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+            for key in keys:
+                translation, examples = records[key]
+                f.write(RECORD.pack(len(key), len(translation), len(examples)))
+                f.write(key)
+                f.write(translation)
+                f.write(examples)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    return len(keys)
+
+
+class _Mapping:
+    """One opened dictionary file; immutable, so readers need no lock."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self.mm)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an offline dictionary file")
+
+    def _key_at(self, i):
+        start = OFFSET.unpack_from(self.mm, HEADER.size + OFFSET.size * i)[0]
+        key_len = RECORD.unpack_from(self.mm, start)[0]
+        return start, self.mm[start + RECORD.size:start + RECORD.size + key_len]
+
+    def lookup(self, key):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid)[1] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self.count:
+            return None
+        start, found = self._key_at(lo)
+        if found != key:
+            return None
+        key_len, translation_len, examples_len = RECORD.unpack_from(self.mm, start)
+        start += RECORD.size + key_len
+        translation = self.mm[start:start + translation_len].decode("utf-8")
+        examples = self.mm[start + translation_len:start + translation_len + examples_len].decode("utf-8")
+        return translation, examples.split("\n") if examples else []
+
+
+class OfflineDictionary:
+    """Read-only lookups in a file written by ``build()``.
+
+    The file is opened on first use and re-opened when it is replaced; until it
+    exists every lookup is a miss, so the app simply falls back to the network.
+    """
+
+    def __init__(self, path, check_interval=30):
+        self.path = path
+        self.check_interval = check_interval
+        self._mapping = None
+        self._identity = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0}
+
+    def _current(self):
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return self._mapping
+        with self._lock:
+            if self._checked_at is None or now - self._checked_at >= self.check_interval:
+                self._checked_at = now
+                try:
+                    st = os.stat(self.path)
+                    identity = (st.st_ino, st.st_mtime_ns, st.st_size)
+                except FileNotFoundError:
+                    identity = None
+                if identity != self._identity:
+                    self._identity = identity
+                    try:
+                        # The old mapping is unmapped once the last reader drops it
+                        self._mapping = _Mapping(self.path) if identity else None
+                    except (OSError, ValueError):
+                        log.exception("Could not open offline dictionary %s", self.path)
+                        self._mapping = None
+        return self._mapping
+
+    def _count(self, hits, misses):
+        with self._lock:
+            self.counters['hits'] += hits
+            self.counters['misses'] += misses
+
+    def get(self, word):
+        """``(translation, examples)`` for ``word``, or None."""
+        return self.get_many([word]).get(normalize_word(word))
+
+    def get_many(self, words):
+        """Return ``{normalized_word: (translation, examples)}`` for every word in the file."""
+        keys = {normalize_word(w) for w in words}
+        mapping = self._current()
+        found = {}
+        if mapping is not None:
+            for key in keys:
+                value = mapping.lookup(key.encode("utf-8"))
+                if value is not None:
+                    found[key] = value
+        self._count(len(found), len(keys) - len(found))
+        return found
+
+    def stats(self):
+        mapping = self._current()
+        with self._lock:
+            stats = dict(self.counters)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['path'] = self.path
+        stats['entries'] = mapping.count if mapping is not None else 0
+        return stats
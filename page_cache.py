@@ -0,0 +1,246 @@
+"""Per-user cache of rendered pages, dropped whenever that user's words change.
+
+Entries are keyed on ``(user_id, key)``, where ``key`` names the page (for
+/word_history, its paging arguments). Each user also has a generation token
+that is part of every entry's identity: ``invalidate(user_id)`` replaces the
+token, so all of that user's pages go stale at once. ``fetch()`` reads the token
+before building a page, so a page built from rows read before a write is
+stored under the old token, where no later request looks.
+
+``MemoryPageCache`` lives in one process (a single worker, or backup_app.py);
+``FilePageCache`` keeps entries in a directory shared by every worker on the
+host. Both evict the least recently used entries past ``maxsize`` and expire
+entries ``ttl`` seconds after they were stored.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+from enrichment_cache import LRUCache
+
+
+class PageCache:
+    backend = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'stores': 0, 'invalidations': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    # --- implemented per backend ---
+    def generation(self, user_id):
+        raise NotImplementedError
+
+    def _get(self, user_id, generation, key):
+        raise NotImplementedError
+
+    def _set(self, user_id, generation, key, value):
+        raise NotImplementedError
+
+    def invalidate(self, user_id):
+        """Drop every cached page of ``user_id``; call after the write has committed."""
+        raise NotImplementedError
+
+    def clear(self):
+        """Drop every cached page, e.g. after meanings changed for all users."""
+        raise NotImplementedError
+
+    def entries(self):
+        raise NotImplementedError
+
+    def fetch(self, user_id, key, build):
+        """The cached value for ``key``, or ``build()``'s.
+
+        ``key`` is a tuple of plain values; ``build`` returns ``(value, cacheable)``
+        and values must be JSON-serializable.
+        """
+        generation = self.generation(user_id)
+        value = self._get(user_id, generation, key)
+        if value is not None:
+            self._count('hits')
+            return value
+        self._count('misses')
+        value, cacheable = build()
+        if cacheable:
+            self._set(user_id, generation, key, value)
+            self._count('stores')
+        return value
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['backend'] = self.backend
+        stats['entries'] = self.entries()
+        return stats
+
+
+class MemoryPageCache(PageCache):
+    """In-process LRU; other processes do not see its invalidations, so use it with one worker."""
+
+    backend = 'memory'
+
+    def __init__(self, maxsize=1024, ttl=300):
+        super().__init__()
+        self._pages = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._generations = {}
+        self._epoch = 0
+
+    def generation(self, user_id):
+        with self._lock:
+            return self._epoch, self._generations.get(user_id, 0)
+
+    def _get(self, user_id, generation, key):
+        return self._pages.get((user_id, generation, key))
+
+    def _set(self, user_id, generation, key, value):
+        self._pages.set((user_id, generation, key), value)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self.counters['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self.counters['invalidations'] += 1
+        self._pages.clear()
+
+    def entries(self):
+        return len(self._pages)
+
+
+class FilePageCache(PageCache):
+    """One file per page under ``directory/<user_id>/``, shared by every worker on the host.
+
+    The user's generation token is the ``generation`` file next to the pages;
+    invalidating writes a new token and removes the old pages. Every file is
+    written to a temporary name and renamed into place, so readers never see a
+    partial one. A hit bumps the file's mtime, and every ``sweep_every`` stores
+    the oldest files past ``maxsize`` are removed.
+    """
+
+    backend = 'file'
+
+    def __init__(self, directory, maxsize=10000, ttl=300, sweep_every=100):
+        super().__init__()
+        self.directory = directory
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.sweep_every = sweep_every
+        self._stores_since_sweep = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _user_dir(self, user_id):
+        return os.path.join(self.directory, str(int(user_id)))
+
+    def _page_path(self, user_id, generation, key):
+        digest = hashlib.sha1(json.dumps(key).encode("utf-8")).hexdigest()
+        return os.path.join(self._user_dir(user_id), f"{generation}-{digest}.json")
+
+    def _write(self, path, data):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+    def generation(self, user_id):
+        try:
+            with open(os.path.join(self._user_dir(user_id), "generation"), encoding="utf-8") as f:
+                return f.read().strip() or "0"
+        except FileNotFoundError:
+            return "0"
+
+    def _get(self, user_id, generation, key):
+        path = self._page_path(user_id, generation, key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if entry['expires_at'] < time.time():
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return entry['value']
+
+    def _set(self, user_id, generation, key, value):
+        self._write(self._page_path(user_id, generation, key),
+                    json.dumps({'expires_at': time.time() + self.ttl, 'value': value}))
+        with self._lock:
+            self._stores_since_sweep += 1
+            sweep = self._stores_since_sweep >= self.sweep_every
+            if sweep:
+                self._stores_since_sweep = 0
+        if sweep:
+            self.sweep()
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _pages(self, user_dir):
+        try:
+            return [entry for entry in os.scandir(user_dir) if entry.name.endswith(".json")]
+        except FileNotFoundError:
+            return []
+
+    def invalidate(self, user_id):
+        user_dir = self._user_dir(user_id)
+        generation = uuid.uuid4().hex
+        self._write(os.path.join(user_dir, "generation"), generation)
+        self._count('invalidations')
+        for entry in self._pages(user_dir):
+            if not entry.name.startswith(generation):
+                self._remove(entry.path)
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.is_dir() and entry.name.isdigit():
+                self.invalidate(int(entry.name))
+
+    def _all_pages(self):
+        pages = []
+        for entry in os.scandir(self.directory):
+            if entry.is_dir():
+                pages += self._pages(entry.path)
+        return pages
+
+    def sweep(self):
+        """Remove the least recently used pages past ``maxsize``."""
+        pages = self._all_pages()
+        if len(pages) <= self.maxsize:
+            return
+        by_age = []
+        for page in pages:
+            try:
+                by_age.append((page.stat().st_mtime, page.path))
+            except FileNotFoundError:
+                pass
+        by_age.sort()
+        for _, path in by_age[:len(by_age) - self.maxsize]:
+            self._remove(path)
+
+    def entries(self):
+        return len(self._all_pages())
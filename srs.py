@@ -0,0 +1,53 @@
+"""Spaced-repetition review scheduling (SM-2) shared by the Postgres and SQLite apps.
+
+Each of a user's words (a ``user_words`` row) carries ``ease``,
+``interval_days``, ``reps`` and ``due_at`` (unix seconds; new words start at 0,
+i.e. due now). ``user_words(user_id, due_at)`` is indexed, so the next due card
+is a single index seek, and grading a card is a single UPDATE that computes the
+new schedule from the stored one. The queries are ``Storage.next_due``,
+``next_due_at`` and ``grade``, so each backend's SQL lives in storage.py; this
+module holds the rules they apply.
+"""
+
+# Answer buttons and their SM-2 quality score
+GRADES = {
+    'again': 0,
+    'hard': 3,
+    'good': 4,
+    'easy': 5,
+}
+
+MIN_EASE = 1.3
+RELEARN_SECONDS = 600
+DAY_SECONDS = 86400
+
+COLUMNS = {
+    'ease': "REAL NOT NULL DEFAULT 2.5",
+    'interval_days': "REAL NOT NULL DEFAULT 0",
+    'reps': "INTEGER NOT NULL DEFAULT 0",
+    'due_at': "BIGINT NOT NULL DEFAULT 0",
+}
+
+
+def format_wait(seconds):
+    """Human-readable wait such as "in 5 minutes" or "in 3 days"."""
+    if seconds <= 0:
+        return "now"
+    seconds = round(seconds / 60) * 60
+    for unit, size in (("day", DAY_SECONDS), ("hour", 3600), ("minute", 60)):
+        if seconds >= size:
+            count = int(seconds // size)
+            return f"in {count} {unit}{'s' if count != 1 else ''}"
+    return "in under a minute"
+
+
+def schedule(grade_name):
+    """``(quality, ease change)`` of an answer by the SM-2 formula.
+
+    Failed answers (quality below 3) bring the card back after
+    RELEARN_SECONDS and restart its repetitions; passed ones go 1 day, then
+    6 days, then the previous interval times ease. Ease never drops below
+    MIN_EASE.
+    """
+    q = GRADES[grade_name]
+    return q, 0.1 - (5 - q) * (0.08 + (5 - q) * 0.02)
@@ -0,0 +1,870 @@
+"""Storage backends behind the routes: PostgreSQL for production, SQLite for one node.
+
+Both expose the same small repository API. ``connection()`` is a context
+manager yielding a DB-API connection that commits on success and rolls back on
+error; the query methods take a cursor from it, so callers decide what shares a
+transaction (e.g. inserting words and queueing their enrichment jobs).
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+import srs
+from enrichment_cache import normalize_word
+from metrics import phase
+
+
+IMPORTS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS word_imports (
+        id {id_type} PRIMARY KEY,
+        user_id INTEGER REFERENCES users(id),
+        status TEXT NOT NULL DEFAULT 'queued',
+        total_bytes BIGINT NOT NULL DEFAULT 0,
+        bytes_read BIGINT NOT NULL DEFAULT 0,
+        words_read INTEGER NOT NULL DEFAULT 0,
+        added INTEGER NOT NULL DEFAULT 0,
+        duplicates INTEGER NOT NULL DEFAULT 0,
+        skipped INTEGER NOT NULL DEFAULT 0,
+        untranslated INTEGER NOT NULL DEFAULT 0,
+        error TEXT,
+        created_at BIGINT NOT NULL,
+        updated_at BIGINT NOT NULL
+    )
+'''
+# A user's word as the pages see it: ``(id, word, meaning, enrichment_status)``
+USER_WORDS_JOIN = "user_words JOIN lexicon ON lexicon.id = user_words.lexicon_id"
+USER_WORD_COLUMNS = "user_words.id, lexicon.word, lexicon.meaning, lexicon.enrichment_status"
+# Autocomplete groups by lexicon entry, so a word the user added twice is listed once, as its newest copy
+SUGGEST_WORD_COLUMNS = "MAX(user_words.id), lexicon.word, lexicon.meaning, lexicon.enrichment_status"
+
+# When the same word arrives twice, the better-enriched copy wins
+STATUS_RANK = {'done': 0, 'partial': 1, 'pending': 2, 'failed': 3}
+# Upserts keep a done lexicon entry, and a partial one (translated, examples missing) unless the new copy is done
+KEEP_ENTRY_SQL = ("lexicon.enrichment_status = 'done' OR "
+                  "(lexicon.enrichment_status = 'partial' AND excluded.enrichment_status <> 'done')")
+
+# Converting a pre-lexicon ``words`` table: one lexicon entry per distinct word
+# (done before pending before failed, then the newest meaning), then one
+# user_words row per old row, keeping its id and review schedule. Both run as
+# single statements inside init-db's transaction. ``{key}`` is PG_ or SQLITE_LEGACY_WORD_KEY;
+# both must give the same key as ``normalize_word()``, or lookups would miss the entry.
+PG_LEGACY_WORD_KEY = r"lower(trim(regexp_replace(coalesce(words.word, ''), '\s+', ' ', 'g')))"
+# SQLite has no regexp_replace; _migrate_words() registers normalize_word() itself
+SQLITE_LEGACY_WORD_KEY = "normalize_word(coalesce(words.word, ''))"
+MIGRATE_LEXICON_SQL = '''
+    INSERT INTO lexicon (word, meaning, enrichment_status)
+    SELECT word, meaning, enrichment_status FROM (
+        SELECT {key} AS word, coalesce(words.meaning, '') AS meaning, words.enrichment_status,
+               ROW_NUMBER() OVER (
+                   PARTITION BY {key}
+                   ORDER BY CASE words.enrichment_status WHEN 'done' THEN 0 WHEN 'pending' THEN 1 ELSE 2 END,
+                            words.id DESC
+               ) AS pick
+        FROM words
+    ) ranked
+    WHERE pick = 1
+    ON CONFLICT (word) DO NOTHING
+'''
+MIGRATE_USER_WORDS_SQL = '''
+    INSERT INTO user_words (id, user_id, lexicon_id, added_at, ease, interval_days, reps, due_at)
+    SELECT words.id, words.user_id, lexicon.id, {p}, words.ease, words.interval_days, words.reps, words.due_at
+    FROM words JOIN lexicon ON lexicon.word = {key}
+'''
+
+IMPORT_FIELDS = ('status', 'bytes_read', 'words_read', 'added', 'duplicates', 'skipped', 'untranslated', 'error')
+
+
+class Storage:
+    backend = None
+    placeholder = "%s"
+
+    def connection(self):
+        raise NotImplementedError
+
+    def create_schema(self, cur):
+        raise NotImplementedError
+
+    def stats(self):
+        raise NotImplementedError
+
+    # --- users ---
+    def find_user(self, cur, username, password):
+        p = self.placeholder
+        cur.execute(f"SELECT id FROM users WHERE username={p} AND password={p}", (username, password))
+        row = cur.fetchone()
+        return row[0] if row else None
+
+    def seed_users(self, cur, users):
+        """Insert ``(username, password)`` pairs unless an admin user already exists."""
+        cur.execute("SELECT id FROM users WHERE username='admin'")
+        if not cur.fetchone():
+            p = self.placeholder
+            cur.executemany(f"INSERT INTO users (username, password) VALUES ({p}, {p})", users)
+
+    # --- words ---
+    # A word's text, meaning and enrichment status live once in ``lexicon``; each
+    # user's copy is a ``user_words`` row (its id is the word id used by the pages
+    # and the API) that also carries the review schedule.
+    def lexicon_entries(self, cur, words):
+        """``{word: (lexicon_id, meaning, enrichment_status)}`` for the normalized ``words`` in the lexicon."""
+        raise NotImplementedError
+
+    def upsert_lexicon(self, cur, entries):
+        """Add ``(word, meaning, enrichment_status)`` entries; returns ``{word: lexicon_id}``.
+
+        Words are normalized keys and must be distinct. An entry that is already
+        done keeps its meaning, and a partial one (translated, examples missing)
+        only gives way to a done one; a pending or failed one takes the new
+        values, so the users holding it get their ``words_version`` bumped.
+        """
+        raise NotImplementedError
+
+    def _insert_user_words(self, cur, rows):
+        """Insert ``(user_id, lexicon_id, added_at)`` rows; returns their ids in order."""
+        raise NotImplementedError
+
+    def insert_words(self, cur, rows):
+        """Add ``(user_id, word, meaning, enrichment_status)`` rows; returns the user word ids in order.
+
+        Repeated words (within ``rows`` or already in the lexicon) share one
+        lexicon entry, so only the first copy of a word stores its meaning.
+        """
+        if not rows:
+            return []
+        entries = {}
+        for _, word, meaning, status in rows:
+            key = normalize_word(word)
+            if key not in entries or STATUS_RANK[status] < STATUS_RANK[entries[key][1]]:
+                entries[key] = (meaning, status)
+        lexicon_ids = self.upsert_lexicon(cur, [(key, meaning, status) for key, (meaning, status) in entries.items()])
+        now = int(time.time())
+        word_ids = self._insert_user_words(cur, [(user_id, lexicon_ids[normalize_word(word)], now)
+                                                 for user_id, word, _, _ in rows])
+        self._bump_versions(cur, [user_id for user_id, _, _, _ in rows])
+        return word_ids
+
+    def word_page(self, cur, user_id, before=None, after=None, page=1, per_page=10):
+        """Fetch one page of a user's words, newest first.
+
+        ``before``/``after`` are keyset cursors (a word id) and cost one index seek on
+        ``user_words(user_id, id)`` however deep the page is; ``page`` keeps old
+        ``?page=N`` links working with OFFSET. One extra row is fetched instead of
+        running COUNT(*). Returns ``(rows, has_newer, has_older)`` where rows are
+        ``(id, word, meaning, enrichment_status)``.
+        """
+        p = self.placeholder
+        if after is not None:
+            cur.execute(f"""
+                SELECT {USER_WORD_COLUMNS} FROM {USER_WORDS_JOIN}
+                WHERE user_words.user_id={p} AND user_words.id > {p}
+                ORDER BY user_words.id ASC
+                LIMIT {p}
+            """, (user_id, after, per_page + 1))
+            rows = cur.fetchall()
+            has_newer = len(rows) > per_page
+            return rows[:per_page][::-1], has_newer, True
+
+        if before is not None:
+            cur.execute(f"""
+                SELECT {USER_WORD_COLUMNS} FROM {USER_WORDS_JOIN}
+                WHERE user_words.user_id={p} AND user_words.id < {p}
+                ORDER BY user_words.id DESC
+                LIMIT {p}
+            """, (user_id, before, per_page + 1))
+            has_newer = True
+        else:
+            page = max(page, 1)
+            cur.execute(f"""
+                SELECT {USER_WORD_COLUMNS} FROM {USER_WORDS_JOIN}
+                WHERE user_words.user_id={p}
+                ORDER BY user_words.id DESC
+                LIMIT {p} OFFSET {p}
+            """, (user_id, per_page + 1, (page - 1) * per_page))
+            has_newer = page > 1
+        rows = cur.fetchall()
+        return rows[:per_page], has_newer, len(rows) > per_page
+
+    def get_word(self, cur, user_id, word_id):
+        p = self.placeholder
+        cur.execute(f"SELECT {USER_WORD_COLUMNS} FROM {USER_WORDS_JOIN} "
+                    f"WHERE user_words.id={p} AND user_words.user_id={p}", (word_id, user_id))
+        return cur.fetchone()
+
+    def word_version(self, cur, user_id):
+        """The user's ``words_version`` stamp, for cache validators: one primary-key lookup.
+
+        Adding or deleting a word bumps it. A word's meaning and status live in the
+        shared lexicon and change without this user writing anything (a background
+        meaning landing, another user's add retrying a failed word,
+        ``refresh-enrichment``); those writes bump every user holding the entry.
+        """
+        cur.execute(f"SELECT words_version FROM users WHERE id={self.placeholder}", (user_id,))
+        row = cur.fetchone()
+        return (row[0] if row else 0,)
+
+    def _bump_versions(self, cur, user_ids):
+        """Bump ``words_version`` of ``user_ids`` after their word list changed."""
+        cur.executemany(f"UPDATE users SET words_version = words_version + 1 WHERE id={self.placeholder}",
+                        [(user_id,) for user_id in sorted(set(user_ids))])
+
+    def _bump_holders(self, cur, lexicon_filter, params):
+        """Bump ``words_version`` of every user holding a lexicon entry that matches ``lexicon_filter``."""
+        cur.execute(f"UPDATE users SET words_version = words_version + 1 WHERE id IN "
+                    f"(SELECT user_words.user_id FROM {USER_WORDS_JOIN} WHERE {lexicon_filter})", params)
+
+    def existing_words(self, cur, user_id, words):
+        """The normalized subset of ``words`` the user already has."""
+        raise NotImplementedError
+
+    def card_at(self, cur, user_id, from_id):
+        """First word at or after ``from_id``: one index seek on user_words(user_id, id)."""
+        p = self.placeholder
+        cur.execute(f"SELECT user_words.id, lexicon.word, lexicon.meaning FROM {USER_WORDS_JOIN} "
+                    f"WHERE user_words.user_id={p} AND user_words.id>={p} ORDER BY user_words.id LIMIT 1",
+                    (user_id, from_id))
+        return cur.fetchone()
+
+    def delete_word(self, cur, user_id, word_id):
+        """Delete one of the user's words; returns its text, or None if it was not theirs.
+
+        The lexicon entry stays: other users may have the word, and adding it
+        again reuses its meaning.
+        """
+        p = self.placeholder
+        cur.execute(f"SELECT lexicon.word FROM {USER_WORDS_JOIN} "
+                    f"WHERE user_words.id={p} AND user_words.user_id={p}", (word_id, user_id))
+        row = cur.fetchone()
+        if row:
+            cur.execute(f"DELETE FROM user_words WHERE id={p} AND user_id={p}", (word_id, user_id))
+            self._bump_versions(cur, [user_id])
+        return row[0] if row else None
+
+    # --- review queue (the SM-2 rules are in srs.py) ---
+    @staticmethod
+    def ensure_review_schema(cur, table='user_words'):
+        """Add the scheduling columns (``srs.COLUMNS``) and the due-queue index to ``table``."""
+        raise NotImplementedError
+
+    def next_due(self, cur, user_id, now=None):
+        """Return ``(id, word, meaning)`` of the user's most overdue card, or None."""
+        p = self.placeholder
+        cur.execute(f"""
+            SELECT user_words.id, lexicon.word, lexicon.meaning FROM {USER_WORDS_JOIN}
+            WHERE user_words.user_id={p} AND user_words.due_at<={p}
+            ORDER BY user_words.due_at
+            LIMIT 1
+        """, (user_id, int(now if now is not None else time.time())))
+        return cur.fetchone()
+
+    def next_due_at(self, cur, user_id):
+        """Unix time the user's next card becomes due, or None if they have no words."""
+        p = self.placeholder
+        cur.execute(f"SELECT MIN(due_at) FROM user_words WHERE user_id={p}", (user_id,))
+        return cur.fetchone()[0]
+
+    def grade(self, cur, user_id, word_id, grade_name, now=None):
+        """Reschedule one card by ``srs.schedule()``; returns False if the card is not the user's."""
+        q, ease_delta = srs.schedule(grade_name)
+        now = int(now if now is not None else time.time())
+        p = self.placeholder
+        if q < 3:
+            interval = "0"
+            due = f"{p} + {srs.RELEARN_SECONDS}"
+            reps = "0"
+        else:
+            interval = "CASE WHEN reps = 0 THEN 1 WHEN reps = 1 THEN 6 ELSE interval_days * ease END"
+            due = f"{p} + CAST(({interval}) * {srs.DAY_SECONDS} AS BIGINT)"
+            reps = "reps + 1"
+        cur.execute(f"""
+            UPDATE user_words SET
+                ease = CASE WHEN ease + {p} < {srs.MIN_EASE} THEN {srs.MIN_EASE} ELSE ease + {p} END,
+                interval_days = {interval},
+                reps = {reps},
+                due_at = {due}
+            WHERE id={p} AND user_id={p}
+        """, (ease_delta, ease_delta, now, word_id, user_id))
+        return cur.rowcount == 1
+
+    # --- background enrichment (by lexicon entry, so each word is enriched once for everyone) ---
+    def pending_words(self, cur, status='pending'):
+        """``(lexicon_id, word)`` of every entry still waiting for a meaning (or with another ``status``)."""
+        cur.execute(f"SELECT id, word FROM lexicon WHERE enrichment_status = {self.placeholder} ORDER BY id",
+                    (status,))
+        return cur.fetchall()
+
+    def set_meanings(self, cur, rows, status='done'):
+        """Store ``(lexicon_id, meaning)`` pairs and give those entries ``status`` (done or partial)."""
+        raise NotImplementedError
+
+    def mark_failed(self, cur, lexicon_ids):
+        raise NotImplementedError
+
+    # --- bulk imports ---
+    def create_import(self, cur, user_id, total_bytes):
+        raise NotImplementedError
+
+    def update_import(self, cur, import_id, **fields):
+        """Set any of ``IMPORT_FIELDS`` on an import and bump its ``updated_at``."""
+        p = self.placeholder
+        names = [name for name in IMPORT_FIELDS if name in fields]
+        assignments = ", ".join(f"{name} = {p}" for name in names + ['updated_at'])
+        cur.execute(f"UPDATE word_imports SET {assignments} WHERE id = {p}",
+                    [fields[name] for name in names] + [int(time.time()), import_id])
+
+    def get_import(self, cur, user_id, import_id):
+        """The import as a dict, or None if it is not the user's."""
+        p = self.placeholder
+        columns = ('id', 'total_bytes', 'created_at', 'updated_at') + IMPORT_FIELDS
+        cur.execute(f"SELECT {', '.join(columns)} FROM word_imports WHERE id = {p} AND user_id = {p}",
+                    (import_id, user_id))
+        row = cur.fetchone()
+        return dict(zip(columns, row)) if row else None
+
+    # --- search ---
+    def search(self, cur, user_id, query, prefix=False, page=1, per_page=10):
+        """Ranked full-text search over a user's words and meanings.
+
+        With ``prefix`` every term is matched as the start of ``lexicon.word``, each
+        word comes once and the ones the user added most recently come first
+        (autocomplete); otherwise results are ordered by relevance. Returns
+        ``(rows, has_more)`` with rows shaped like ``word_page``; an empty query
+        matches nothing.
+        """
+        raise NotImplementedError
+
+    def build_search_index(self):
+        """Create the search index if needed and backfill it from existing rows."""
+        raise NotImplementedError
+
+    # --- enrichment cache table ---
+    def cache_get(self, cur, keys, max_age_days):
+        """Return ``(word, translation, examples)`` rows younger than ``max_age_days``."""
+        raise NotImplementedError
+
+    def cache_put(self, cur, rows):
+        """Upsert ``(word, translation, examples)`` rows."""
+        raise NotImplementedError
+
+    def cache_delete(self, cur, keys=None):
+        raise NotImplementedError
+
+
+# Word matches rank above meaning matches. Queries repeat this expression
+# verbatim so the planner can use the GIN index built on it.
+PG_SEARCH_VECTOR = ("setweight(to_tsvector('simple', coalesce(word, '')), 'A') || "
+                    "setweight(to_tsvector('simple', coalesce(meaning, '')), 'B')")
+PG_SEARCH_INDEX = f"lexicon_search_idx ON lexicon USING GIN (({PG_SEARCH_VECTOR}))"
+
+
+class TimedPgCursor(psycopg2.extensions.cursor):
+    """psycopg2 cursor that times each statement as the ``query`` phase (pass as ``cursor_factory``)."""
+
+    def execute(self, query, vars=None):
+        with phase('query'):
+            return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        with phase('query'):
+            return super().executemany(query, vars_list)
+
+
+class TimedSQLiteCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        with phase('query'):
+            return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        with phase('query'):
+            return super().executemany(sql, seq_of_parameters)
+
+
+class TimedSQLiteConnection(sqlite3.Connection):
+    """Hands out ``TimedSQLiteCursor``s, so statements are timed like on Postgres."""
+
+    def cursor(self, factory=TimedSQLiteCursor):
+        return super().cursor(factory)
+
+
+def _pg_prefix_query(terms):
+    """``to_tsquery`` text matching every term as a prefix of a word-column lexeme."""
+    return " & ".join("'{}':*A".format(t.replace("\\", "\\\\").replace("'", "''")) for t in terms)
+
+
+def _fts5_query(terms, prefix):
+    quoted = ['"{}"'.format(t.replace('"', '""')) + ("*" if prefix else "") for t in terms]
+    return f"word : ({' AND '.join(quoted)})" if prefix else " AND ".join(quoted)
+
+
+class PostgresStorage(Storage):
+    """Backed by a ``db_pool.ConnectionPool``."""
+
+    backend = 'postgres'
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def connection(self):
+        return self.pool.connection()
+
+    def create_schema(self, cur):
+        cur.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                id SERIAL PRIMARY KEY,
+                username TEXT NOT NULL,
+                password TEXT NOT NULL,
+                words_version BIGINT NOT NULL DEFAULT 0
+            );
+        ''')
+        cur.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS words_version BIGINT NOT NULL DEFAULT 0")
+        cur.execute('''
+            CREATE TABLE IF NOT EXISTS lexicon (
+                id SERIAL PRIMARY KEY,
+                word TEXT NOT NULL UNIQUE,
+                meaning TEXT NOT NULL DEFAULT '',
+                enrichment_status TEXT NOT NULL DEFAULT 'done'
+            );
+        ''')
+        cur.execute("CREATE INDEX IF NOT EXISTS lexicon_pending_idx ON lexicon (id) "
+                    "WHERE enrichment_status = 'pending'")
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {PG_SEARCH_INDEX}")
+        cur.execute('''
+            CREATE TABLE IF NOT EXISTS user_words (
+                id SERIAL PRIMARY KEY,
+                user_id INTEGER REFERENCES users(id),
+                lexicon_id INTEGER NOT NULL REFERENCES lexicon(id),
+                added_at BIGINT NOT NULL DEFAULT 0
+            );
+        ''')
+        cur.execute("CREATE INDEX IF NOT EXISTS user_words_user_id_id_idx ON user_words (user_id, id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS user_words_lexicon_id_user_id_idx ON user_words (lexicon_id, user_id)")
+        self.ensure_review_schema(cur)
+        cur.execute("SELECT to_regclass('words')")
+        if cur.fetchone()[0] is not None:
+            self._migrate_words(cur)
+        cur.execute(IMPORTS_TABLE_SQL.format(id_type='SERIAL'))
+        cur.execute('''
+            CREATE TABLE IF NOT EXISTS enrichment_cache (
+                word TEXT PRIMARY KEY,
+                translation TEXT NOT NULL,
+                examples TEXT NOT NULL DEFAULT '',
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            );
+        ''')
+
+    @staticmethod
+    def ensure_review_schema(cur, table='user_words'):
+        for name, definition in srs.COLUMNS.items():
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {name} {definition}")
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {table}_user_id_due_at_idx ON {table} (user_id, due_at)")
+
+    def _migrate_words(self, cur):
+        """Move a pre-lexicon ``words`` table into lexicon and user_words, then drop it."""
+        cur.execute("ALTER TABLE words ADD COLUMN IF NOT EXISTS enrichment_status TEXT NOT NULL DEFAULT 'done'")
+        self.ensure_review_schema(cur, 'words')
+        cur.execute(MIGRATE_LEXICON_SQL.format(key=PG_LEGACY_WORD_KEY))
+        cur.execute(MIGRATE_USER_WORDS_SQL.format(key=PG_LEGACY_WORD_KEY, p='%s'), (int(time.time()),))
+        cur.execute("SELECT setval(pg_get_serial_sequence('user_words', 'id'), COALESCE(MAX(id), 0) + 1, false) "
+                    "FROM user_words")
+        # Old jobs point at words ids; init-db re-queues pending lexicon entries
+        cur.execute("DROP TABLE IF EXISTS enrichment_jobs")
+        cur.execute("DROP TABLE words")
+
+    def stats(self):
+        return dict(self.pool.stats(), backend=self.backend)
+
+    def lexicon_entries(self, cur, words):
+        cur.execute("SELECT word, id, meaning, enrichment_status FROM lexicon WHERE word = ANY(%s)",
+                    ([normalize_word(w) for w in words],))
+        return {word: (lexicon_id, meaning, status) for word, lexicon_id, meaning, status in cur.fetchall()}
+
+    def upsert_lexicon(self, cur, entries):
+        if not entries:
+            return {}
+        self._bump_holders(cur, "lexicon.word = ANY(%s) AND lexicon.enrichment_status <> 'done'",
+                           ([word for word, _, _ in entries],))
+        rows = execute_values(
+            cur,
+            "INSERT INTO lexicon (word, meaning, enrichment_status) VALUES %s "
+            "ON CONFLICT (word) DO UPDATE SET "
+            f"meaning = CASE WHEN {KEEP_ENTRY_SQL} THEN lexicon.meaning ELSE EXCLUDED.meaning END, "
+            f"enrichment_status = CASE WHEN {KEEP_ENTRY_SQL} THEN lexicon.enrichment_status "
+            "ELSE EXCLUDED.enrichment_status END "
+            "RETURNING word, id",
+            entries, page_size=len(entries), fetch=True
+        )
+        return dict(rows)
+
+    def _insert_user_words(self, cur, rows):
+        ids = execute_values(
+            cur, "INSERT INTO user_words (user_id, lexicon_id, added_at) VALUES %s RETURNING id",
+            rows, page_size=len(rows), fetch=True
+        )
+        return [word_id for (word_id,) in ids]
+
+    def existing_words(self, cur, user_id, words):
+        cur.execute(f"SELECT DISTINCT lexicon.word FROM {USER_WORDS_JOIN} "
+                    "WHERE user_words.user_id = %s AND lexicon.word = ANY(%s)",
+                    (user_id, [normalize_word(w) for w in words]))
+        return {word for (word,) in cur.fetchall()}
+
+    def create_import(self, cur, user_id, total_bytes):
+        now = int(time.time())
+        cur.execute("INSERT INTO word_imports (user_id, total_bytes, created_at, updated_at) "
+                    "VALUES (%s, %s, %s, %s) RETURNING id", (user_id, total_bytes, now, now))
+        return cur.fetchone()[0]
+
+    def set_meanings(self, cur, rows, status='done'):
+        self._bump_holders(cur, "lexicon.id = ANY(%s)", ([lexicon_id for lexicon_id, _ in rows],))
+        execute_values(
+            cur,
+            "UPDATE lexicon SET meaning = v.meaning, enrichment_status = v.status "
+            "FROM (VALUES %s) AS v(id, meaning, status) WHERE lexicon.id = v.id",
+            [(lexicon_id, meaning, status) for lexicon_id, meaning in rows],
+            page_size=len(rows)
+        )
+
+    def mark_failed(self, cur, lexicon_ids):
+        self._bump_holders(cur, "lexicon.id = ANY(%s)", (list(lexicon_ids),))
+        cur.execute("UPDATE lexicon SET enrichment_status = 'failed' WHERE id = ANY(%s)", (list(lexicon_ids),))
+
+    def search(self, cur, user_id, query, prefix=False, page=1, per_page=10):
+        terms = query.split()
+        if not terms:
+            return [], False
+        # Autocomplete lists each word once, the user's newest first, like the SQLite backend
+        if prefix:
+            tsquery, text, columns = "to_tsquery", _pg_prefix_query(terms), SUGGEST_WORD_COLUMNS
+            order = "GROUP BY lexicon.id ORDER BY MAX(user_words.id) DESC"
+        else:
+            tsquery, text, columns = "websearch_to_tsquery", query, USER_WORD_COLUMNS
+            order = f"ORDER BY ts_rank({PG_SEARCH_VECTOR}, query) DESC, user_words.id DESC"
+        cur.execute(f"""
+            SELECT {columns}
+            FROM {USER_WORDS_JOIN}, {tsquery}('simple', %s) AS query
+            WHERE user_words.user_id = %s AND ({PG_SEARCH_VECTOR}) @@ query
+            {order}
+            LIMIT %s OFFSET %s
+        """, (text, user_id, per_page + 1, (max(page, 1) - 1) * per_page))
+        rows = cur.fetchall()
+        return rows[:per_page], len(rows) > per_page
+
+    def build_search_index(self):
+        # CONCURRENTLY keeps the table writable while the index is built, but
+        # cannot run inside a transaction, so this uses its own connection.
+        conn = psycopg2.connect(self.pool.dsn, **self.pool.connect_kwargs)
+        try:
+            conn.autocommit = True
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT i.indisvalid FROM pg_index i
+                JOIN pg_class c ON c.oid = i.indexrelid
+                WHERE c.relname = 'lexicon_search_idx'
+            """)
+            row = cur.fetchone()
+            if row and not row[0]:
+                # Left behind by an interrupted concurrent build
+                cur.execute("DROP INDEX CONCURRENTLY lexicon_search_idx")
+            cur.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {PG_SEARCH_INDEX}")
+            cur.execute("ANALYZE lexicon")
+        finally:
+            conn.close()
+
+    def cache_get(self, cur, keys, max_age_days):
+        cur.execute(
+            "SELECT word, translation, examples FROM enrichment_cache "
+            "WHERE word = ANY(%s) AND updated_at > now() - make_interval(days => %s)",
+            (list(keys), max_age_days)
+        )
+        return cur.fetchall()
+
+    def cache_put(self, cur, rows):
+        execute_values(
+            cur,
+            "INSERT INTO enrichment_cache (word, translation, examples) VALUES %s "
+            "ON CONFLICT (word) DO UPDATE SET translation = EXCLUDED.translation, "
+            "examples = EXCLUDED.examples, updated_at = now()",
+            rows,
+            page_size=len(rows)
+        )
+
+    def cache_delete(self, cur, keys=None):
+        if keys is None:
+            cur.execute("DELETE FROM enrichment_cache")
+        else:
+            cur.execute("DELETE FROM enrichment_cache WHERE word = ANY(%s)", (list(keys),))
+
+
+class SQLiteStorage(Storage):
+    """Single-file database for one-node deployments and local load tests.
+
+    Each thread keeps one connection open for its lifetime (re-opened after a
+    fork), in WAL mode so readers never block the writer, with
+    ``synchronous=NORMAL`` so commits skip the per-transaction fsync. Every query
+    is a fixed SQL string with bound parameters, so sqlite3's per-connection
+    statement cache compiles it once and reuses the prepared statement after that.
+    """
+
+    backend = 'sqlite'
+    placeholder = "?"
+
+    def __init__(self, path, busy_timeout=5, cached_statements=256):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._opened = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout,
+                               cached_statements=self.cached_statements, factory=TimedSQLiteConnection)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        with self._lock:
+            self._opened += 1
+        return conn
+
+    def _thread_conn(self):
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            # A connection inherited across fork must not be used by the child
+            self._local.conn = self._connect()
+            self._local.pid = pid
+        return self._local.conn
+
+    @contextmanager
+    def connection(self):
+        with phase('db_connect'):
+            conn = self._thread_conn()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def create_schema(self, cur):
+        cur.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY,
+                username TEXT NOT NULL,
+                password TEXT NOT NULL,
+                words_version INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        cur.execute("PRAGMA table_info(users)")
+        if 'words_version' not in {row[1] for row in cur.fetchall()}:
+            cur.execute("ALTER TABLE users ADD COLUMN words_version INTEGER NOT NULL DEFAULT 0")
+        cur.execute('''
+            CREATE TABLE IF NOT EXISTS lexicon (
+                id INTEGER PRIMARY KEY,
+                word TEXT NOT NULL UNIQUE,
+                meaning TEXT NOT NULL DEFAULT '',
+                enrichment_status TEXT NOT NULL DEFAULT 'done'
+            )
+        ''')
+        cur.execute("CREATE INDEX IF NOT EXISTS lexicon_pending_idx ON lexicon (id) "
+                    "WHERE enrichment_status = 'pending'")
+        cur.execute('''
+            CREATE TABLE IF NOT EXISTS user_words (
+                id INTEGER PRIMARY KEY,
+                user_id INTEGER REFERENCES users(id),
+                lexicon_id INTEGER NOT NULL REFERENCES lexicon(id),
+                added_at INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        cur.execute("CREATE INDEX IF NOT EXISTS user_words_user_id_id_idx ON user_words (user_id, id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS user_words_lexicon_id_user_id_idx ON user_words (lexicon_id, user_id)")
+        self.ensure_review_schema(cur)
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'words'")
+        if cur.fetchone() is not None:
+            self._migrate_words(cur)
+        cur.execute(IMPORTS_TABLE_SQL.format(id_type='INTEGER'))
+        cur.execute('''
+            CREATE TABLE IF NOT EXISTS enrichment_cache (
+                word TEXT PRIMARY KEY,
+                translation TEXT NOT NULL,
+                examples TEXT NOT NULL DEFAULT '',
+                updated_at INTEGER NOT NULL
+            )
+        ''')
+        self._create_search_index(cur)
+
+    @staticmethod
+    def ensure_review_schema(cur, table='user_words'):
+        cur.execute(f"PRAGMA table_info({table})")
+        existing = {row[1] for row in cur.fetchall()}
+        for name, definition in srs.COLUMNS.items():
+            if name not in existing:
+                cur.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {table}_user_id_due_at_idx ON {table} (user_id, due_at)")
+
+    def _migrate_words(self, cur):
+        """Move a pre-lexicon ``words`` table into lexicon and user_words, then drop it."""
+        cur.execute("PRAGMA table_info(words)")
+        if 'enrichment_status' not in {row[1] for row in cur.fetchall()}:
+            cur.execute("ALTER TABLE words ADD COLUMN enrichment_status TEXT NOT NULL DEFAULT 'done'")
+        self.ensure_review_schema(cur, 'words')
+        cur.connection.create_function("normalize_word", 1, normalize_word, deterministic=True)
+        cur.execute(MIGRATE_LEXICON_SQL.format(key=SQLITE_LEGACY_WORD_KEY))
+        cur.execute(MIGRATE_USER_WORDS_SQL.format(key=SQLITE_LEGACY_WORD_KEY, p='?'), (int(time.time()),))
+        # Dropping words drops its FTS triggers; the index moves to lexicon_fts
+        cur.execute("DROP TABLE words")
+        cur.execute("DROP TABLE IF EXISTS words_fts")
+
+    def _create_search_index(self, cur):
+        """FTS5 index over the lexicon, kept in sync by triggers; backfilled when first created."""
+        cur.execute("SELECT 1 FROM sqlite_master WHERE name = 'lexicon_fts'")
+        exists = cur.fetchone() is not None
+        cur.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS lexicon_fts USING fts5(
+                word, meaning, content='lexicon', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            )
+        ''')
+        cur.execute('''
+            CREATE TRIGGER IF NOT EXISTS lexicon_fts_insert AFTER INSERT ON lexicon BEGIN
+                INSERT INTO lexicon_fts (rowid, word, meaning) VALUES (new.id, new.word, new.meaning);
+            END
+        ''')
+        cur.execute('''
+            CREATE TRIGGER IF NOT EXISTS lexicon_fts_delete AFTER DELETE ON lexicon BEGIN
+                INSERT INTO lexicon_fts (lexicon_fts, rowid, word, meaning)
+                VALUES ('delete', old.id, old.word, old.meaning);
+            END
+        ''')
+        # Only text changes touch the index; status updates leave it alone
+        cur.execute('''
+            CREATE TRIGGER IF NOT EXISTS lexicon_fts_update AFTER UPDATE OF word, meaning ON lexicon BEGIN
+                INSERT INTO lexicon_fts (lexicon_fts, rowid, word, meaning)
+                VALUES ('delete', old.id, old.word, old.meaning);
+                INSERT INTO lexicon_fts (rowid, word, meaning) VALUES (new.id, new.word, new.meaning);
+            END
+        ''')
+        if not exists:
+            cur.execute("INSERT INTO lexicon_fts (lexicon_fts) VALUES ('rebuild')")
+
+    def stats(self):
+        with self.connection() as conn:
+            journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        with self._lock:
+            opened = self._opened
+        return {'backend': self.backend, 'pid': os.getpid(), 'path': self.path,
+                'journal_mode': journal_mode, 'connections_opened': opened}
+
+    def lexicon_entries(self, cur, words):
+        cur.execute("SELECT word, id, meaning, enrichment_status FROM lexicon "
+                    "WHERE word IN (SELECT value FROM json_each(?))",
+                    (json.dumps([normalize_word(w) for w in words]),))
+        return {word: (lexicon_id, meaning, status) for word, lexicon_id, meaning, status in cur.fetchall()}
+
+    def upsert_lexicon(self, cur, entries):
+        self._bump_holders(cur, "lexicon.word IN (SELECT value FROM json_each(?)) "
+                           "AND lexicon.enrichment_status <> 'done'",
+                           (json.dumps([word for word, _, _ in entries]),))
+        ids = {}
+        for entry in entries:
+            cur.execute(
+                "INSERT INTO lexicon (word, meaning, enrichment_status) VALUES (?, ?, ?) "
+                "ON CONFLICT (word) DO UPDATE SET "
+                f"meaning = CASE WHEN {KEEP_ENTRY_SQL} THEN lexicon.meaning "
+                "ELSE excluded.meaning END, "
+                f"enrichment_status = CASE WHEN {KEEP_ENTRY_SQL} THEN lexicon.enrichment_status "
+                "ELSE excluded.enrichment_status END "
+                "RETURNING id",
+                entry
+            )
+            ids[entry[0]] = cur.fetchone()[0]
+        return ids
+
+    def _insert_user_words(self, cur, rows):
+        ids = []
+        for row in rows:
+            cur.execute("INSERT INTO user_words (user_id, lexicon_id, added_at) VALUES (?, ?, ?)", row)
+            ids.append(cur.lastrowid)
+        return ids
+
+    def existing_words(self, cur, user_id, words):
+        cur.execute(f"SELECT DISTINCT lexicon.word FROM {USER_WORDS_JOIN} "
+                    "WHERE user_words.user_id = ? AND lexicon.word IN (SELECT value FROM json_each(?))",
+                    (user_id, json.dumps([normalize_word(w) for w in words])))
+        return {word for (word,) in cur.fetchall()}
+
+    def create_import(self, cur, user_id, total_bytes):
+        now = int(time.time())
+        cur.execute("INSERT INTO word_imports (user_id, total_bytes, created_at, updated_at) VALUES (?, ?, ?, ?)",
+                    (user_id, total_bytes, now, now))
+        return cur.lastrowid
+
+    def set_meanings(self, cur, rows, status='done'):
+        self._bump_holders(cur, "lexicon.id IN (SELECT value FROM json_each(?))",
+                           (json.dumps([lexicon_id for lexicon_id, _ in rows]),))
+        cur.executemany("UPDATE lexicon SET meaning = ?, enrichment_status = ? WHERE id = ?",
+                        [(meaning, status, lexicon_id) for lexicon_id, meaning in rows])
+
+    def mark_failed(self, cur, lexicon_ids):
+        self._bump_holders(cur, "lexicon.id IN (SELECT value FROM json_each(?))", (json.dumps(list(lexicon_ids)),))
+        cur.executemany("UPDATE lexicon SET enrichment_status = 'failed' WHERE id = ?",
+                        [(lexicon_id,) for lexicon_id in lexicon_ids])
+
+    def search(self, cur, user_id, query, prefix=False, page=1, per_page=10):
+        terms = query.split()
+        if not terms:
+            return [], False
+        # bm25 is lower-is-better; a word-column hit weighs ten times a meaning hit.
+        # Autocomplete skips ranking and lists each word once, the user's newest first.
+        if prefix:
+            columns, order = SUGGEST_WORD_COLUMNS, "GROUP BY lexicon.id ORDER BY MAX(user_words.id) DESC"
+        else:
+            columns, order = USER_WORD_COLUMNS, "ORDER BY bm25(lexicon_fts, 10.0, 1.0), user_words.id DESC"
+        cur.execute(f"""
+            SELECT {columns}
+            FROM lexicon_fts
+            JOIN lexicon ON lexicon.id = lexicon_fts.rowid
+            JOIN user_words ON user_words.lexicon_id = lexicon.id
+            WHERE lexicon_fts MATCH ? AND user_words.user_id = ?
+            {order}
+            LIMIT ? OFFSET ?
+        """, (_fts5_query(terms, prefix), user_id, per_page + 1, (max(page, 1) - 1) * per_page))
+        rows = cur.fetchall()
+        return rows[:per_page], len(rows) > per_page
+
+    def build_search_index(self):
+        with self.connection() as conn:
+            cur = conn.cursor()
+            self._create_search_index(cur)
+            cur.execute("INSERT INTO lexicon_fts (lexicon_fts) VALUES ('rebuild')")
+            cur.execute("INSERT INTO lexicon_fts (lexicon_fts) VALUES ('optimize')")
+
+    # Key lists are passed as one JSON parameter so each query stays a single
+    # cached statement whatever the number of words.
+    def cache_get(self, cur, keys, max_age_days):
+        cur.execute(
+            "SELECT word, translation, examples FROM enrichment_cache "
+            "WHERE word IN (SELECT value FROM json_each(?)) AND updated_at > ?",
+            (json.dumps(list(keys)), int(time.time()) - max_age_days * srs.DAY_SECONDS)
+        )
+        return cur.fetchall()
+
+    def cache_put(self, cur, rows):
+        now = int(time.time())
+        cur.executemany(
+            "INSERT INTO enrichment_cache (word, translation, examples, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (word) DO UPDATE SET translation = excluded.translation, "
+            "examples = excluded.examples, updated_at = excluded.updated_at",
+            [(word, translation, examples, now) for word, translation, examples in rows]
+        )
+
+    def cache_delete(self, cur, keys=None):
+        if keys is None:
+            cur.execute("DELETE FROM enrichment_cache")
+        else:
+            cur.execute("DELETE FROM enrichment_cache WHERE word IN (SELECT value FROM json_each(?))",
+                        (json.dumps(list(keys)),))
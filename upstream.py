@@ -0,0 +1,189 @@
+"""Shared clients for the translation and dictionary upstreams.
+
+Each ``UpstreamClient`` keeps one ``requests.Session`` per process, so calls
+reuse keep-alive connections (up to ``pool_size`` per host) instead of paying
+a TCP and TLS handshake per word. Every call has a timeout and is retried at
+most ``retries`` times on connection errors, timeouts and 5xx/429 answers.
+Consecutive failures trip a ``CircuitBreaker``: while it is open, calls fail
+at once with ``CircuitOpen`` instead of waiting on a dead upstream, and after
+``reset_timeout`` seconds a single trial call decides whether it closes again.
+Clients that bring their own HTTP stack (googletrans) go through ``call()``
+to get the same retries, breaker and latency histogram.
+"""
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+class UpstreamError(Exception):
+    """A retryable HTTP status from the upstream."""
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures; half-opens after ``reset_timeout`` seconds."""
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+        self._counters = {'opened': 0, 'rejected': 0}
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self):
+        """Whether a call may go out now; in half-open state only one trial call at a time."""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            self._counters['rejected'] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._counters['opened'] += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def stats(self):
+        state = self.state
+        with self._lock:
+            return dict(self._counters, state=state, consecutive_failures=self._failures)
+
+
+UPSTREAM_SECONDS = metrics.Histogram("vocab_upstream_seconds", "Time of one upstream call attempt.",
+                                     ("upstream", "outcome"))
+_clients = []
+
+
+def _render_breakers():
+    lines = ["# HELP vocab_upstream_breaker_open Whether calls to the upstream are being short-circuited.",
+             "# TYPE vocab_upstream_breaker_open gauge"]
+    for client in _clients:
+        lines.append(f'vocab_upstream_breaker_open{{upstream="{client.name}"}} '
+                     f'{int(client.breaker.state == CircuitBreaker.OPEN)}')
+    return lines
+
+
+metrics.register(UPSTREAM_SECONDS.render)
+metrics.register(_render_breakers)
+
+
+class UpstreamClient:
+    """Pooled, timeout-bounded, retried and circuit-broken access to one upstream service."""
+
+    def __init__(self, name, timeout=5, retries=1, backoff=0.2, pool_size=10,
+                 failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._lock = threading.Lock()
+        self._session = None
+        self._pid = None
+        self._counters = {'calls': 0, 'attempts': 0, 'retries': 0, 'failures': 0}
+        _clients.append(self)
+
+    @property
+    def session(self):
+        """This process's ``requests.Session`` (re-created after a fork, like the DB pool)."""
+        pid = os.getpid()
+        if self._session is None or self._pid != pid:
+            with self._lock:
+                if self._session is None or self._pid != pid:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._session = session
+                    self._pid = pid
+        return self._session
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def call(self, fn, *args, **kwargs):
+        """Run ``fn`` with retries behind the breaker; raises ``CircuitOpen`` without calling it when open."""
+        self._count('calls')
+        for attempt in range(self.retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpen(f"{self.name} upstream is unavailable")
+            if attempt:
+                self._count('retries')
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            self._count('attempts')
+            started = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                UPSTREAM_SECONDS.observe((self.name, 'error'), time.perf_counter() - started)
+                self.breaker.record_failure()
+                if attempt == self.retries:
+                    self._count('failures')
+                    raise
+            else:
+                UPSTREAM_SECONDS.observe((self.name, 'ok'), time.perf_counter() - started)
+                self.breaker.record_success()
+                return result
+
+    def _send(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        res = self.session.request(method, url, **kwargs)
+        if res.status_code in RETRY_STATUSES:
+            raise UpstreamError(f"{self.name} upstream answered {res.status_code}")
+        return res
+
+    def request(self, method, url, **kwargs):
+        """HTTP request over the pooled session; 4xx answers other than 429 are returned, not retried."""
+        return self.call(self._send, method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        stats['breaker'] = self.breaker.stats()
+        return stats
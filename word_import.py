@@ -0,0 +1,128 @@
+"""Bulk word imports from uploaded CSV or plain-text files.
+
+An upload is spooled to a temporary file while the request is read, then a
+worker thread streams it back one line at a time: words are deduplicated
+against the file itself and the user's existing words, saved in chunks of
+``chunk_size`` (one enrichment call and one commit per chunk) and progress is
+written to the ``word_imports`` table, so any worker can report status.
+"""
+import csv
+import io
+import logging
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from enrichment_cache import normalize_word
+
+log = logging.getLogger(__name__)
+
+MAX_WORD_LENGTH = 100
+COPY_BUFFER_SIZE = 64 * 1024
+
+
+def iter_words(binary_file):
+    """Yield the first column of each CSV row (or each line of a text file).
+
+    A leading ``word`` header is skipped, blank rows are ignored and a UTF-8
+    byte-order mark is dropped. Rows are read lazily, so memory use does not
+    grow with the file.
+    """
+    text = io.TextIOWrapper(binary_file, encoding='utf-8-sig', errors='replace', newline='')
+    try:
+        first = True
+        for row in csv.reader(text):
+            word = row[0].strip() if row else ""
+            if first:
+                first = False
+                if word.lower() == 'word':
+                    continue
+            if word:
+                yield word
+    finally:
+        # Leave the caller's file open
+        text.detach()
+
+
+def spool_upload(stream):
+    """Copy an upload stream to a temporary file in fixed-size blocks; returns ``(path, size)``."""
+    fd, path = tempfile.mkstemp(prefix="word-import-", suffix=".csv")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            shutil.copyfileobj(stream, f, COPY_BUFFER_SIZE)
+            size = f.tell()
+    except Exception:
+        os.remove(path)
+        raise
+    return path, size
+
+
+class WordImporter:
+    """Runs imports on a small thread pool; ``save_words(user_id, words)`` stores a chunk.
+
+    ``save_words`` returns ``(rows, untranslated)`` like ``app.save_words``, so
+    a chunk goes through the same enrichment path (and the same bounded
+    executor and deadline) as the Add Word form.
+    """
+
+    def __init__(self, store, save_words, chunk_size=200, workers=1):
+        self.store = store
+        self.save_words = save_words
+        self.chunk_size = chunk_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="word-import")
+
+    def start(self, user_id, stream):
+        """Spool ``stream`` and queue the import; returns the import id."""
+        path, size = spool_upload(stream)
+        try:
+            with self.store.connection() as conn:
+                import_id = self.store.create_import(conn.cursor(), user_id, size)
+        except Exception:
+            os.remove(path)
+            raise
+        self._executor.submit(self.run, import_id, user_id, path)
+        return import_id
+
+    def _update(self, import_id, **fields):
+        with self.store.connection() as conn:
+            self.store.update_import(conn.cursor(), import_id, **fields)
+
+    def run(self, import_id, user_id, path):
+        counters = {'words_read': 0, 'added': 0, 'duplicates': 0, 'skipped': 0, 'untranslated': 0}
+        seen = set()
+        try:
+            self._update(import_id, status='running')
+            with open(path, 'rb') as f:
+                chunk = []
+                for word in iter_words(f):
+                    counters['words_read'] += 1
+                    key = normalize_word(word)
+                    if len(word) > MAX_WORD_LENGTH:
+                        counters['skipped'] += 1
+                    elif key in seen:
+                        counters['duplicates'] += 1
+                    else:
+                        seen.add(key)
+                        chunk.append(word)
+                    if len(chunk) >= self.chunk_size:
+                        self._save_chunk(user_id, chunk, counters)
+                        self._update(import_id, bytes_read=f.tell(), **counters)
+                        chunk = []
+                if chunk:
+                    self._save_chunk(user_id, chunk, counters)
+                self._update(import_id, status='done', bytes_read=f.tell(), **counters)
+        except Exception as exc:
+            log.exception("Word import %s failed", import_id)
+            self._update(import_id, status='failed', error=repr(exc), **counters)
+        finally:
+            os.remove(path)
+
+    def _save_chunk(self, user_id, chunk, counters):
+        with self.store.connection() as conn:
+            existing = self.store.existing_words(conn.cursor(), user_id, chunk)
+        new_words = [word for word in chunk if normalize_word(word) not in existing]
+        rows, untranslated = self.save_words(user_id, new_words)
+        counters['duplicates'] += len(chunk) - len(new_words)
+        counters['added'] += len(rows)
+        counters['untranslated'] += untranslated